@@ -0,0 +1,189 @@
+"""Memo of per-text model analyses (topic, sentiment, urgency).
+
+The same text is analysed repeatedly: the report reruns the classifiers over
+the session's patient text on every "regenerate", a speculative draft and its
+sent turn are the same words, and batch jobs re-read archived turns whose
+signals were computed live. Results here are keyed by a hash of the analysis
+kind, the model and the exact text, so a text already analysed never reaches
+a transformer again:
+
+- an in-process LRU (``analysis_memo_max_entries`` / ``analysis_memo_ttl_seconds``);
+- optionally (``analysis_memo_store``) the ``analysis_memo`` MongoDB collection,
+  shared across processes and restarts;
+- concurrent requests for the same text wait for the one computing it.
+
+``remember_message`` seeds the memo from the signals an archived message
+already carries in its ``metadata``. ``stats()`` is on ``/metrics``.
+"""
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timezone
+
+from config import settings
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "analysis_memo"
+TOPIC_MODEL = "facebook/bart-large-mnli"
+URGENCY_MODEL = "j-hartmann/emotion-english-distilroberta-base"
+# Bumped when the way a model is applied changes (2: windowed long-text inference).
+KEY_VERSION = 2
+
+_memory = TTLCache(maxsize=settings.analysis_memo_max_entries,
+                   ttl=settings.analysis_memo_ttl_seconds)
+_lock = threading.Lock()
+_inflight: dict = {}  # key -> Future of the computation in progress
+_counts = {"memory_hits": 0, "store_hits": 0, "computed": 0, "coalesced": 0}
+
+
+def memo_key(kind: str, model: str, text: str) -> str:
+    """Memo key for one analysis of ``text``."""
+    raw = f"{KEY_VERSION}\x00{kind}\x00{model}\x00{text}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _count(name: str) -> None:
+    with _lock:
+        _counts[name] += 1
+
+
+def _collection():
+    from db import get_db
+    return get_db()[COLLECTION]
+
+
+def _load(key: str):
+    if not settings.analysis_memo_store:
+        return None
+    try:
+        doc = _collection().find_one({"_id": key}, {"value": 1})
+    except Exception:
+        logger.warning("Analysis memo store unavailable; computing instead.", exc_info=True)
+        return None
+    return tuple(doc["value"]) if doc else None
+
+
+def _save(key: str, kind: str, model: str, value: tuple) -> None:
+    if not settings.analysis_memo_store:
+        return
+    try:
+        _collection().update_one(
+            {"_id": key},
+            {"$setOnInsert": {"kind": kind, "model": model, "value": list(value),
+                              "created_at": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+    except Exception:
+        logger.warning("Could not persist an analysis memo entry.", exc_info=True)
+
+
+def memoized(kind: str, model: str, text: str, compute) -> tuple:
+    """Return ``compute(text)`` for this analysis of ``text``, computed at most once."""
+    key = memo_key(kind, model, text)
+    value = _memory.get(key)
+    if value is not None:
+        _count("memory_hits")
+        return value
+    with _lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+        else:
+            _counts["coalesced"] += 1
+    if not leader:
+        return future.result()
+    try:
+        value = _load(key)
+        if value is not None:
+            _count("store_hits")
+        else:
+            value = tuple(compute(text))
+            _count("computed")
+            _save(key, kind, model, value)
+        _memory.set(key, value)
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    else:
+        future.set_result(value)
+        return value
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+
+
+def remember(kind: str, model: str, text: str, value) -> None:
+    """Record an analysis computed elsewhere (e.g. stored with a message)."""
+    _memory.set(memo_key(kind, model, text), tuple(value))
+
+
+def predict_topic(text: str) -> tuple:
+    """Memoized ``topic_classifier.predict_topic``: ``(label, score)``."""
+    def compute(t):
+        from topic_classifier import predict_topic as run, load_topic_classifier
+        return run(t, load_topic_classifier())
+    return memoized("topic", TOPIC_MODEL, text, compute)
+
+
+def analyze_sentiment(text: str) -> tuple:
+    """Memoized ``patient_ml.analyze_sentiment``: ``(label, score)``.
+
+    When the model cannot load or run, the word-count fallback is returned
+    unmemoized, so the text is analysed properly once the model is back.
+    """
+    from patient_ml import SENTIMENT_MODEL, classify_sentiment
+    try:
+        return memoized("sentiment", SENTIMENT_MODEL, text, classify_sentiment)
+    except Exception:
+        from patient_ml import fallback_sentiment
+        logger.exception("Sentiment model failed; using word-count fallback.")
+        return fallback_sentiment(text)
+
+
+def detect_urgency(text: str) -> tuple:
+    """Memoized ``urgency_detector.detect_urgency``: ``(is_urgent, label, score)``."""
+    def compute(t):
+        from urgency_detector import detect_urgency as run, load_urgency_detector
+        return run(t, load_urgency_detector())
+    return memoized("urgency", URGENCY_MODEL, text, compute)
+
+
+def remember_message(message: dict) -> None:
+    """Seed the memo from the per-turn signals in an archived message's ``metadata``."""
+    from patient_ml import SENTIMENT_MODEL
+    text = message.get("content") or ""
+    meta = message.get("metadata") or {}
+    if not text:
+        return
+    if meta.get("topic") is not None:
+        remember("topic", TOPIC_MODEL, text, (meta["topic"], meta.get("topic_confidence") or 0.0))
+    if meta.get("sentiment") is not None:
+        remember("sentiment", SENTIMENT_MODEL, text,
+                 (meta["sentiment"], meta.get("sentiment_score") or 0.0))
+    urgency = meta.get("urgency") or {}
+    # A crisis turn's urgency is forced on (unified_guidance), not the model's.
+    if (urgency.get("is_urgent") is not None and urgency.get("label") is not None
+            and not meta.get("safety_protocol")):
+        remember("urgency", URGENCY_MODEL, text,
+                 (urgency["is_urgent"], urgency["label"], urgency.get("score")))
+
+
+def stats() -> dict:
+    """Memo hits (in-process / store), computations and coalesced waits."""
+    with _lock:
+        out = dict(_counts)
+    out["entries"] = len(_memory)
+    out["store"] = settings.analysis_memo_store
+    return out
+
+
+def clear() -> None:
+    """Drop the in-process memo and reset the counters (the store is kept)."""
+    _memory.clear()
+    with _lock:
+        for name in _counts:
+            _counts[name] = 0
@@ -5,13 +5,21 @@ Streamlit component and driven by the real application:
 
 - **Open a patient** (any ID, a persona card, or a recent) loads their real
   profile + session history from MongoDB into the overview and timeline.
+- **Patient drafts** stream through the deterministic crisis screen as they
+  are typed, so the crisis banner can fire before the turn is sent, and the
+  model stages start on the draft so the sent turn mostly waits on the LLM.
 - **Patient turns** run the real pipeline — deterministic crisis screen, emotion
   (DistilRoBERTa), sentiment (RoBERTa), topic (BART), semantic retrieval
   (MiniLM + Pinecone over the corpus), and Groq decision-support.
+  The crisis screen answers at once (raising the banner for a crisis); the
+  models finish in the background and the cockpit polls for them, rendering
+  the decision support field by field as the model streams it.
+  Long sessions send a rolling summary of older turns plus the recent ones.
+- **Ask answers and the end-of-session report** stream in as they are written.
 - **Sessions persist** — each turn archives the conversation + session log
   (topics, risk flags, sentiment, doctor notes) to MongoDB.
-- **Recent patients** on the launch screen come from the real ``patients``
-  collection.
+- **Recent patients** on the launch screen are the most recently seen real
+  patients (one indexed read of the patient summaries, briefly cached).
 
 ``PT-0042`` remains the built-in scripted demo. Heavy ML imports are lazy, so
 the launch screen loads instantly. The Streamlit-native UI is preserved in
@@ -20,6 +28,7 @@ the launch screen loads instantly. The Streamlit-native UI is preserved in
 import hmac
 import logging
 import uuid
+from datetime import datetime
 from pathlib import Path
 
 import streamlit as st
@@ -27,6 +36,8 @@ import streamlit.components.v1 as components
 
 from config import settings
 from logging_config import setup_logging
+from safety import SafetyChecker
+from session_aggregate import SessionAggregate
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -88,6 +99,9 @@ if not check_authentication():
 _COMPONENT_DIR = Path(__file__).parent / "cockpit_component"
 _lsa_cockpit = components.declare_component("lsa_cockpit", path=str(_COMPONENT_DIR))
 
+# Stateless crisis screener for the live draft screen.
+_safety_checker = SafetyChecker()
+
 # Profile for the built-in PT-0042 scripted demo (matches its overview card).
 _DEMO_PROFILE = {
     "patient_id": "PT-0042",
@@ -105,13 +119,23 @@ def _fmt_score(n) -> str:
 
 
 # ----------------------------------------------------------------- patient load
-def _roster():
-    """A few real patients from MongoDB for the launch-screen 'recent patients'."""
+# Recent patients shown on the launch screen, and how long that list is cached
+# (shared across browser sessions) before the next open re-queries it.
+_ROSTER_SIZE = 6
+_ROSTER_TTL_SECONDS = 30
+
+
+@st.cache_data(ttl=_ROSTER_TTL_SECONDS, show_spinner=False)
+def _recent_patients(limit: int):
+    from patient_profile import get_recent_patients
+    return get_recent_patients(limit)
+
+
+def _roster(limit: int = _ROSTER_SIZE):
+    """Recently seen real patients from MongoDB for the launch-screen 'recent patients'."""
+    from patient_overview import _fmt_date
     try:
-        from db import get_db
-        from patient_profile import get_patient_sessions
-        from patient_overview import _fmt_date
-        docs = list(get_db()["patients"].find({}, {"patient_id": 1, "_id": 0}).limit(6))
+        docs = _recent_patients(limit)
     except Exception:
         logger.exception("Failed to load the patient roster")
         return None
@@ -120,11 +144,7 @@ def _roster():
         pid = d.get("patient_id")
         if not pid:
             continue
-        try:
-            sessions = get_patient_sessions(pid)
-        except Exception:
-            sessions = []
-        last = sessions[0] if sessions else None
+        last = d.get("last")
         if last:
             topic = (last.get("detected_topics") or ["session"])[0]
             out.append({"id": pid, "last": f"{_fmt_date(last.get('created_at'))} · {topic}",
@@ -136,11 +156,13 @@ def _roster():
 
 def _load_patient(pid: str) -> dict:
     """Load a patient's real profile + history from MongoDB for the cockpit."""
-    from patient_profile import get_patient_profile, get_patient_sessions
+    from patient_profile import get_patient_record
+    from patient_context import get_patient_context
     from patient_overview import _fmt_date, _days_ago
 
     try:
-        profile = get_patient_profile(pid)
+        # One read: the profile plus its materialized history summary.
+        profile, summary = get_patient_record(pid)
     except Exception:
         logger.exception("Patient profile load failed")
         return {"found": False, "patientId": pid, "error": "Could not reach the patient database."}
@@ -149,10 +171,13 @@ def _load_patient(pid: str) -> dict:
                 "error": f"No record found for {pid}. Check the ID, or seed the patient first."}
 
     prof = profile.dict()
+    session_id = str(uuid.uuid4())
     try:
-        sessions = get_patient_sessions(pid)
+        # Loaded once here and reused by Ask and the report for this session.
+        ctx = get_patient_context(pid, session_id, profile=prof, summary=summary)
+        sessions, session_count = ctx.prior_sessions, ctx.session_count
     except Exception:
-        sessions = []
+        sessions, session_count = [], 0
 
     last = sessions[0] if sessions else None
     if last:
@@ -162,7 +187,7 @@ def _load_patient(pid: str) -> dict:
         last_seen = "first session"
 
     timeline = []
-    for sdoc in sessions[:8]:
+    for sdoc in sessions:
         flags = sdoc.get("risk_flags") or []
         timeline.append({
             "date": _fmt_date(sdoc.get("created_at")),
@@ -174,23 +199,62 @@ def _load_patient(pid: str) -> dict:
     patient = {
         "id": pid,
         "subtitle": "returning patient" if sessions else "new patient",
-        "sessionCount": len(sessions),
+        "sessionCount": session_count,
         "history": prof.get("medical_history") or [],
         "goals": prof.get("therapy_goals") or [],
         "lastSeen": last_seen,
     }
     return {"found": True, "patient": patient, "timeline": timeline,
-            "session_id": str(uuid.uuid4()), "profile": prof}
+            "session_id": session_id, "profile": prof}
 
 
 # ------------------------------------------------------------------ turn + archive
-def _run_real_turn(text: str, transcript: str, profile: dict) -> dict:
-    """Run the real pipeline for one patient turn and shape it for the cockpit."""
-    from unified_guidance import analyze_message
-    from session_assistant import generate_session_suggestions
+def _crisis_payload(sp) -> dict | None:
+    return {"flag_type": sp["flag_type"], "action": sp["action"], "response": sp["response"]} if sp else None
+
+
+def _start_turn(text: str, transcript: str, profile: dict, speculative=None):
+    """Start one patient turn; return ``(partial result, future, progress)``.
+
+    The crisis screen runs here and its result goes out at once (with the banner
+    for a crisis); the model stages + decision support finish on the background
+    pool and ``future`` resolves to the full result. Meanwhile the decision
+    support streams into ``progress``: ``progress["suggestions"]`` is the latest
+    partial suggestions and ``progress["seq"]`` counts updates. ``speculative``
+    is the session's draft prefetch (see ``_speculate``).
+    """
+    import background
+    from unified_guidance import screen_message
+
+    analysis = screen_message(text, profile)
+    progress = {"seq": 0, "suggestions": None}
+    future = background.submit(_finish_turn, analysis, text, transcript, profile, progress,
+                               speculative)
+    partial = {**_ERROR_RESULT, "partial": True, "pending": list(analysis["pending"]),
+               "crisis": _crisis_payload(analysis["safety_protocol"])}
+    partial["analysis"] = {**_ERROR_RESULT["analysis"], "topic": None}
+    partial["suggestions"] = None
+    return partial, future, progress
+
+
+_SUGGESTION_KEYS = ("emotional_state", "state_confidence", "red_flags",
+                    "missing_info", "next_questions", "follow_ups", "caveat")
+
+
+def _finish_turn(analysis: dict, text: str, transcript: str, profile: dict,
+                 progress: dict | None = None, speculative=None) -> dict:
+    """Run the model stages + decision support for a screened turn, shaped for the cockpit.
+
+    Touches no Streamlit state, so it can run on the background pool. With
+    ``progress``, the decision support is streamed into it (see ``_start_turn``);
+    with ``speculative``, stages already run on the draft are reused.
+    """
+    from unified_guidance import complete_analysis
+    from session_assistant import generate_session_suggestions, stream_session_suggestions
     from patient_overview import build_patient_summary
 
-    analysis = analyze_message(text, profile, transcript)
+    prefetched = speculative.take(text) if speculative is not None else None
+    complete_analysis(analysis, text, transcript, prefetched=prefetched)
     urgency = analysis.get("urgency") or {}
     sp = analysis.get("safety_protocol")
 
@@ -206,7 +270,7 @@ def _run_real_turn(text: str, transcript: str, profile: dict) -> dict:
         f"emotion: {emotion} ({e_score}); "
         f"crisis flag: {(sp.get('flag_type') + '/' + sp.get('action')) if sp else 'none'}"
     )
-    suggestions = generate_session_suggestions(
+    inputs = dict(
         transcript=transcript,
         patient_summary=build_patient_summary(profile),
         history_summary="(loaded patient record)",
@@ -214,6 +278,12 @@ def _run_real_turn(text: str, transcript: str, profile: dict) -> dict:
         examples=analysis.get("historical_examples"),
         doctor_questions="(see transcript)",
     )
+    if progress is None:
+        suggestions = generate_session_suggestions(**inputs)
+    else:
+        for suggestions in stream_session_suggestions(**inputs):
+            progress["suggestions"] = {k: suggestions.get(k) for k in _SUGGESTION_KEYS}
+            progress["seq"] += 1
 
     why_signals = [
         {"k": "Emotion (DistilRoBERTa)", "v": f"{emotion} · {round(float(e_score) * 100)}%"},
@@ -230,30 +300,77 @@ def _run_real_turn(text: str, transcript: str, profile: dict) -> dict:
     return {
         "analysis": {"emotion": emotion, "emotionScore": float(e_score), "sentiment": sentiment,
                      "sentimentScore": float(s_score), "topic": topic, "topicConf": float(t_conf)},
-        "suggestions": {k: suggestions.get(k) for k in
-                        ("emotional_state", "state_confidence", "red_flags",
-                         "missing_info", "next_questions", "follow_ups", "caveat")},
+        "suggestions": {k: suggestions.get(k) for k in _SUGGESTION_KEYS},
         "why": {"signals": why_signals, "cases": cases,
                 "context": analysis.get("analysis_context") or ""},
-        "crisis": ({"flag_type": sp["flag_type"], "action": sp["action"], "response": sp["response"]}
-                   if sp else None),
+        "crisis": _crisis_payload(sp),
         "errors": analysis.get("errors") or [],
+        "metadata": _turn_metadata(analysis),
+    }
+
+
+def _turn_metadata(analysis: dict) -> dict:
+    """The turn's model signals as archived on its message (``Message.metadata``,
+    the same keys app_live stores); a degraded stage's signals are left None."""
+    errors = analysis.get("errors") or []
+    ok = "analysis" not in errors
+    return {
+        "topic": analysis.get("predicted_topic") if ok else None,
+        "topic_confidence": analysis.get("topic_confidence") if ok else None,
+        "sentiment": analysis.get("sentiment") if ok else None,
+        "sentiment_score": analysis.get("sentiment_score") if ok else None,
+        "safety_protocol": analysis.get("safety_protocol"),
+        "urgency": analysis.get("urgency") if "urgency" not in errors else None,
     }
 
 
-def _archive(active: dict, messages, notes: str, result: dict) -> None:
-    """Persist the conversation + session log for the active patient session."""
-    from archiver import archive_conversation, archive_session
-    from schemas import Conversation, Message, SessionLog
+def _collect_text(chunks, progress: dict) -> str:
+    """Drain a streamed answer/report into ``progress`` (runs on the background pool)."""
+    for chunk in chunks:
+        progress["text"] += chunk
+        progress["seq"] += 1
+    return progress["text"]
+
+
+def _start_text_job(nonce, kind: str, chunks, fallback: str) -> None:
+    """Stream an Ask answer or the report in the background; the cockpit polls
+    and each poll pushes the text written so far."""
+    import background
+    progress = {"text": "", "seq": 0}
+    future = background.submit(_collect_text, chunks, progress)
+    st.session_state["lsa_pending_text"] = {
+        "nonce": nonce, "kind": kind, "future": future, "progress": progress, "seq": 0,
+        "fallback": fallback,
+    }
+    st.session_state["lsa_result"] = {"nonce": nonce, "kind": kind, "text": "", "partial": True}
+
+
+def _archive_conversation(active: dict, messages) -> None:
+    """Persist the transcript for the active patient session, each analysed
+    patient turn with its signals (so batch jobs need not re-run the models)."""
+    from archiver import archive_conversation
+    from schemas import Conversation, Message
+    signals = active.get("turn_metadata") or {}
     try:
-        conv = Conversation(
+        archive_conversation(Conversation(
             session_id=active["session_id"], patient_id=active["patient_id"],
             messages=[Message(content=m.get("text", ""),
                               is_user=(m.get("speaker") == "patient"),
-                              speaker=m.get("speaker", "patient")) for m in (messages or [])],
-        )
-        archive_conversation(conv)
+                              speaker=m.get("speaker", "patient"),
+                              metadata=(signals.get(m.get("text", ""), {})
+                                        if m.get("speaker") == "patient" else {}))
+                      for m in (messages or [])],
+        ))
+    except Exception:
+        logger.exception("Conversation archival failed")
+        st.session_state["lsa_archive_failed"] = True
+
 
+def _archive_session(active: dict, notes: str, result: dict) -> None:
+    """Persist the session log (topics, flags, signals) for the active patient session."""
+    from archiver import archive_session
+    from schemas import SessionLog
+    try:
         topic = (result.get("analysis") or {}).get("topic")
         if topic and topic not in active["topics"]:
             active["topics"].append(topic)
@@ -266,12 +383,76 @@ def _archive(active: dict, messages, notes: str, result: dict) -> None:
             detected_topics=active["topics"], risk_flags=active["risk_flags"],
             sentiment_score=float((result.get("analysis") or {}).get("sentimentScore") or 0.0),
             doctor_notes=notes or "", suggestions=[],
+            aggregate=active["aggregate"].as_dict() if active.get("aggregate") else {},
         ))
     except Exception:
         logger.exception("Session archival failed")
         st.session_state["lsa_archive_failed"] = True
 
 
+def _screen_draft(text: str):
+    """Stream the patient's draft turn through the crisis screen.
+
+    The composer resends the whole draft; only the text appended since the last
+    call is fed to the session's ``SafetyStream`` (an edited draft restarts it).
+    Returns the highest-severity protocol found so far, or None. A phrase at the
+    very end of the draft counts: the draft may pause right after it.
+    """
+    state = st.session_state.get("lsa_draft")
+    if state is None or not text.startswith(state["text"]):
+        state = {"text": "", "stream": _safety_checker.stream()}
+    state["stream"].feed(text[len(state["text"]):])
+    state["text"] = text
+    st.session_state["lsa_draft"] = state
+    return state["stream"].peek()
+
+
+def _aggregate_turn(active: dict, result: dict, at) -> None:
+    """Fold a finished turn's signals into the session aggregate (once per turn)."""
+    agg = active.setdefault("aggregate", SessionAggregate())
+    # The error placeholder (no "errors" list) carries no model signals.
+    errors = result.get("errors")
+    ok = {stage: errors is not None and stage not in errors
+          for stage in ("urgency", "analysis")}
+    a = result.get("analysis") or {}
+    agg.add_turn(
+        sentiment_score=a.get("sentimentScore") if ok["analysis"] else None,
+        emotion=a.get("emotion") if ok["urgency"] else None,
+        topic=a.get("topic") if ok["analysis"] else None,
+        topic_confidence=a.get("topicConf"),
+        flag_type=(result.get("crisis") or {}).get("flag_type"),
+        at=at,
+    )
+
+
+def _speculate(text: str):
+    """Start the model stages on the patient's draft (see speculative.py);
+    returns the session's ``SpeculativeAnalysis``."""
+    spec = st.session_state.get("lsa_speculative")
+    if spec is None:
+        from speculative import SpeculativeAnalysis
+        spec = st.session_state["lsa_speculative"] = SpeculativeAnalysis()
+    spec.prefetch(text)
+    return spec
+
+
+def _turn_transcript(payload: dict) -> str:
+    """Transcript for a patient turn's prompts.
+
+    Older turns are folded into the session's rolling summary in the background;
+    the recent ones are sent verbatim.
+    """
+    messages = payload.get("messages")
+    if not messages:
+        return payload.get("transcript", "")
+    summary = st.session_state.get("lsa_summary")
+    if summary is None:
+        from rolling_summary import RollingSummary
+        summary = st.session_state["lsa_summary"] = RollingSummary()
+    return summary.context([f"{(m.get('speaker') or 'patient').capitalize()}: {m.get('text', '')}"
+                            for m in messages])
+
+
 _ERROR_RESULT = {
     "analysis": {"emotion": "neutral", "emotionScore": 0.0, "sentiment": "neutral",
                  "sentimentScore": 0.0, "topic": "general", "topicConf": 0.0},
@@ -289,6 +470,7 @@ if "lsa_roster" not in st.session_state:
 payload = _lsa_cockpit(
     result=st.session_state.get("lsa_result"),
     roster=st.session_state.get("lsa_roster"),
+    screen=st.session_state.get("lsa_screen"),
     key="lsa_cockpit",
     default=None,
 )
@@ -299,7 +481,31 @@ if isinstance(payload, dict):
     if nonce is not None and nonce != st.session_state.get("lsa_handled_nonce"):
         st.session_state["lsa_handled_nonce"] = nonce
 
-        if kind == "open":
+        if kind == "draft":
+            # Patient words still being logged: raise the crisis banner as soon
+            # as a red-flag phrase completes, before the turn and the models run.
+            sp = _screen_draft(payload.get("text") or "")
+            # ...and start the model stages on it, so the sent turn can reuse them.
+            try:
+                _speculate(payload.get("text") or "")
+            except Exception:
+                logger.exception("Speculative analysis failed to start")
+            shown = (st.session_state.get("lsa_screen") or {}).get("crisis") or {}
+            if sp and sp["flag_type"] != shown.get("flag_type"):
+                st.session_state["lsa_screen"] = {
+                    "seq": nonce,
+                    "crisis": {"flag_type": sp["flag_type"], "action": sp["action"],
+                               "response": sp["response"]},
+                }
+                st.rerun()
+
+        elif kind == "open":
+            st.session_state.pop("lsa_draft", None)
+            st.session_state.pop("lsa_screen", None)
+            st.session_state.pop("lsa_pending_turn", None)
+            st.session_state.pop("lsa_summary", None)
+            st.session_state.pop("lsa_pending_text", None)
+            st.session_state.pop("lsa_speculative", None)
             loaded = _load_patient((payload.get("patientId") or "").strip().upper())
             result = {"nonce": nonce, "kind": "open", "found": loaded["found"]}
             if loaded["found"]:
@@ -310,6 +516,7 @@ if isinstance(payload, dict):
                     "session_id": loaded["session_id"],
                     "profile": loaded["profile"],
                     "risk_flags": [], "topics": [],
+                    "aggregate": SessionAggregate(),
                 }
             else:
                 result["patientId"] = loaded.get("patientId")
@@ -318,20 +525,99 @@ if isinstance(payload, dict):
             st.rerun()
 
         elif kind == "patient_turn":
+            st.session_state.pop("lsa_draft", None)
             active = st.session_state.get("lsa_active")
             profile = active["profile"] if active else _DEMO_PROFILE
+            future = None
             try:
-                result = _run_real_turn(payload.get("text", ""), payload.get("transcript", ""), profile)
+                result, future, progress = _start_turn(payload.get("text", ""),
+                                                       _turn_transcript(payload), profile,
+                                                       st.session_state.get("lsa_speculative"))
             except Exception:
                 logger.exception("Real pipeline failed for a patient turn")
                 result = dict(_ERROR_RESULT)
             result["nonce"] = nonce
             result["kind"] = "turn"
-            if active:  # real patient (not the in-memory demo) -> persist
-                _archive(active, payload.get("messages"), payload.get("notes", ""), result)
+            if future is not None:
+                # The screen's result goes out now; the cockpit polls for the
+                # streamed decision support and the background job's full result.
+                st.session_state["lsa_pending_turn"] = {
+                    "nonce": nonce, "future": future, "progress": progress, "seq": 0,
+                    "text": payload.get("text", ""), "messages": payload.get("messages"),
+                    "notes": payload.get("notes", ""), "at": datetime.now(),
+                }
+            if active:
+                # Persist real patients (not the in-memory demo). The transcript
+                # is archived now, so the turn is kept even if the tab closes or
+                # the background result never arrives; the session log and the
+                # turn's signals follow with the models' result. A crisis is logged now too, so the
+                # flag is on record even if the session ends before the models finish.
+                _archive_conversation(active, payload.get("messages"))
+                if future is None or result.get("crisis"):
+                    _archive_session(active, payload.get("notes", ""), result)
             st.session_state["lsa_result"] = result
             st.rerun()
 
+        elif kind == "poll":
+            # The cockpit polling for a turn's, answer's or report's background completion.
+            turn = payload.get("turn")
+            pending = st.session_state.get("lsa_pending_turn")
+            text_job = st.session_state.get("lsa_pending_text")
+            current = st.session_state.get("lsa_result") or {}
+            if text_job and text_job["nonce"] == turn:
+                progress = text_job["progress"]
+                if text_job["future"].done():
+                    st.session_state.pop("lsa_pending_text", None)
+                    try:
+                        text = text_job["future"].result()
+                    except Exception:
+                        logger.exception("Streaming %s failed", text_job["kind"])
+                        text = progress["text"] or text_job["fallback"]
+                    st.session_state["lsa_result"] = {"nonce": turn, "kind": text_job["kind"],
+                                                      "text": text}
+                    st.rerun()
+                elif progress["seq"] != text_job["seq"]:
+                    text_job["seq"] = progress["seq"]
+                    st.session_state["lsa_result"] = {"nonce": turn, "kind": text_job["kind"],
+                                                      "text": progress["text"], "partial": True}
+                    st.rerun()
+            elif pending and pending["nonce"] == turn:
+                if not pending["future"].done():
+                    progress = pending["progress"]
+                    if progress["seq"] != pending["seq"] and current.get("nonce") == turn:
+                        # More decision support has streamed in since the last poll.
+                        pending["seq"] = progress["seq"]
+                        st.session_state["lsa_result"] = {**current,
+                                                          "suggestions": progress["suggestions"]}
+                        st.rerun()
+                else:
+                    st.session_state.pop("lsa_pending_turn", None)
+                    try:
+                        result = pending["future"].result()
+                    except Exception:
+                        logger.exception("Background pipeline failed for a patient turn")
+                        result = {**_ERROR_RESULT, "crisis": current.get("crisis")}
+                    result.update(nonce=turn, kind="turn")
+                    active = st.session_state.get("lsa_active")
+                    if active:
+                        _aggregate_turn(active, result, pending["at"])
+                        if result.get("metadata"):
+                            active.setdefault("turn_metadata", {})[pending["text"]] = result["metadata"]
+                            _archive_conversation(active, pending["messages"])
+                        _archive_session(active, pending["notes"], result)
+                    st.session_state["lsa_result"] = result
+                    st.rerun()
+            elif current.get("nonce") == turn and current.get("partial"):
+                # The background job is gone (e.g. a patient was reopened): settle it.
+                if current.get("kind") == "turn":
+                    st.session_state["lsa_result"] = {**_ERROR_RESULT, "crisis": current.get("crisis"),
+                                                      "nonce": turn, "kind": "turn"}
+                else:
+                    st.session_state["lsa_result"] = {
+                        "nonce": turn, "kind": current.get("kind"),
+                        "text": current.get("text") or "This request was interrupted. Please try again."}
+                st.rerun()
+
         elif kind == "doctor_query":
             # "Ask" mode: answer a clinician's free-form question grounded in the
             # patient's record + sessions + corpus. Read-only (no archival).
@@ -343,12 +629,12 @@ if isinstance(payload, dict):
                 text = ("Open a real patient (e.g. PT-0001) to ask record-grounded questions. "
                         "The scripted PT-0042 demo has no database-backed record.")
             else:
-                try:
-                    from doctor_qa import answer_doctor_query
-                    text = answer_doctor_query(question, active, payload.get("transcript", ""))
-                except Exception:
-                    logger.exception("Doctor query failed")
-                    text = "The assistant could not answer that just now. Please try again."
+                # Streamed: each poll pushes the answer written so far.
+                from doctor_qa import stream_doctor_answer
+                _start_text_job(nonce, "answer",
+                                stream_doctor_answer(question, active, payload.get("transcript", "")),
+                                "The assistant could not answer that just now. Please try again.")
+                st.rerun()
             st.session_state["lsa_result"] = {"nonce": nonce, "kind": "answer", "text": text}
             st.rerun()
 
@@ -358,12 +644,12 @@ if isinstance(payload, dict):
             if not active:
                 text = "Open a real patient to generate a record-grounded end-of-session report."
             else:
-                try:
-                    from session_report import generate_session_report
-                    text = generate_session_report(active, payload.get("transcript", ""),
-                                                   payload.get("notes", ""))
-                except Exception:
-                    logger.exception("Session report failed")
-                    text = "The report could not be generated. Please try again."
+                from session_report import stream_session_report
+                _start_text_job(nonce, "reportText",
+                                stream_session_report(active, payload.get("transcript", ""),
+                                                      payload.get("notes", ""),
+                                                      refresh=bool(payload.get("refresh"))),
+                                "The report could not be generated. Please try again.")
+                st.rerun()
             st.session_state["lsa_result"] = {"nonce": nonce, "kind": "reportText", "text": text}
             st.rerun()
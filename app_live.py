@@ -5,20 +5,20 @@ import logging
 import uuid
 from datetime import datetime
 import ui
+import background
 from logging_config import setup_logging
-from unified_guidance import analyze_message
+from unified_guidance import screen_message, complete_analysis, is_priority_crisis
 from archiver import archive_conversation, archive_session
 from schemas import Conversation, Message, SessionLog
-from topic_classifier import predict_topic, load_topic_classifier
-from patient_ml import analyze_sentiment
+from analysis_memo import analyze_sentiment, predict_topic
 from llm_rag import generate_advice
-from patient_profile import (
-    get_patient_profile, create_patient_profile, update_patient_fields, get_patient_sessions,
-)
-from safety import SafetyChecker
+from patient_profile import get_patient_profile, create_patient_profile, update_patient_fields
+from patient_context import get_patient_context
+from rolling_summary import RollingSummary
+from session_aggregate import SessionAggregate
 from config import settings
 from dashboard import render_dashboard
-from session_assistant import generate_session_suggestions, render_suggestions
+from session_assistant import stream_session_suggestions, suggestions_panel, render_suggestions
 from patient_overview import render_patient_overview, build_patient_summary, build_history_summary
 
 # Ensure an event loop is available
@@ -32,9 +32,6 @@ except RuntimeError:
 setup_logging()
 logger = logging.getLogger(__name__)
 
-# Stateless crisis screener for the guaranteed fallback.
-_safety_checker = SafetyChecker()
-
 if not settings.app_password:
     logger.warning("APP_PASSWORD is not set — the app is running without authentication.")
 
@@ -85,6 +82,8 @@ if "session_topics" not in st.session_state:
     st.session_state.session_topics = []
 if "session_suggestions" not in st.session_state:
     st.session_state.session_suggestions = []
+if "session_aggregate" not in st.session_state:
+    st.session_state.session_aggregate = SessionAggregate()
 
 
 def _parse_lines(text):
@@ -123,6 +122,7 @@ _SESSION_KEYS = (
     "conversation", "conversation_model", "patient_profile", "session_risk_flags",
     "session_topics", "session_suggestions", "latest_suggestions", "latest_analysis",
     "history_summary", "doctor_notes_input", "demo_mode", "session_started", "last_report",
+    "rolling_summary", "session_aggregate",
 )
 
 
@@ -136,6 +136,8 @@ def _new_live_session(patient_id):
     st.session_state.session_topics = []
     st.session_state.session_suggestions = []
     st.session_state.session_started = datetime.now()
+    st.session_state.rolling_summary = RollingSummary()
+    st.session_state.session_aggregate = SessionAggregate(st.session_state.session_started)
     for k in ("latest_suggestions", "latest_analysis", "history_summary",
               "doctor_notes_input", "last_report"):
         st.session_state.pop(k, None)
@@ -161,17 +163,31 @@ def reset_session():
     st.rerun()
 
 
-def _load_history_summary():
+def _load_history_summary(pid, sid, profile):
+    """Prior-session summary for the prompts. Touches no Streamlit state, so it
+    can load on a worker thread alongside the analysis stages."""
     try:
-        pid = st.session_state.conversation_model.patient_id
-        sid = st.session_state.conversation_model.session_id
-        sessions = [s for s in get_patient_sessions(pid) if s.get("session_id") != sid]
-        return build_history_summary(sessions)
+        ctx = get_patient_context(pid, sid, profile=profile)
+        return build_history_summary(ctx.prior_sessions)
     except Exception:
         logger.exception("Failed to load patient history summary")
         return "(no prior sessions)"
 
 
+def _history_summary(pending):
+    """The session's history summary, waiting up to the context deadline for
+    ``pending`` (the in-flight load, or None once it is cached)."""
+    if pending is None:
+        return st.session_state.history_summary
+    try:
+        st.session_state.history_summary = pending.result(timeout=settings.context_timeout_seconds)
+        return st.session_state.history_summary
+    except Exception:
+        # Late: go ahead without it and load it again on the next turn.
+        logger.warning("History summary missed its deadline; continuing without it.")
+        return "(prior sessions unavailable right now)"
+
+
 def _format_signals(analysis):
     a = analysis or {}
     urgency = a.get("urgency") or {}
@@ -209,6 +225,7 @@ def _persist_session():
             sentiment_score=float(latest.get("sentiment_score") or 0.0),
             doctor_notes=st.session_state.get("doctor_notes_input", ""),
             suggestions=st.session_state.get("session_suggestions", []),
+            aggregate=st.session_state.session_aggregate.as_dict(),
         ))
     except Exception:
         logger.exception("Failed to archive session log")
@@ -218,22 +235,36 @@ def _persist_session():
 
 def _run_assistant(patient_text):
     """Analyze a patient turn and generate decision-support for the doctor."""
-    transcript = "\n".join(
+    # Older turns are folded into a rolling summary; only the recent ones go verbatim.
+    if "rolling_summary" not in st.session_state:
+        st.session_state.rolling_summary = RollingSummary()
+    transcript = st.session_state.rolling_summary.context([
         f"{m.get('speaker', 'patient').capitalize()}: {m['content']}"
         for m in st.session_state.conversation
-    )
+    ])
     doctor_questions = "\n".join(
         m["content"] for m in st.session_state.conversation if m.get("speaker") == "doctor"
     ) or "(none yet)"
 
+    history = None
     if "history_summary" not in st.session_state:
-        st.session_state.history_summary = _load_history_summary()
+        # Loaded alongside the analysis stages, which also run concurrently.
+        model = st.session_state.conversation_model
+        history = background.get_gather_executor().submit(
+            _load_history_summary, model.patient_id, model.session_id,
+            st.session_state.patient_profile,
+        )
 
-    analysis = {"safety_protocol": _safety_checker.check_input(patient_text)}
+    analysis = screen_message(patient_text, st.session_state.patient_profile)
+    if is_priority_crisis(analysis):
+        # Crisis priority: surface the protocol before any model runs.
+        sp = analysis["safety_protocol"]
+        st.markdown(ui.crisis_banner(sp.get("action"), sp.get("flag_type"), sp.get("response")),
+                    unsafe_allow_html=True)
     suggestions = {}
     try:
         with st.status("Analyzing the patient turn…", expanded=True) as status:
-            analysis = analyze_message(patient_text, st.session_state.patient_profile, transcript)
+            complete_analysis(analysis, patient_text, transcript)
             sp = analysis.get("safety_protocol")
             st.write(f"Safety: {sp['action'] + ' — ' + sp['flag_type'] if sp else 'no crisis indicators'}")
             urgency = analysis.get("urgency") or {}
@@ -247,14 +278,18 @@ def _run_assistant(patient_text):
             if degraded:
                 st.write(f"⚠️ Degraded — unavailable: {', '.join(degraded)}")
             status.update(label="Generating decision support…")
-            suggestions = generate_session_suggestions(
+            # Render each field as soon as the model has written it.
+            panel = st.empty()
+            for suggestions in stream_session_suggestions(
                 transcript=transcript,
                 patient_summary=build_patient_summary(st.session_state.patient_profile),
-                history_summary=st.session_state.history_summary,
+                history_summary=_history_summary(history),
                 signals=_format_signals(analysis),
                 examples=analysis.get("historical_examples"),
                 doctor_questions=doctor_questions,
-            )
+            ):
+                panel.markdown(suggestions_panel(suggestions, analysis), unsafe_allow_html=True)
+            panel.empty()
             if suggestions.get("_error"):
                 status.update(label="Decision support unavailable — model error",
                               state="error", expanded=False)
@@ -306,6 +341,16 @@ def _run_assistant(patient_text):
     topic = analytics.get("topic")
     if topic and topic not in st.session_state.session_topics:
         st.session_state.session_topics.append(topic)
+    # Session analytics for the report and dashboard, folded in once per turn.
+    errors = analysis.get("errors") or []
+    st.session_state.session_aggregate.add_turn(
+        sentiment_score=analysis.get("sentiment_score") if analysis.get("sentiment") else None,
+        emotion=((analysis.get("urgency") or {}).get("label") or "neutral")
+        if "urgency" not in errors else None,
+        topic=analysis.get("predicted_topic"),
+        topic_confidence=analysis.get("topic_confidence"),
+        flag_type=flag_type,
+    )
 
 
 def handle_turn(content, speaker):
@@ -474,15 +519,23 @@ def landing_page():
         st.markdown(ui.launch_footer(), unsafe_allow_html=True)
 
 
-def _generate_report():
-    """Compute the end-of-session report from accumulated session signals."""
-    conv = st.session_state.conversation
-    # Classify over the patient's own turns (doctor questions skew topic/sentiment).
-    patient_text = "\n".join(m["content"] for m in conv if m.get("speaker") == "patient") \
-        or "\n".join(m["content"] for m in conv)
-    classifier = load_topic_classifier()
-    predicted_topic, topic_confidence = predict_topic(patient_text, classifier)
-    sentiment, sentiment_score = analyze_sentiment(patient_text)
+def _generate_report(refresh: bool = False):
+    """Compute the end-of-session report from accumulated session signals
+    (``refresh``: write it anew rather than reuse the cached text)."""
+    # Session-level topic + sentiment come from the per-turn aggregate.
+    aggregate = st.session_state.session_aggregate
+    predicted_topic, topic_confidence = aggregate.dominant_topic()
+    sentiment, sentiment_score = aggregate.sentiment_label, round(aggregate.sentiment_mean, 4)
+    if predicted_topic is None or not aggregate.sentiment_count:
+        # No turn was analysed cleanly: classify the patient's own turns
+        # (doctor questions skew topic/sentiment). Memoized across regenerations.
+        conv = st.session_state.conversation
+        patient_text = "\n".join(m["content"] for m in conv if m.get("speaker") == "patient") \
+            or "\n".join(m["content"] for m in conv)
+        if predicted_topic is None:
+            predicted_topic, topic_confidence = predict_topic(patient_text)
+        if not aggregate.sentiment_count:
+            sentiment, sentiment_score = analyze_sentiment(patient_text)
 
     risk_flags = st.session_state.get("session_risk_flags") or []
     topics = st.session_state.get("session_topics") or []
@@ -493,6 +546,7 @@ def _generate_report():
         f"Topics observed this session: {', '.join(topics) or 'n/a'}\n"
         f"Overall Sentiment: {sentiment} (Score: {sentiment_score})\n"
         f"Risk flags raised this session: {', '.join(risk_flags) or 'none'}\n"
+        f"Session signals (per turn):\n{aggregate.summary_text()}\n"
         f"Clinician notes: {notes or '(none)'}\n\n"
         "Provide a structured clinician-facing session summary with sections:\n"
         "1. **Presentation & key themes**\n"
@@ -500,7 +554,7 @@ def _generate_report():
         "3. **Suggested follow-up** (for the clinician to consider; not prescriptive).\n"
         "Use clear headings and bullet points. Do not diagnose or prescribe."
     )
-    recommendations_obj = generate_advice(prompt)
+    recommendations_obj = generate_advice(prompt, refresh=refresh)
     recommendations = (recommendations_obj if isinstance(recommendations_obj, str)
                        else str(recommendations_obj))
     return {
@@ -514,10 +568,12 @@ def _generate_report():
 def _report_dialog():
     pid = st.session_state.conversation_model.patient_id
     st.caption(f"{pid} · {_elapsed_clock()} · {len(st.session_state.conversation)} turns logged")
-    if st.button("Generate / regenerate", type="primary") or "last_report" not in st.session_state:
+    regenerate = st.button("Generate / regenerate", type="primary")
+    if regenerate or "last_report" not in st.session_state:
         with st.spinner("Generating the session report…"):
             try:
-                st.session_state["last_report"] = _generate_report()
+                st.session_state["last_report"] = _generate_report(
+                    refresh=regenerate and "last_report" in st.session_state)
             except Exception:
                 logger.exception("Error generating report")
                 st.session_state.pop("last_report", None)
@@ -595,7 +651,7 @@ def chat_page():
         stages, running, status_label = _pipeline_stages()
         st.markdown(ui.pipeline_panel(stages, running, status_label), unsafe_allow_html=True)
         render_suggestions(latest_suggestions, latest_analysis)
-        render_dashboard(conv, profile)
+        render_dashboard(conv, profile, st.session_state.session_aggregate)
 
     # Pinned two-channel input.
     turn = st.chat_input(f"Log what the {speaker_label.lower()} said…")
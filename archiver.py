@@ -1,6 +1,9 @@
 import logging
 from typing import Optional
+from pymongo import ReturnDocument
 from db import get_db
+from patient_context import invalidate_patient_context
+from patient_summary import SOURCE_FIELDS, apply_archived_session
 from schemas import Conversation, SessionLog
 
 logger = logging.getLogger(__name__)
@@ -24,22 +27,41 @@ def archive_conversation(conversation: Conversation):
         conv_dict,
         upsert=True
     )
+    invalidate_patient_context(conversation.patient_id, conversation.session_id)
     logger.info("Conversation %s archived successfully.", conversation.session_id)
 
 
 def archive_session(log: SessionLog):
-    """Archive analytical results for a counseling session."""
+    """Archive analytical results for a counseling session.
+
+    Also folds the log into the patient's materialized summary. The previous
+    version of the log (returned by the same round trip as the write) lets the
+    summary apply only what changed, so per-turn re-archival stays idempotent.
+    """
 
     log_dict = log.dict()
     db = get_db()
     if not _patient_profile_exists(db, log.patient_id):
         raise ValueError(f"Patient profile {log.patient_id} does not exist")
     sessions_collection = db["sessions"]
-    sessions_collection.replace_one(
+    previous = sessions_collection.find_one_and_replace(
         {"session_id": log.session_id},
         log_dict,
+        projection={f: 1 for f in SOURCE_FIELDS},
         upsert=True,
+        return_document=ReturnDocument.BEFORE,
     )
+    try:
+        apply_archived_session(db, log_dict, previous)
+    except Exception:
+        # The session itself is saved; drop the summary so the next read
+        # rebuilds it from `sessions` rather than serving a stale one.
+        logger.exception("Patient summary update failed for %s", log.patient_id)
+        try:
+            db["patients"].update_one({"patient_id": log.patient_id}, {"$unset": {"summary": ""}})
+        except Exception:
+            logger.exception("Could not reset the patient summary for %s", log.patient_id)
+    invalidate_patient_context(log.patient_id, log.session_id)
     logger.info("Session %s archived successfully.", log.session_id)
 
 
@@ -0,0 +1,118 @@
+"""Shared executors for work run off the request thread.
+
+``submit`` is for work that completes after a response has been sent: a cheap
+result is shown immediately and the expensive remainder is patched in later
+(e.g. crisis turns: the banner first, the models after). Futures are returned
+to the caller, who polls ``done()`` and collects them.
+
+``gather`` fans out the independent steps of one request (model stages,
+Mongo / Pinecone fetches) and waits for each up to its own deadline, so the LLM
+call can go out as soon as its inputs are ready and one slow dependency does
+not stall it. It uses its own pool, so a gather inside a background job cannot
+starve on the pool it is running on. A step past its deadline keeps its worker
+until it returns, so when every worker is busy a step with a deadline is
+reported as failed at once instead of queueing behind the stragglers.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from functools import lru_cache
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def get_executor() -> ThreadPoolExecutor:
+    """Return the process-wide background thread pool."""
+    return ThreadPoolExecutor(max_workers=max(1, settings.background_workers),
+                              thread_name_prefix="background")
+
+
+def _log_failure(future: Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Background job failed", exc_info=future.exception())
+
+
+def submit(fn, *args, **kwargs) -> Future:
+    """Run ``fn(*args, **kwargs)`` on the background pool; failures are logged."""
+    future = get_executor().submit(fn, *args, **kwargs)
+    future.add_done_callback(_log_failure)
+    return future
+
+
+@lru_cache(maxsize=1)
+def get_gather_executor() -> ThreadPoolExecutor:
+    """Return the process-wide pool for concurrent request steps."""
+    return ThreadPoolExecutor(max_workers=max(1, settings.gather_workers),
+                              thread_name_prefix="gather")
+
+
+# Steps submitted to the gather pool and not yet finished, including those
+# whose caller has already given up on them.
+_gather_lock = threading.Lock()
+_gather_in_flight = 0
+
+
+def _gather_done(_future: Future) -> None:
+    global _gather_in_flight
+    with _gather_lock:
+        _gather_in_flight -= 1
+
+
+def _gather_submit(fn) -> Future | None:
+    """Submit ``fn`` to the gather pool, or return None when no worker is free."""
+    global _gather_in_flight
+    with _gather_lock:
+        if _gather_in_flight >= max(1, settings.gather_workers):
+            return None
+        _gather_in_flight += 1
+    future = get_gather_executor().submit(fn)
+    future.add_done_callback(_gather_done)
+    return future
+
+
+def gather(tasks: dict, deadlines: dict | None = None) -> tuple[dict, set]:
+    """Run the zero-argument callables in ``tasks`` concurrently.
+
+    ``deadlines`` maps a task name to seconds from the start (missing or None:
+    no deadline). Returns ``(results, failed)``: the values of the tasks that
+    finished in time, and the names of those that raised or missed their
+    deadline. A task past its deadline keeps running; its result is discarded.
+    When the pool has no free worker, a task with a deadline fails without
+    running and one without a deadline runs on the calling thread.
+    """
+    deadlines = deadlines or {}
+    start = time.monotonic()
+    futures, inline = {}, {}
+    for name, fn in tasks.items():
+        future = _gather_submit(fn)
+        if future is not None:
+            futures[name] = future
+        else:
+            inline[name] = fn
+    results, failed = {}, set()
+    for name, fn in inline.items():
+        if deadlines.get(name) is not None:
+            logger.warning("Step %r skipped: every gather worker is busy.", name)
+            failed.add(name)
+            continue
+        try:
+            results[name] = fn()
+        except Exception:
+            logger.exception("Step %r failed", name)
+            failed.add(name)
+    for name, future in futures.items():
+        limit = deadlines.get(name)
+        remaining = None if limit is None else max(0.0, start + limit - time.monotonic())
+        try:
+            results[name] = future.result(timeout=remaining)
+        except TimeoutError:
+            logger.warning("Step %r missed its %.1fs deadline; continuing without it.", name, limit)
+            failed.add(name)
+        except Exception:
+            logger.exception("Step %r failed", name)
+            failed.add(name)
+    return results, failed
@@ -0,0 +1,546 @@
+"""End-to-end load benchmark over synthetic data.
+
+    MONGO_URI=mongodb://localhost:27017 python benchmark.py --seed \\
+        --patients 10000 --sessions-per-patient 10 --corpus 20000
+    MONGO_URI=mongodb://localhost:27017 python benchmark.py \\
+        --live-sessions 64 --turns 8 --concurrency 16 --baseline benchmark-results/last.json
+
+Runs offline by default: ``LLM_BACKEND=local`` (local_llm.py) and
+``VECTOR_BACKEND=local`` (local_vectors.py) stand in for Groq and Pinecone, and
+data goes to the ``MONGO_DB_NAME=MentalHealthBench`` database on ``MONGO_URI`` —
+point it at a local mongod (e.g. ``docker run -p 27017:27017 mongo:7``). Set any
+of them in the environment to benchmark against the real services instead.
+
+``--seed`` wipes the benchmark database and loads the patients (each with
+``--sessions-per-patient`` sessions and their conversations) and a ``--corpus``
+document knowledge base with the chunked, parallel engine of seed_synthetic_data.
+
+A run replays ``--live-sessions`` synthetic live sessions, ``--concurrency`` at a
+time, each with a random seeded patient. Per turn it runs ``analyze_message``,
+decision support, ``archive_conversation`` + ``archive_session`` (as the app does
+after each turn) and ``/guidance`` (in-process, or over HTTP with ``--api-url``);
+every ``--ask-every`` turns an Ask question; and the report at the end. Each step
+is timed per stage. Throughput, p50/p95/p99 latency per stage, errors and memory
+are printed and saved as JSON (``--out``); with ``--baseline`` a stage whose p95
+grew by more than ``--tolerance`` is reported as a regression (exit status 1).
+
+``--analytics`` checks the population analytics on the seeded database instead:
+it rebuilds the session rollups, compares the answers with the same figures
+computed from ``sessions`` directly (before and after a re-archive moves a
+session to today, which an incremental refresh must follow), and times each
+query uncached against ``ANALYTICS_TARGET_MS``. Exit status 1 on any mismatch
+or a p95 over the target.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+BENCH_DB = "MentalHealthBench"
+_ASK_QUESTIONS = [
+    "What did we agree on last session?",
+    "Has the patient mentioned sleep problems before?",
+    "Any risk flags in previous sessions?",
+    "What coping strategies have worked for similar cases?",
+]
+
+
+def _offline_defaults() -> None:
+    """Default to the local stand-ins and the benchmark database; must run
+    before ``config`` is imported."""
+    os.environ.setdefault("LLM_BACKEND", "local")
+    os.environ.setdefault("VECTOR_BACKEND", "local")
+    os.environ.setdefault("MONGO_DB_NAME", BENCH_DB)
+    os.environ.setdefault("PROMPT_TOKENIZER", "")
+    os.environ.setdefault("KMP_DUPLICATE_LIB_OK", "TRUE")
+
+
+def _rss_mb() -> float | None:
+    """Current resident set size of this process in MB (Linux), else None."""
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)  # KB on Linux
+
+
+def percentile(values: list, q: float) -> float:
+    """The ``q``-th percentile (0-100) of sorted ``values``, linearly interpolated."""
+    if not values:
+        return 0.0
+    rank = (len(values) - 1) * q / 100.0
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+class Recorder:
+    """Thread-safe per-stage latency samples and error counts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: dict = {}
+        self.errors: dict = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def time(self, stage: str, fn, *args, **kwargs):
+        """Call ``fn`` and record its latency; a failure is counted, not raised."""
+        start = time.perf_counter()
+        try:
+            value = fn(*args, **kwargs)
+        except Exception:
+            logger.warning("Benchmark stage %s failed.", stage, exc_info=True)
+            with self._lock:
+                self.errors[stage] = self.errors.get(stage, 0) + 1
+                self.samples.setdefault(stage, [])
+            return None
+        self.record(stage, time.perf_counter() - start)
+        return value
+
+    def summary(self, wall_seconds: float) -> dict:
+        """Per stage: count, errors, throughput (calls/s of wall time) and latency in ms."""
+        out = {}
+        with self._lock:
+            stages = {name: sorted(values) for name, values in self.samples.items()}
+            errors = dict(self.errors)
+        for name, values in sorted(stages.items()):
+            ms = [v * 1000 for v in values]
+            out[name] = {
+                "count": len(ms),
+                "errors": errors.get(name, 0),
+                "throughput_per_s": round(len(ms) / wall_seconds, 2) if wall_seconds else 0.0,
+                "mean_ms": round(sum(ms) / len(ms), 2) if ms else 0.0,
+                "p50_ms": round(percentile(ms, 50), 2),
+                "p95_ms": round(percentile(ms, 95), 2),
+                "p99_ms": round(percentile(ms, 99), 2),
+                "max_ms": round(ms[-1], 2) if ms else 0.0,
+            }
+        return out
+
+
+def compare(stages: dict, baseline: dict, tolerance: float = 0.2) -> list:
+    """Stages whose p95 grew by more than ``tolerance`` (a fraction) over ``baseline``."""
+    regressions = []
+    for name, current in stages.items():
+        before = baseline.get(name)
+        if not before or not before.get("p95_ms") or not current["count"]:
+            continue
+        change = current["p95_ms"] / before["p95_ms"] - 1.0
+        if change > tolerance:
+            regressions.append({"stage": name, "baseline_p95_ms": before["p95_ms"],
+                                "p95_ms": current["p95_ms"], "change": round(change, 3)})
+    return regressions
+
+
+# ------------------------------------------------------------------------- seed
+def _batches(items, size: int):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def index_corpus(db, index, embed, batch_size: int = 500) -> int:
+    """Embed and upsert every ``corpus`` document into ``index``."""
+    from db import CORPUS_COLLECTION
+    from seed_synthetic_data import corpus_vectors
+
+    fields = {"_id": 0, "questionID": 1, "questionText": 1, "questionTitle": 1, "topic": 1}
+    count = 0
+    for docs in _batches(db[CORPUS_COLLECTION].find({}, fields), batch_size):
+        index.upsert(vectors=corpus_vectors(docs, embed), namespace="default")
+        count += len(docs)
+    return count
+
+
+def seed(db, patients: int, sessions_per_patient: int, corpus: int,
+         batch_size: int = 1000, workers: int | None = None) -> dict:
+    """Wipe the benchmark database and load it with the seeding engine of
+    ``seed_synthetic_data`` (chunked, parallel, unordered inserts)."""
+    from model_cache import get_embedding_model, get_pinecone_index
+    from patient_summary import rebuild_summaries
+    from seed_synthetic_data import _build_indexes, _wipe, seed_corpus, seed_patients
+
+    started = time.perf_counter()
+    index = get_pinecone_index()
+    _wipe(db, index)
+    counts = seed_patients(db, patients, sessions_per_patient, batch_size, workers)
+    counts["corpus"] = seed_corpus(db, index, get_embedding_model(), corpus, batch_size)
+    _build_indexes()
+    rebuild_summaries(db)
+    counts["seconds"] = round(time.perf_counter() - started, 1)
+    return counts
+
+
+# ------------------------------------------------------------------------ replay
+def _utterance(rng, crisis_rate: float) -> str:
+    from safety import SafetyChecker
+    from seed_synthetic_data import _DETAILS, _OPENERS
+
+    text = f"{rng.choice(_OPENERS[rng.choice(list(_OPENERS))])} {rng.choice(_DETAILS)}."
+    if rng.random() < crisis_rate:
+        phrases = sorted(p for ps in SafetyChecker.RED_FLAG_PHRASES.values() for p in ps)
+        text += f" Sometimes I {rng.choice(phrases)}."
+    return text
+
+
+def _api_client(api_url: str | None):
+    """``call(text, profile, history)`` for ``/guidance``: over HTTP, or in-process."""
+    if api_url:
+        import requests
+        http = requests.Session()
+
+        def call(text, profile, history):
+            response = http.post(f"{api_url.rstrip('/')}/guidance", timeout=120, json={
+                "user_input": text, "patient_profile": profile, "conversation_history": history})
+            response.raise_for_status()
+            return response.json()
+        return call
+
+    from main_fastapi import GuidanceRequest, get_guidance
+
+    def call(text, profile, history):
+        return get_guidance(GuidanceRequest(user_input=text, patient_profile=profile,
+                                            conversation_history=history))
+    return call
+
+
+def replay_session(n: int, patient_id: str, rec: Recorder, args, run_id: str, api=None) -> None:
+    """One synthetic live session: every turn's steps, then the report."""
+    from archiver import archive_conversation, archive_session
+    from doctor_qa import answer_doctor_query
+    from patient_overview import build_patient_summary
+    from patient_profile import get_patient_profile
+    from schemas import Conversation, Message, SessionLog
+    from session_aggregate import SessionAggregate
+    from session_assistant import generate_session_suggestions
+    from session_report import generate_session_report
+    from unified_guidance import analyze_message
+
+    rng = random.Random(f"{run_id}-{n}")
+    profile = rec.time("load_profile", get_patient_profile, patient_id)
+    profile = profile.dict() if profile else {"patient_id": patient_id}
+    conversation = Conversation(session_id=f"BENCH-{run_id}-{n:05d}", patient_id=patient_id)
+    active = {"patient_id": patient_id, "session_id": conversation.session_id,
+              "profile": profile, "topics": [], "risk_flags": [],
+              "aggregate": SessionAggregate()}
+
+    def transcript():
+        return "\n".join(f"{m.speaker.capitalize()}: {m.content}" for m in conversation.messages)
+
+    for turn in range(args.turns):
+        text = _utterance(rng, args.crisis_rate)
+        history = transcript()
+        started = time.perf_counter()
+        result = rec.time("analyze_message", analyze_message, text, profile, history) or {}
+        protocol = result.get("safety_protocol") or {}
+        rec.time("decision_support", generate_session_suggestions,
+                 transcript=history, patient_summary=build_patient_summary(profile),
+                 history_summary="", signals=f"topic: {result.get('predicted_topic')}",
+                 examples=result.get("historical_examples"), doctor_questions="(none yet)")
+        if api is not None:
+            rec.time("api_guidance", api, text, profile, history)
+
+        topic = result.get("predicted_topic")
+        if topic and topic not in active["topics"]:
+            active["topics"].append(topic)
+        if protocol.get("flag_type") and protocol["flag_type"] not in active["risk_flags"]:
+            active["risk_flags"].append(protocol["flag_type"])
+        active["aggregate"].add_turn(
+            sentiment_score=result.get("sentiment_score"),
+            emotion=(result.get("urgency") or {}).get("label"),
+            topic=topic, topic_confidence=result.get("topic_confidence"),
+            flag_type=protocol.get("flag_type"))
+        conversation.add_message(Message(content="How has that been for you?",
+                                         is_user=False, speaker="doctor"))
+        conversation.add_message(Message(content=text, is_user=True, speaker="patient"))
+        rec.time("archive_conversation", archive_conversation, conversation)
+        rec.time("archive_session", archive_session, SessionLog(
+            session_id=conversation.session_id, patient_id=patient_id,
+            detected_topics=active["topics"], risk_flags=active["risk_flags"],
+            sentiment_score=float(result.get("sentiment_score") or 0.0),
+            aggregate=active["aggregate"].as_dict()))
+        if args.ask_every and (turn + 1) % args.ask_every == 0:
+            rec.time("ask", answer_doctor_query, rng.choice(_ASK_QUESTIONS), active, transcript())
+        rec.record("turn", time.perf_counter() - started)
+        if args.think_ms:
+            time.sleep(args.think_ms / 1000.0)
+
+    rec.time("report", generate_session_report, active, transcript(), "")
+
+
+def run(db, args) -> dict:
+    """Replay the live sessions concurrently and return the results document."""
+    from config import settings
+    from model_cache import get_embedding_model, get_pinecone_index
+
+    index = get_pinecone_index()
+    if settings.vector_backend == "local" and not index.describe_index_stats()["total_vector_count"]:
+        indexed = index_corpus(db, index, get_embedding_model())
+        print(f"Indexed {indexed} corpus documents in the local vector index.")
+    patient_ids = [p["patient_id"] for p in db["patients"].find({}, {"_id": 0, "patient_id": 1})]
+    if not patient_ids:
+        raise SystemExit("No patients in the benchmark database: run with --seed first.")
+
+    rng = random.Random(args.rng_seed)
+    run_id = datetime.now().strftime("%Y%m%d%H%M%S")
+    api = _api_client(args.api_url) if not args.skip_api else None
+    rec = Recorder()
+    rss_start = _rss_mb()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="bench") as pool:
+        futures = [pool.submit(replay_session, n, rng.choice(patient_ids), rec, args, run_id, api)
+                   for n in range(args.live_sessions)]
+        for future in futures:
+            future.result()
+    wall = time.perf_counter() - started
+    stages = rec.summary(wall)
+    return {
+        "run_id": run_id,
+        "config": {"live_sessions": args.live_sessions, "turns": args.turns,
+                   "concurrency": args.concurrency, "patients": len(patient_ids),
+                   "llm_backend": settings.llm_backend, "vector_backend": settings.vector_backend,
+                   "local_llm_latency_ms": settings.local_llm_latency_ms,
+                   "database": settings.mongo_db_name, "api": args.api_url or "in-process"},
+        "wall_seconds": round(wall, 2),
+        "turns_per_second": stages.get("turn", {}).get("throughput_per_s", 0.0),
+        "memory": {"rss_start_mb": rss_start, "rss_end_mb": _rss_mb(),
+                   "peak_rss_mb": _peak_rss_mb()},
+        "stages": stages,
+    }
+
+
+# -------------------------------------------------------------------- analytics
+# Population analytics answer time the API is built for (uncached query, p95).
+ANALYTICS_TARGET_MS = 100.0
+_ANALYTICS_QUERIES = ("topic_frequencies", "topic_trends", "risk_flag_rates",
+                      "sentiment_by_cohort")
+
+
+def _session_day(session: dict) -> datetime:
+    started = (session.get("aggregate") or {}).get("started_at") or session["created_at"]
+    return started.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def expected_analytics(sessions, first_seen: dict, start: datetime, end: datetime) -> dict:
+    """The population analytics of ``[start, end)`` computed from session logs
+    in Python, without the rollups; ``first_seen`` maps patient_id to the start
+    of the patient's first session."""
+    total, patients, topics, flags, sentiment = 0, set(), {}, {}, {}
+    for s in sessions:
+        day = _session_day(s)
+        if not start <= day < end:
+            continue
+        total += 1
+        patients.add(s["patient_id"])
+        for topic in set(s.get("detected_topics") or []):
+            topics[topic] = topics.get(topic, 0) + 1
+        for flag in set(s.get("risk_flags") or []):
+            flags.setdefault(flag, [0, set()])
+            flags[flag][0] += 1
+            flags[flag][1].add(s["patient_id"])
+        seen = first_seen.get(s["patient_id"])
+        cohort = seen.strftime("%Y-%m") if seen else "unknown"
+        cell = sentiment.setdefault((cohort, day.replace(day=1)), [0, 0.0, 0])
+        cell[0] += 1
+        if isinstance(s.get("sentiment_score"), (int, float)):
+            cell[1] += s["sentiment_score"]
+            cell[2] += 1
+    return {
+        "sessions": total, "patients": len(patients), "topics": topics,
+        "flags": {flag: (n, len(ids)) for flag, (n, ids) in flags.items()},
+        "sentiment": {key: (n, round(s / c, 4) if c else 0.0)
+                      for key, (n, s, c) in sentiment.items()},
+    }
+
+
+def analytics_mismatches(expected: dict, topics: dict, flags: dict, sentiment: dict) -> list:
+    """Differences between ``expected_analytics`` and the answers of
+    ``topic_frequencies``, ``risk_flag_rates`` and ``sentiment_by_cohort``."""
+    actual = {
+        "sessions": flags["sessions"], "patients": flags["patients"],
+        "topics": {row["label"]: row["sessions"] for row in topics["topics"]},
+        "flags": {row["label"]: (row["sessions"], row["patients"]) for row in flags["flags"]},
+        "sentiment": {(cohort, row["month"]): (row["sessions"], row["mean_sentiment"])
+                      for cohort, rows in sentiment["cohorts"].items() for row in rows},
+    }
+    out = [f"{key}: expected {expected[key]}, got {actual[key]}"
+           for key in ("sessions", "patients", "topics", "flags") if expected[key] != actual[key]]
+    if topics["sessions"] != expected["sessions"]:
+        out.append(f"topic sessions: expected {expected['sessions']}, got {topics['sessions']}")
+    for key in set(expected["sentiment"]) | set(actual["sentiment"]):
+        want, got = expected["sentiment"].get(key), actual["sentiment"].get(key)
+        if not (want and got and want[0] == got[0] and abs(want[1] - got[1]) <= 1e-3):
+            out.append(f"sentiment {key[0]} {key[1]:%Y-%m}: expected {want}, got {got}")
+    return out
+
+
+def _check_window(db, pa, days: int, end: datetime) -> list:
+    start, stop = pa.window(days, end)
+    # A session's day is never after its last archive, so created_at bounds the scan.
+    sessions = list(db["sessions"].find(
+        {"created_at": {"$gte": start}},
+        {"_id": 0, "patient_id": 1, "created_at": 1, "aggregate.started_at": 1,
+         "detected_topics": 1, "risk_flags": 1, "sentiment_score": 1}))
+    ids = list({s["patient_id"] for s in sessions})
+    first_seen = {}
+    for batch in _batches(ids, 10_000):
+        for p in db["patients"].find({"patient_id": {"$in": batch}},
+                                     {"_id": 0, "patient_id": 1, "summary.first_seen": 1}):
+            first_seen[p["patient_id"]] = (p.get("summary") or {}).get("first_seen")
+    pa._cache.clear()
+    return analytics_mismatches(
+        expected_analytics(sessions, first_seen, start, stop),
+        pa.topic_frequencies(days, end, db=db), pa.risk_flag_rates(days, end, db=db),
+        pa.sentiment_by_cohort(days, end, db=db))
+
+
+def check_analytics(db, days: int = 30, runs: int = 20) -> dict:
+    """Rebuild the rollups, check their answers against ``sessions`` and time
+    each query uncached (see the module docstring)."""
+    import population_analytics as pa
+
+    rec = Recorder()
+    started = time.perf_counter()
+    rec.time("refresh_full", pa.refresh, True, db)
+    now = datetime.now()
+    windows = {"recent": now, "earlier": now - timedelta(days=2 * days)}
+    mismatches = [f"{name}: {m}" for name, end in windows.items()
+                  for m in _check_window(db, pa, days, end)]
+
+    # A re-archive today moves a session that has no started_at off its old day.
+    start, stop = pa.window(days, windows["earlier"])
+    moved = db["sessions"].find_one({"created_at": {"$gte": start, "$lt": stop},
+                                     "aggregate.started_at": {"$exists": False}})
+    if moved:
+        db["sessions"].update_one({"_id": moved["_id"]},
+                                  {"$set": {"created_at": now, "sentiment_score": None}})
+        try:
+            rec.time("refresh_incremental", pa.refresh, False, db)
+            mismatches += [f"after a re-archive, {name}: {m}" for name, end in windows.items()
+                           for m in _check_window(db, pa, days, end)]
+        finally:
+            db["sessions"].update_one({"_id": moved["_id"]}, {"$set": {
+                "created_at": moved["created_at"], "sentiment_score": moved.get("sentiment_score")}})
+            pa.refresh(full=True, db=db)  # moving back in time is not a re-archive
+
+    for name in _ANALYTICS_QUERIES:
+        query = getattr(pa, name)
+        for _ in range(runs):
+            pa._cache.clear()
+            rec.time(f"analytics.{name}", query, db=db)
+    stages = rec.summary(time.perf_counter() - started)
+    return {
+        "sessions": db["sessions"].estimated_document_count(),
+        "stages": stages,
+        "mismatches": mismatches,
+        "over_target": [name for name, s in stages.items()
+                        if name.startswith("analytics.") and s["p95_ms"] > ANALYTICS_TARGET_MS],
+    }
+
+
+def _print_stages(stages: dict) -> None:
+    print(f"{'stage':<22}{'count':>7}{'err':>5}{'/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, s in stages.items():
+        print(f"{name:<22}{s['count']:>7}{s['errors']:>5}{s['throughput_per_s']:>9}"
+              f"{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}")
+
+
+def main():
+    _offline_defaults()
+    from config import settings
+    from db import get_db
+    from logging_config import setup_logging
+
+    setup_logging()
+    ap = argparse.ArgumentParser(description="Seed synthetic data and load-test the pipeline.")
+    ap.add_argument("--seed", action="store_true", help="wipe and reseed the benchmark database")
+    ap.add_argument("--patients", type=int, default=10_000)
+    ap.add_argument("--sessions-per-patient", type=int, default=10)
+    ap.add_argument("--corpus", type=int, default=20_000, help="knowledge-base documents")
+    ap.add_argument("--batch-size", type=int, default=1000, help="documents per insert")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="processes generating seed data (default: CPU count)")
+    ap.add_argument("--live-sessions", type=int, default=32, help="sessions to replay (0: seed only)")
+    ap.add_argument("--turns", type=int, default=8, help="patient turns per session")
+    ap.add_argument("--concurrency", type=int, default=8, help="sessions replayed at once")
+    ap.add_argument("--ask-every", type=int, default=4, help="an Ask question every N turns (0: none)")
+    ap.add_argument("--think-ms", type=float, default=0.0, help="pause between turns")
+    ap.add_argument("--crisis-rate", type=float, default=0.03, help="share of turns with crisis language")
+    ap.add_argument("--api-url", help="benchmark /guidance over HTTP at this base URL")
+    ap.add_argument("--skip-api", action="store_true", help="do not call /guidance")
+    ap.add_argument("--rng-seed", type=int, default=0)
+    ap.add_argument("--out", help="results file (default benchmark-results/<run id>.json)")
+    ap.add_argument("--baseline", help="earlier results file to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 growth (0.2 = 20%%)")
+    ap.add_argument("--analytics", action="store_true",
+                    help="check the population analytics instead of replaying sessions")
+    ap.add_argument("--analytics-runs", type=int, default=20, help="timed calls per analytics query")
+    args = ap.parse_args()
+
+    db = get_db()
+    if args.seed:
+        if settings.mongo_db_name != BENCH_DB and not os.environ.get("BENCHMARK_ALLOW_ANY_DB"):
+            ap.error(f"refusing to wipe {settings.mongo_db_name!r}: seed only into {BENCH_DB!r} "
+                     "(or set BENCHMARK_ALLOW_ANY_DB=1)")
+        print(f"Seeding {settings.mongo_db_name}…")
+        print(seed(db, args.patients, args.sessions_per_patient, args.corpus, args.batch_size,
+                   args.workers))
+    if args.analytics:
+        results = check_analytics(db, runs=args.analytics_runs)
+        _print_stages(results["stages"])
+        print(f"{results['sessions']:,} sessions; target p95 {ANALYTICS_TARGET_MS:g} ms per query")
+        for name in results["over_target"]:
+            print(f"  OVER TARGET  {name}: p95 {results['stages'][name]['p95_ms']} ms")
+        for item in results["mismatches"]:
+            print(f"  MISMATCH  {item}")
+        if results["over_target"] or results["mismatches"]:
+            raise SystemExit(1)
+        return
+    if not args.live_sessions:
+        return
+
+    results = run(db, args)
+    _print_stages(results["stages"])
+    print(f"{results['turns_per_second']} turns/s over {results['wall_seconds']}s; "
+          f"memory {results['memory']}")
+    out = args.out or os.path.join("benchmark-results", f"{results['run_id']}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            results["regressions"] = compare(results["stages"], json.load(f)["stages"],
+                                             args.tolerance)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"Results saved to {out}")
+    for item in results.get("regressions", []):
+        print(f"  REGRESSION  {item['stage']}: p95 {item['baseline_p95_ms']} -> "
+              f"{item['p95_ms']} ms ({item['change']:+.0%})")
+    if results.get("regressions"):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
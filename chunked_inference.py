@@ -0,0 +1,103 @@
+"""Sliding-window inference for the local classifiers on long text.
+
+The sentiment, emotion and topic models read at most one model-length input
+(512 tokens for the RoBERTa models, 1024 for BART). Rather than cutting long
+text (a whole turn, or the joined transcript the report classifies) to its
+start, ``split_windows`` tokenizes it with the model's own tokenizer and splits
+it into overlapping model-length windows; all windows go through the pipeline
+as one batched call and their per-label scores are aggregated:
+
+- ``"mean"``, weighted by window length: the overall reading (sentiment, topic);
+- ``"max"``: any window is enough (emotional urgency, so one distressed
+  passage is not averaged away by a calm remainder).
+
+Text that fits one window is classified whole in a single pass. Cost is one
+model pass per window: linear in the text length and predictable from it.
+"""
+import logging
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Window used when a pipeline has no tokenizer: the old 512-character cut.
+_FALLBACK_WINDOW_CHARS = 512
+_FALLBACK_OVERLAP_CHARS = 64
+# Tokenizers without a real limit report a huge model_max_length.
+_DEFAULT_MAX_TOKENS = 512
+
+
+def _window_tokens(tokenizer, reserve: int) -> int:
+    limit = settings.inference_window_tokens
+    if not limit:
+        limit = getattr(tokenizer, "model_max_length", None) or _DEFAULT_MAX_TOKENS
+        if limit > 100_000:
+            limit = _DEFAULT_MAX_TOKENS
+    try:
+        special = tokenizer.num_special_tokens_to_add()
+    except Exception:
+        special = 2
+    return max(8, limit - special - reserve)
+
+
+def _spans(length: int, size: int, overlap: int) -> list:
+    overlap = min(overlap, size // 2)
+    starts = range(0, length - overlap, size - overlap) if length > size else [0]
+    return [(start, min(length, start + size)) for start in starts]
+
+
+def split_windows(text: str, tokenizer=None, reserve: int = 0) -> tuple[list, list]:
+    """Split ``text`` into overlapping model-length windows.
+
+    ``reserve`` keeps room for tokens the pipeline adds (e.g. the zero-shot
+    hypothesis). Returns ``(windows, weights)``, each window's weight being its
+    length; text that fits is returned unchanged as the only window.
+    """
+    if tokenizer is None:
+        spans = _spans(len(text), _FALLBACK_WINDOW_CHARS, _FALLBACK_OVERLAP_CHARS)
+        return [text[a:b] for a, b in spans], [b - a for a, b in spans]
+    ids = tokenizer.encode(text, add_special_tokens=False)
+    size = _window_tokens(tokenizer, reserve)
+    if len(ids) <= size:
+        return [text], [max(1, len(ids))]
+    spans = _spans(len(ids), size, settings.inference_window_overlap_tokens)
+    logger.debug("Classifying %d tokens in %d windows.", len(ids), len(spans))
+    return ([tokenizer.decode(ids[a:b], skip_special_tokens=True) for a, b in spans],
+            [b - a for a, b in spans])
+
+
+def aggregate(per_window: list, weights: list, how: str = "mean") -> dict:
+    """Combine per-window ``{label: score}`` dicts into one (``"mean"`` or ``"max"``)."""
+    if how not in ("mean", "max"):
+        raise ValueError(f"Unknown aggregation: {how!r}")
+    combined: dict = {}
+    total = float(sum(weights)) or 1.0
+    for scores, weight in zip(per_window, weights):
+        for label, score in scores.items():
+            if how == "max":
+                combined[label] = max(combined.get(label, 0.0), score)
+            else:
+                combined[label] = combined.get(label, 0.0) + score * weight / total
+    return combined
+
+
+def classify_scores(pipe, text: str, how: str = "mean") -> dict:
+    """All-label scores of a text-classification pipeline over the whole of ``text``."""
+    windows, weights = split_windows(text, getattr(pipe, "tokenizer", None))
+    outputs = pipe(windows, top_k=None, truncation=True, batch_size=settings.inference_batch_size)
+    per_window = []
+    for output in outputs:
+        if isinstance(output, dict):
+            output = [output]
+        per_window.append({item["label"]: float(item["score"]) for item in output})
+    return aggregate(per_window, weights, how)
+
+
+def zero_shot_scores(pipe, text: str, labels: list, reserve: int = 16) -> dict:
+    """Per-label scores of a zero-shot pipeline over the whole of ``text``."""
+    windows, weights = split_windows(text, getattr(pipe, "tokenizer", None), reserve)
+    outputs = pipe(windows, candidate_labels=labels, batch_size=settings.inference_batch_size)
+    if isinstance(outputs, dict):
+        outputs = [outputs]
+    per_window = [dict(zip(out["labels"], map(float, out["scores"]))) for out in outputs]
+    return aggregate(per_window, weights)
@@ -1,17 +1,14 @@
-import pymongo
 import pandas as pd
 import logging
 from sklearn.cluster import KMeans
 from langchain_huggingface import HuggingFaceEmbeddings
-from config import settings
-from db import CORPUS_COLLECTION
+from db import get_db, CORPUS_COLLECTION
 
 logger = logging.getLogger(__name__)
 
 def cluster_patient_problems(n_clusters=5):
     logger.info("Clustering patient problems into %d clusters", n_clusters)
-    client = pymongo.MongoClient(settings.safe_mongo_uri)
-    db = client.get_database("MentalHealthDB")
+    db = get_db(secondary_ok=True)
     collection = db[CORPUS_COLLECTION]
     data = list(collection.find({}))
     logger.info("Loaded %d documents for clustering", len(data))
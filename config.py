@@ -9,6 +9,117 @@ class Settings(BaseSettings):
     pinecone_environment: str
     app_password: str = ""  # optional shared password gating the Streamlit app
 
+    # MongoDB client tuning (db.get_mongo_client). Unset timeouts keep the
+    # driver defaults.
+    mongo_max_pool_size: int = 50
+    mongo_min_pool_size: int = 0
+    mongo_max_idle_time_ms: int | None = None
+    mongo_connect_timeout_ms: int = 10_000
+    mongo_server_selection_timeout_ms: int = 10_000
+    mongo_socket_timeout_ms: int | None = None
+    mongo_wait_queue_timeout_ms: int | None = None
+    # Wire compression, in preference order, e.g. "zstd,snappy,zlib" (zstd and
+    # snappy need the zstandard / python-snappy packages; zlib is built in).
+    mongo_compressors: str = ""
+    # Read preference for secondary-friendly reads: patient history, the
+    # launch roster and offline jobs. e.g. "secondaryPreferred" on a replica set.
+    mongo_history_read_preference: str = "primary"
+    # Database the app reads and writes; the benchmark (benchmark.py) uses its
+    # own so seeding never touches real data.
+    mongo_db_name: str = "MentalHealthDB"
+
+    # Crisis priority mode: when the crisis screen raises one of these actions,
+    # the crisis result is returned at once and the model stages finish in the
+    # background (see unified_guidance.is_priority_crisis).
+    crisis_priority_mode: bool = True
+    crisis_priority_actions: str = "CRITICAL"
+    # Threads for work finished after a response is sent (background.py).
+    background_workers: int = 4
+    # Concurrent request steps (background.gather): pool size, and deadlines for
+    # the model-backed steps (local models, embedding + Pinecone retrieval) and
+    # for each MongoDB context fetch. A step past its deadline is reported as
+    # degraded and the LLM call goes ahead without it; so is a step with a
+    # deadline when every worker is still busy with earlier, late steps.
+    gather_workers: int = 8
+    model_stage_timeout_seconds: float = 30.0
+    context_timeout_seconds: float = 5.0
+
+    # LLM response cache (llm_cache.py): byte-identical prompts within the TTL
+    # reuse the stored completion. ``llm_cache_temperature`` (e.g. 0.2) sends
+    # cacheable calls to a lower-temperature model so a reused answer is one
+    # the model would likely have given anyway; unset keeps the default model.
+    llm_cache_enabled: bool = True
+    llm_cache_ttl_seconds: int = 900
+    llm_cache_max_entries: int = 256
+    llm_cache_temperature: float | None = None
+
+    # Chat backend: "groq" (hosted) or "local", the deterministic offline
+    # stand-in for load / latency testing (local_llm.py), simulating time to
+    # first token ("fixed", "uniform" or "lognormal" around the mean), the
+    # streaming rate and injected provider failures.
+    llm_backend: str = "groq"
+    local_llm_latency: str = "lognormal"
+    local_llm_latency_ms: float = 400.0
+    local_llm_latency_sigma: float = 0.6
+    local_llm_tokens_per_second: float = 150.0
+    local_llm_failure_rate: float = 0.0
+    local_llm_failure_status: int = 503
+    local_llm_seed: int = 0
+    # Retrieval backend: "pinecone" (hosted index + MiniLM embeddings) or
+    # "local", an in-process hashing embedder and index (local_vectors.py) for
+    # offline load testing.
+    vector_backend: str = "pinecone"
+
+    # LLM gateway (llm_gateway.py), shared by every upstream LLM call: calls in
+    # flight, call starts per second (token bucket; 0 = unpaced) and burst,
+    # retries of 429s with jittered exponential backoff, and how long a call
+    # may wait for a slot before failing fast.
+    llm_max_in_flight: int = 8
+    llm_rate_per_second: float = 5.0
+    llm_burst: int = 10
+    llm_max_retries: int = 3
+    llm_backoff_base_seconds: float = 0.5
+    llm_backoff_max_seconds: float = 8.0
+    llm_queue_timeout_seconds: float = 30.0
+
+    # Tokenizer used to count prompt tokens against the template budgets
+    # (prompt_budget.py): the chat model's (Llama 3.3). It loads in the background
+    # on first use; until then, and if it is empty or unavailable, counts are
+    # estimated from length instead.
+    prompt_tokenizer: str = "unsloth/Llama-3.3-70B-Instruct"
+    # Conversation history embedded in the advice context, in tokens (most
+    # recent kept).
+    analysis_history_tokens: int = 1200
+    # Rolling session summary (rolling_summary.py): turns sent verbatim, and
+    # how many older turns are folded into the summary at a time.
+    summary_recent_turns: int = 12
+    summary_fold_turns: int = 8
+    # Speculative analysis of the patient's draft (speculative.py): on/off, the
+    # shortest draft worth analysing, and how much of the sent turn a draft
+    # must cover for its retrieved examples to be reused.
+    speculative_prefetch: bool = True
+    speculative_min_chars: int = 12
+    speculative_retrieval_reuse: float = 0.8
+    # Per-text analysis memo (analysis_memo.py): in-process entries and their
+    # lifetime, and whether to share results through the ``analysis_memo``
+    # MongoDB collection across processes.
+    analysis_memo_max_entries: int = 2048
+    analysis_memo_ttl_seconds: float = 86400.0
+    analysis_memo_store: bool = False
+    # Long-text inference for the local classifiers (chunked_inference.py):
+    # window length in tokens (0 = the model's maximum), overlap between
+    # windows, and windows per batched forward pass.
+    inference_window_tokens: int = 0
+    inference_window_overlap_tokens: int = 64
+    inference_batch_size: int = 8
+    # Population analytics (population_analytics.py): how long query results
+    # are cached, rollup age after which an API call starts a background
+    # incremental refresh, and the window lengths (days, ending today) whose
+    # distinct-patient counts each refresh precomputes.
+    analytics_cache_ttl_seconds: float = 300.0
+    analytics_refresh_seconds: float = 900.0
+    analytics_windows: str = "7,30,90"
+
     class Config:
         env_file = ".env"
         extra = "ignore"
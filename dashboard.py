@@ -7,12 +7,19 @@ def _assistant_analyses(conversation):
     return [m["analysis"] for m in (conversation or []) if m.get("analysis")]
 
 
-def trajectory(conversation):
+def trajectory(conversation, aggregate=None):
     """Build the sentiment sparkline (points string + signed delta) from the
-    per-message sentiment scores. Mirrors the cockpit metric geometry."""
-    analyses = _assistant_analyses(conversation)
-    scores = [a.get("sentiment_score") for a in analyses
-              if isinstance(a.get("sentiment_score"), (int, float))]
+    per-message sentiment scores. Mirrors the cockpit metric geometry.
+
+    With the session's ``SessionAggregate``, its precomputed series is used
+    instead of walking the conversation.
+    """
+    if aggregate is not None:
+        scores = aggregate.sentiment_series
+    else:
+        analyses = _assistant_analyses(conversation)
+        scores = [a.get("sentiment_score") for a in analyses
+                  if isinstance(a.get("sentiment_score"), (int, float))]
     if len(scores) < 2:
         return "", "—", "#8a93a8", False
     n = len(scores)
@@ -31,7 +38,7 @@ def trajectory(conversation):
     return " ".join(pts), txt, color, True
 
 
-def render_dashboard(conversation, patient_profile=None):
+def render_dashboard(conversation, patient_profile=None, aggregate=None):
     """Right-column session metrics: current emotion, topic, sentiment trajectory.
 
     Reads only data already produced per message — no model calls here.
@@ -45,7 +52,7 @@ def render_dashboard(conversation, patient_profile=None):
             emotion = str(urgency["label"]).title()
         topic = latest.get("topic") or "—"
 
-    points, delta_text, delta_color, has = trajectory(conversation)
+    points, delta_text, delta_color, has = trajectory(conversation, aggregate)
     st.markdown(
         ui.metrics_panel(emotion, topic, points, delta_text, delta_color, has),
         unsafe_allow_html=True,
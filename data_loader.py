@@ -1,19 +1,15 @@
-import ssl
-import pymongo
 import logging
 from langchain.schema import Document
-from config import settings
-from db import CORPUS_COLLECTION
+from db import get_db, CORPUS_COLLECTION
 
 logger = logging.getLogger(__name__)
 
 def load_dataset():
     """Load dataset from MongoDB (MentalHealthDB, PatientConvo)
     and convert records to LangChain Document objects."""
-    client = None
     try:
-        client = pymongo.MongoClient(settings.safe_mongo_uri, ssl=True, ssl_cert_reqs=ssl.CERT_NONE)
-        db = client.get_database("MentalHealthDB")
+        # Shared client: its pool outlives this call, so it is not closed here.
+        db = get_db(secondary_ok=True)
         collection = db[CORPUS_COLLECTION]
 
         data = list(collection.find({}))
@@ -38,6 +34,3 @@ def load_dataset():
     except Exception as e:
         logger.error("Error loading dataset from MongoDB: %s", str(e), exc_info=True)
         raise
-    finally:
-        if client is not None:
-            client.close()
@@ -1,11 +1,179 @@
+import logging
+import threading
+import time
 from functools import lru_cache
 import pymongo
+from pymongo import monitoring
 from config import settings
 
-DB_NAME = "MentalHealthDB"
+logger = logging.getLogger(__name__)
+
+DB_NAME = settings.mongo_db_name
 # RAG knowledge corpus, kept separate from the PatientConvo conversation archive.
 CORPUS_COLLECTION = "corpus"
 
+# Indexes the query helpers rely on. The history lookups page through a
+# patient's sessions newest-first, so (patient_id, created_at, session_id)
+# lets a page be read straight off the index however long the history is.
+INDEXES = {
+    "sessions": [
+        [("patient_id", 1), ("created_at", -1), ("session_id", -1)],
+        [("session_id", 1)],
+        # Incremental population rollups: sessions archived since a given day.
+        [("created_at", 1)],
+    ],
+    "PatientConvo": [
+        [("patient_id", 1), ("created_at", -1), ("session_id", -1)],
+        [("session_id", 1)],
+    ],
+    "patients": [
+        [("patient_id", 1)],
+        # Launch roster: most recently seen patients (materialized summary).
+        [("summary.last_seen", -1)],
+    ],
+    # Population analytics rollups (population_analytics.py): window queries
+    # by kind + day, the latest rolled-up day for incremental refreshes, and
+    # the precomputed patient counts by window + kind.
+    "session_rollups": [
+        [("kind", 1), ("day", 1), ("cohort", 1)],
+        [("day", -1)],
+    ],
+    "session_rollup_windows": [
+        [("end", 1), ("days", 1), ("kind", 1), ("cohort", 1)],
+    ],
+}
+
+
+_READ_PREFERENCES = {
+    "primary": pymongo.ReadPreference.PRIMARY,
+    "primarypreferred": pymongo.ReadPreference.PRIMARY_PREFERRED,
+    "secondary": pymongo.ReadPreference.SECONDARY,
+    "secondarypreferred": pymongo.ReadPreference.SECONDARY_PREFERRED,
+    "nearest": pymongo.ReadPreference.NEAREST,
+}
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Connection-pool counters gathered from pymongo's CMAP events.
+
+    Registered on the shared client so pool usage and wait-queue pressure can
+    be read (``pool_stats()``) while tuning ``mongo_max_pool_size`` under
+    concurrent sessions.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.pools = 0
+            self.open = 0              # connections currently open
+            self.checked_out = 0       # connections currently in use
+            self.max_checked_out = 0
+            self.waiting = 0           # checkouts currently queued for a connection
+            self.max_waiting = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            done = self.checkouts or 1
+            return {
+                "pools": self.pools,
+                "open": self.open,
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "waiting": self.waiting,
+                "max_waiting": self.max_waiting,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "wait_ms_avg": round(self.wait_seconds_total / done * 1000, 3),
+                "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+            }
+
+    def pool_created(self, event):
+        with self._lock:
+            self.pools += 1
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        with self._lock:
+            self.pools = max(0, self.pools - 1)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open = max(0, self.open - 1)
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting = max(0, self.waiting - 1)
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        # ``duration`` (seconds spent waiting for the connection) is reported
+        # by pymongo >= 4.7.
+        wait = float(getattr(event, "duration", 0.0) or 0.0)
+        with self._lock:
+            self.waiting = max(0, self.waiting - 1)
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+            self.checkouts += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+
+_pool_stats = PoolStats()
+
+
+def client_options(s=settings) -> dict:
+    """MongoClient keyword arguments built from the Mongo tuning settings."""
+    options = {
+        "maxPoolSize": s.mongo_max_pool_size,
+        "minPoolSize": s.mongo_min_pool_size,
+        "connectTimeoutMS": s.mongo_connect_timeout_ms,
+        "serverSelectionTimeoutMS": s.mongo_server_selection_timeout_ms,
+        "maxIdleTimeMS": s.mongo_max_idle_time_ms,
+        "socketTimeoutMS": s.mongo_socket_timeout_ms,
+        "waitQueueTimeoutMS": s.mongo_wait_queue_timeout_ms,
+    }
+    options = {k: v for k, v in options.items() if v is not None}
+    compressors = [c.strip() for c in (s.mongo_compressors or "").split(",") if c.strip()]
+    if compressors:
+        options["compressors"] = compressors
+    return options
+
+
+def history_read_preference(s=settings):
+    """The read preference for secondary-friendly reads (history, roster, jobs)."""
+    name = (s.mongo_history_read_preference or "primary").replace("_", "").lower()
+    if name not in _READ_PREFERENCES:
+        raise ValueError(f"Unknown mongo_history_read_preference: {s.mongo_history_read_preference!r}")
+    return _READ_PREFERENCES[name]
+
 
 @lru_cache(maxsize=1)
 def get_mongo_client():
@@ -14,11 +182,66 @@ def get_mongo_client():
     pymongo manages an internal connection pool, so a single client should be
     created once and reused across calls. Creating a new client per operation
     (the previous pattern) spins up a fresh pool each time and leaks
-    connections when the client is never closed.
+    connections when the client is never closed. Every module — the app and
+    the offline jobs alike — goes through this client; its pool is sized and
+    timed by the ``mongo_*`` settings and observed by ``pool_stats()``.
     """
-    return pymongo.MongoClient(settings.safe_mongo_uri)
+    return pymongo.MongoClient(
+        settings.safe_mongo_uri, event_listeners=[_pool_stats], **client_options()
+    )
+
 
+def pool_stats() -> dict:
+    """Current connection-pool usage and wait-queue metrics for the shared client."""
+    stats = _pool_stats.snapshot()
+    stats["max_pool_size"] = settings.mongo_max_pool_size
+    return stats
 
-def get_db(name: str = DB_NAME):
-    """Return the application database from the shared client."""
+
+# ensure_indexes state: success is remembered for the life of the process; a
+# failure (e.g. Mongo briefly unreachable) is retried after a pause.
+_INDEX_RETRY_SECONDS = 60.0
+_indexes_lock = threading.Lock()
+_indexes_ready = False
+_indexes_retry_at = 0.0
+
+
+def ensure_indexes(force: bool = False) -> bool:
+    """Create the indexes in ``INDEXES`` once per process (idempotent).
+
+    A failure is logged rather than raised: queries still work without the
+    indexes, just slower. It is retried at most every ``_INDEX_RETRY_SECONDS``
+    (``force`` retries now, e.g. after a bulk load dropped the collections).
+    """
+    global _indexes_ready, _indexes_retry_at
+    with _indexes_lock:
+        if _indexes_ready and not force:
+            return True
+        if not force and time.monotonic() < _indexes_retry_at:
+            return False
+        db = get_mongo_client().get_database(DB_NAME)
+        try:
+            for collection, specs in INDEXES.items():
+                for keys in specs:
+                    db[collection].create_index(keys)
+        except Exception:
+            logger.warning("Could not ensure MongoDB indexes; will retry.", exc_info=True)
+            _indexes_ready = False
+            _indexes_retry_at = time.monotonic() + _INDEX_RETRY_SECONDS
+            return False
+        _indexes_ready = True
+        return True
+
+
+def get_db(name: str = DB_NAME, secondary_ok: bool = False):
+    """Return the application database from the shared client.
+
+    ``secondary_ok`` applies the ``mongo_history_read_preference`` — for reads
+    that tolerate replication lag (patient history, the roster, offline jobs).
+    Writes through the returned handle always go to the primary.
+    """
+    if name == DB_NAME:
+        ensure_indexes()
+    if secondary_ok:
+        return get_mongo_client().get_database(name, read_preference=history_read_preference())
     return get_mongo_client().get_database(name)
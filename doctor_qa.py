@@ -11,30 +11,26 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-_MAX_LIVE_CHARS = 6000
-_MAX_PRIOR_MSGS = 30
 
-
-def _prior_transcript(pid: str, session_id: str) -> str:
+def _prior_transcript(ctx) -> str:
     """The archived transcript of the patient's most recent prior session."""
-    from patient_profile import get_patient_conversations
     try:
-        convs = get_patient_conversations(pid)
+        messages = ctx.last_transcript()
     except Exception:
         logger.exception("Failed to load prior conversations")
         return "(transcript unavailable)"
-    conv = next((c for c in convs if c.get("session_id") == session_id), None)
-    if not conv:
+    if messages is None:
         return "(transcript for the previous session is not archived)"
     lines = []
-    for m in (conv.get("messages") or [])[-_MAX_PRIOR_MSGS:]:
+    for m in messages:
         speaker = m.get("speaker") or ("patient" if m.get("is_user") else "doctor")
-        lines.append(f"{speaker.capitalize()}: {(m.get('content') or '')[:300]}")
+        lines.append(f"{speaker.capitalize()}: {m.get('content') or ''}")
     return "\n".join(lines) or "(empty transcript)"
 
 
 def _retrieved_cases(question: str) -> str:
     """Top corpus cases for the question (graceful if Pinecone is unavailable)."""
+    from prompt_budget import truncate
     from semantic_search import semantic_search
     try:
         cases = semantic_search(question, top_k=3)
@@ -44,80 +40,132 @@ def _retrieved_cases(question: str) -> str:
     if not cases:
         return "(no closely related cases found)"
     return "\n".join(
-        f"- [corpus #{ex.get('questionID')}] Q: {(ex.get('questionText') or '')[:200]} "
-        f"| A: {(ex.get('answerText') or '')[:300]}"
+        f"- [corpus #{ex.get('questionID')}] Q: {truncate(ex.get('questionText') or '', 60)} "
+        f"| A: {truncate(ex.get('answerText') or '', 90)}"
         for ex in cases
     )
 
 
-def _clip_live(transcript: str) -> str:
-    t = transcript or "(no turns logged yet)"
-    if len(t) <= _MAX_LIVE_CHARS:
-        return t
-    return t[:1500] + "\n…[earlier turns omitted]…\n" + t[-4000:]
+def _record_context(pid, cur_session_id, profile) -> tuple[list, str, str]:
+    """``(prior sessions, last session detail, last session transcript)``."""
+    from patient_context import get_patient_context
+    from patient_overview import _fmt_date, _days_ago
 
+    # Prior sessions, excluding today's in-progress session — loaded once per
+    # live session and shared with the overview and the report.
+    try:
+        ctx = get_patient_context(pid, cur_session_id, profile=profile)
+    except Exception:
+        logger.exception("Failed to load patient sessions")
+        ctx = None
+    prior = ctx.prior_sessions if ctx else []
 
-def answer_doctor_query(question: str, active: dict, transcript: str) -> str:
-    """Answer the clinician's question grounded in the patient's data + corpus.
+    last = prior[0] if prior else None
+    if not last:
+        return prior, "(no previous session on record)", "(no previous session on record)"
+    try:
+        last = ctx.last_session_log() or last  # adds the clinician notes
+    except Exception:
+        logger.exception("Failed to load the last session log")
+    ago = _days_ago(last.get("created_at"))
+    date = _fmt_date(last.get("created_at")) + (f" ({ago})" if ago else "")
+    topics = ", ".join(last.get("detected_topics") or []) or "—"
+    flags = ", ".join(last.get("risk_flags") or []) or "none"
+    notes = (last.get("doctor_notes") or "").strip() or "(none)"
+    last_detail = (
+        f"date: {date}\ntopics: {topics}\nrisk flags: {flags}\n"
+        f"sentiment score: {last.get('sentiment_score')}\nclinician notes: {notes}"
+    )
+    return prior, last_detail, _prior_transcript(ctx)
 
-    ``active`` is ``st.session_state['lsa_active']`` =
-    ``{patient_id, session_id, profile(dict), risk_flags, topics}``.
-    """
-    from langchain.schema import HumanMessage
-    from model_cache import get_chat_groq
-    from prompt_templates import DOCTOR_QA_TEMPLATE
-    from patient_profile import get_patient_sessions
-    from patient_overview import build_patient_summary, build_history_summary, _fmt_date, _days_ago
+
+_NO_ANSWER = "I couldn't find an answer in the available record."
+_UNAVAILABLE = ("The assistant is temporarily unavailable (the language model could not be "
+                "reached). Please try again.")
+
+
+def _build_prompt(question: str, active: dict, transcript: str) -> str:
+    """The grounded Q&A prompt. The patient record and the corpus retrieval are
+    fetched concurrently, each with its own deadline; a source that is late is
+    reported as unavailable in the prompt rather than holding the answer back."""
+    import background
+    from config import settings
+    from prompt_budget import build_prompt
+    from prompt_templates import DOCTOR_QA_TEMPLATE, DOCTOR_QA_BUDGET
+    from patient_overview import build_patient_summary, build_history_summary
 
     pid = active.get("patient_id")
     profile = active.get("profile") or {}
     cur_session_id = active.get("session_id")
 
-    # Prior sessions, excluding today's in-progress session.
-    try:
-        sessions = get_patient_sessions(pid)
-    except Exception:
-        logger.exception("Failed to load patient sessions")
-        sessions = []
-    prior = [s for s in sessions if s.get("session_id") != cur_session_id]
-
-    last = prior[0] if prior else None
-    if last:
-        ago = _days_ago(last.get("created_at"))
-        date = _fmt_date(last.get("created_at")) + (f" ({ago})" if ago else "")
-        topics = ", ".join(last.get("detected_topics") or []) or "—"
-        flags = ", ".join(last.get("risk_flags") or []) or "none"
-        notes = (last.get("doctor_notes") or "").strip() or "(none)"
-        last_detail = (
-            f"date: {date}\ntopics: {topics}\nrisk flags: {flags}\n"
-            f"sentiment score: {last.get('sentiment_score')}\nclinician notes: {notes}"
-        )
-        last_transcript = _prior_transcript(pid, last.get("session_id"))
-    else:
-        last_detail = "(no previous session on record)"
-        last_transcript = "(no previous session on record)"
+    fetched, _failed = background.gather(
+        {
+            "record": lambda: _record_context(pid, cur_session_id, profile),
+            "cases": lambda: _retrieved_cases(question),
+        },
+        deadlines={
+            "record": settings.context_timeout_seconds,
+            "cases": settings.model_stage_timeout_seconds,
+        },
+    )
+    unavailable = "(prior sessions unavailable right now)"
+    prior, last_detail, last_transcript = fetched.get("record", ([], unavailable, unavailable))
 
     session_signals = (
         f"topics so far: {', '.join(active.get('topics') or []) or '—'}\n"
         f"risk flags so far: {', '.join(active.get('risk_flags') or []) or 'none'}"
     )
 
-    prompt = DOCTOR_QA_TEMPLATE.format(
+    return build_prompt(
+        DOCTOR_QA_TEMPLATE, DOCTOR_QA_BUDGET,
         question=question,
         patient_summary=build_patient_summary(profile),
         history_summary=build_history_summary(prior, limit=5),
         last_session_detail=last_detail,
         last_session_transcript=last_transcript,
-        live_transcript=_clip_live(transcript),
+        live_transcript=transcript or "(no turns logged yet)",
         session_signals=session_signals,
-        retrieved_cases=_retrieved_cases(question),
+        retrieved_cases=fetched.get("cases", "(knowledge base unavailable)"),
     )
 
+
+def answer_doctor_query(question: str, active: dict, transcript: str) -> str:
+    """Answer the clinician's question grounded in the patient's data + corpus.
+
+    ``active`` is ``st.session_state['lsa_active']`` =
+    ``{patient_id, session_id, profile(dict), risk_flags, topics}``.
+    """
+    import llm_cache
+
     try:
-        resp = get_chat_groq().invoke([HumanMessage(content=prompt)])
-        text = resp.content if hasattr(resp, "content") else str(resp)
-        return (text or "").strip() or "I couldn't find an answer in the available record."
+        prompt = _build_prompt(question, active, transcript)
+        text = llm_cache.complete(prompt, purpose="doctor_qa")
+        return (text or "").strip() or _NO_ANSWER
     except Exception:
         logger.exception("Doctor query answering failed")
-        return ("The assistant is temporarily unavailable (the language model could not be "
-                "reached). Please try again.")
+        return _UNAVAILABLE
+
+
+def stream_doctor_answer(question: str, active: dict, transcript: str):
+    """Streaming ``answer_doctor_query``: yield the answer in chunks as it is written.
+
+    On a model error the fallback text is yielded instead (or, mid-answer, a
+    note that the answer was cut short).
+    """
+    import llm_cache
+
+    wrote = False
+    try:
+        prompt = _build_prompt(question, active, transcript)
+        for chunk in llm_cache.stream(prompt, purpose="doctor_qa"):
+            if not wrote:
+                chunk = chunk.lstrip()
+            if chunk:
+                wrote = True
+                yield chunk
+    except Exception:
+        logger.exception("Doctor query answering failed")
+        yield "\n\n_(The answer was cut short — the language model stopped responding.)_" if wrote else _UNAVAILABLE
+        return
+    if not wrote:
+        yield _NO_ANSWER
@@ -0,0 +1,152 @@
+"""Prompt-keyed response cache shared by every Groq completion.
+
+Streamlit reruns and clinician retries re-issue byte-identical prompts (advice,
+session suggestions, Ask answers, the end-of-session report). ``complete`` keys
+each call by a hash of the model, its temperature and the exact prompt, and
+serves a stored completion within ``llm_cache_ttl_seconds`` instead of paying
+Groq latency and tokens again. Failed or empty completions are never stored, so
+a retry after an error always reaches the model. ``refresh=True`` (an explicit
+"regenerate") skips the lookup but stores the new completion.
+
+``stream`` is the streaming counterpart. Misses go upstream through
+``llm_gateway`` (rate limiting, 429 retries, coalescing). ``stats()`` reports
+hit rate overall and per caller (``purpose``) and the tokens saved; the API
+exposes it on ``/metrics``.
+"""
+import hashlib
+import logging
+import threading
+
+from config import settings
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_cache = TTLCache(maxsize=settings.llm_cache_max_entries, ttl=settings.llm_cache_ttl_seconds)
+_lock = threading.Lock()
+_by_purpose: dict = {}
+_tokens_saved = 0
+
+
+def _temperature() -> float:
+    """Temperature for cacheable calls (the low-temperature config when set)."""
+    from model_cache import CHAT_TEMPERATURE
+    if settings.llm_cache_temperature is not None:
+        return settings.llm_cache_temperature
+    return CHAT_TEMPERATURE
+
+
+def prompt_key(prompt: str, model: str, temperature: float) -> str:
+    """Cache key for one completion request."""
+    raw = f"{model}\x00{temperature}\x00{prompt}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _key(prompt: str) -> str:
+    from model_cache import chat_model_name
+    return prompt_key(prompt, chat_model_name(), _temperature())
+
+
+def _count(purpose: str, hit: bool, tokens: int = 0) -> None:
+    global _tokens_saved
+    with _lock:
+        counts = _by_purpose.setdefault(purpose, {"hits": 0, "misses": 0})
+        counts["hits" if hit else "misses"] += 1
+        if hit:
+            _tokens_saved += tokens
+
+
+def _total_tokens(response) -> int:
+    usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    try:
+        return int(usage.get("total_tokens") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def lookup(prompt: str, purpose: str = "llm") -> str | None:
+    """Return the cached completion for ``prompt``, or None."""
+    if not settings.llm_cache_enabled:
+        return None
+    entry = _cache.get(_key(prompt))
+    _count(purpose, entry is not None, entry["tokens"] if entry else 0)
+    if entry is not None:
+        logger.debug("LLM cache hit (%s).", purpose)
+        return entry["text"]
+    return None
+
+
+def store(prompt: str, text: str, tokens: int = 0) -> None:
+    """Remember a completion for ``prompt`` (empty text is not stored)."""
+    if settings.llm_cache_enabled and (text or "").strip():
+        _cache.set(_key(prompt), {"text": text, "tokens": tokens})
+
+
+def chat_model():
+    """The chat model cacheable calls go to (per ``settings.llm_backend``)."""
+    from model_cache import get_chat_model
+    return get_chat_model(_temperature())
+
+
+def _cached(prompt: str, purpose: str, refresh: bool) -> str | None:
+    if refresh:
+        _count(purpose, False)
+        return None
+    return lookup(prompt, purpose)
+
+
+def complete(prompt: str, purpose: str = "llm", refresh: bool = False) -> str:
+    """Return the model's completion of ``prompt``, from the cache when possible.
+
+    ``refresh`` asks the model again (the new completion replaces the cached
+    one). Model errors propagate to the caller, which owns the fallback text.
+    """
+    cached = _cached(prompt, purpose, refresh)
+    if cached is not None:
+        return cached
+    import llm_gateway
+    from langchain.schema import HumanMessage
+    response = llm_gateway.invoke(_key(prompt),
+                                  lambda: chat_model().invoke([HumanMessage(content=prompt)]))
+    text = response.content if hasattr(response, "content") else str(response)
+    store(prompt, text, _total_tokens(response))
+    return text
+
+
+def stream(prompt: str, purpose: str = "llm", refresh: bool = False):
+    """Yield the completion of ``prompt`` in chunks as the model produces them.
+
+    A cached completion is yielded whole (unless ``refresh``); a streamed one is
+    stored once it has finished. Model errors propagate to the caller.
+    """
+    cached = _cached(prompt, purpose, refresh)
+    if cached is not None:
+        yield cached
+        return
+    import llm_gateway
+    from langchain.schema import HumanMessage
+    parts = []
+    for text in llm_gateway.stream(_key(prompt),
+                                   lambda: chat_model().stream([HumanMessage(content=prompt)])):
+        parts.append(text)
+        yield text
+    store(prompt, "".join(parts))
+
+
+def stats() -> dict:
+    """Hit/miss counters overall and per purpose, plus tokens saved."""
+    out = _cache.stats()
+    with _lock:
+        out["by_purpose"] = {k: dict(v) for k, v in _by_purpose.items()}
+        out["tokens_saved"] = _tokens_saved
+    out["enabled"] = settings.llm_cache_enabled
+    return out
+
+
+def clear() -> None:
+    """Drop every cached completion and reset the counters."""
+    global _tokens_saved
+    _cache.clear()
+    with _lock:
+        _by_purpose.clear()
+        _tokens_saved = 0
@@ -0,0 +1,301 @@
+"""Client-side gateway in front of every upstream LLM call.
+
+Concurrent sessions would otherwise call the provider independently and, under
+its rate limits, fail in bursts (the "language model was unreachable"
+fallbacks). ``llm_cache`` sends each upstream call through here, which:
+
+- caps calls in flight (``llm_max_in_flight``) and paces call starts with a
+  token bucket (``llm_rate_per_second``, bursts of ``llm_burst``);
+- retries 429 rate-limit errors with jittered exponential backoff (honouring
+  ``Retry-After``), up to ``llm_max_retries`` times; a stream is only retried
+  before its first chunk;
+- coalesces identical in-flight requests: a duplicate (e.g. a Streamlit rerun)
+  waits for the first one's reply instead of making its own call; duplicate
+  streams replay the same chunks;
+- records how long calls wait for a slot. ``stats()`` is on ``/metrics``.
+"""
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMGatewayBusy(TimeoutError):
+    """No call slot freed up within ``llm_queue_timeout_seconds``."""
+
+
+class TokenBucket:
+    """Paces events to ``rate`` per second with bursts of up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline: float | None = None) -> None:
+        """Take one token, sleeping until one is available (no-op if rate <= 0)."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None and self._clock() + wait > deadline:
+                raise LLMGatewayBusy("LLM rate limit: no call slot within the queue timeout")
+            self._sleep(wait)
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """Whether ``exc`` is a provider 429 (Groq's RateLimitError, the local stand-in's)."""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status == 429
+
+
+def _retry_after(exc: BaseException) -> float | None:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class _SharedStream:
+    """Chunks of one upstream stream, replayable by every caller that joined it."""
+
+    def __init__(self):
+        self._chunks = []
+        self._done = False
+        self._error = None
+        self._cond = threading.Condition()
+
+    def push(self, text: str) -> None:
+        with self._cond:
+            self._chunks.append(text)
+            self._cond.notify_all()
+
+    def finish(self, error: BaseException | None = None) -> None:
+        with self._cond:
+            self._done, self._error = True, error
+            self._cond.notify_all()
+
+    def __iter__(self):
+        i = 0
+        while True:
+            with self._cond:
+                while i >= len(self._chunks) and not self._done:
+                    self._cond.wait()
+                if i < len(self._chunks):
+                    chunk = self._chunks[i]
+                elif self._error is not None:
+                    raise self._error
+                else:
+                    return
+            i += 1
+            yield chunk
+
+
+class LLMGateway:
+    """Concurrency cap + rate limiter + 429 retries + coalescing for upstream calls."""
+
+    def __init__(self, max_in_flight: int | None = None, rate_per_second: float | None = None,
+                 burst: int | None = None, max_retries: int | None = None,
+                 backoff_base: float | None = None, backoff_max: float | None = None,
+                 queue_timeout: float | None = None, clock=time.monotonic, sleep=time.sleep):
+        def pick(value, default):
+            return default if value is None else value
+
+        self.max_in_flight = max(1, pick(max_in_flight, settings.llm_max_in_flight))
+        self.max_retries = pick(max_retries, settings.llm_max_retries)
+        self.backoff_base = pick(backoff_base, settings.llm_backoff_base_seconds)
+        self.backoff_max = pick(backoff_max, settings.llm_backoff_max_seconds)
+        self.queue_timeout = pick(queue_timeout, settings.llm_queue_timeout_seconds)
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._bucket = TokenBucket(pick(rate_per_second, settings.llm_rate_per_second),
+                                   pick(burst, settings.llm_burst), clock=clock, sleep=sleep)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._calls: dict = {}     # key -> Future of an in-flight invoke
+        self._streams: dict = {}   # key -> _SharedStream of an in-flight stream
+        self._waits = deque(maxlen=1000)
+        self._counts = {"calls": 0, "coalesced": 0, "retries": 0, "rate_limited": 0,
+                        "failures": 0, "busy": 0}
+        self._in_flight = 0
+        self._peak_in_flight = 0
+
+    # ------------------------------------------------------------------ slots
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counts[name] += n
+
+    def _acquire(self) -> None:
+        start = self._clock()
+        deadline = start + self.queue_timeout
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self._count("busy")
+            raise LLMGatewayBusy("LLM gateway: no call slot within the queue timeout")
+        try:
+            self._bucket.acquire(deadline)
+        except BaseException:
+            self._slots.release()
+            self._count("busy")
+            raise
+        with self._lock:
+            self._waits.append(self._clock() - start)
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _backoff(self, attempt: int, exc: BaseException) -> None:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        delay = random.uniform(delay / 2, delay)
+        delay = max(delay, min(self.backoff_max, _retry_after(exc) or 0.0))
+        logger.warning("LLM rate-limited (429); retry %d/%d in %.2fs.",
+                       attempt + 1, self.max_retries, delay)
+        self._count("retries")
+        self._sleep(delay)
+
+    def _should_retry(self, exc: BaseException, attempt: int, wrote: bool = False) -> bool:
+        if is_rate_limited(exc):
+            self._count("rate_limited")
+            if not wrote and attempt < self.max_retries:
+                self._backoff(attempt, exc)
+                return True
+        self._count("failures")
+        return False
+
+    # ------------------------------------------------------------------ calls
+    def _call(self, fn):
+        self._count("calls")
+        attempt = 0
+        while True:
+            self._acquire()
+            try:
+                return fn()
+            except Exception as exc:
+                error = exc
+            finally:
+                self._release()
+            if not self._should_retry(error, attempt):
+                raise error
+            attempt += 1
+
+    def _pump(self, key, fn, shared: _SharedStream) -> None:
+        self._count("calls")
+        attempt, wrote = 0, False
+        try:
+            while True:
+                self._acquire()
+                try:
+                    for chunk in fn():
+                        text = getattr(chunk, "content", None)
+                        if text:
+                            shared.push(text)
+                            wrote = True
+                    error = None
+                except Exception as exc:
+                    error = exc
+                finally:
+                    self._release()
+                if error is None:
+                    shared.finish()
+                    return
+                if not self._should_retry(error, attempt, wrote):
+                    shared.finish(error)
+                    return
+                attempt += 1
+        except BaseException as exc:  # e.g. LLMGatewayBusy
+            shared.finish(exc)
+        finally:
+            with self._lock:
+                self._streams.pop(key, None)
+
+    def invoke(self, key: str, fn):
+        """Return ``fn()`` (an upstream call), sharing one call per ``key`` in flight."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self._counts["coalesced"] += 1
+        if not leader:
+            return future.result()
+        try:
+            result = self._call(fn)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stream(self, key: str, fn):
+        """Iterate the text chunks of ``fn()`` (an upstream stream), sharing one
+        stream per ``key`` in flight. The upstream is drained on its own thread,
+        so a caller that stops reading does not stall the others."""
+        with self._lock:
+            shared = self._streams.get(key)
+            if shared is None:
+                shared = self._streams[key] = _SharedStream()
+                threading.Thread(target=self._pump, args=(key, fn, shared),
+                                 name="llm-stream", daemon=True).start()
+            else:
+                self._counts["coalesced"] += 1
+        return iter(shared)
+
+    def stats(self) -> dict:
+        """Call counters, concurrency and queue-wait times (ms, recent calls)."""
+        with self._lock:
+            waits = sorted(self._waits)
+            out = dict(self._counts)
+            out.update(in_flight=self._in_flight, peak_in_flight=self._peak_in_flight,
+                       max_in_flight=self.max_in_flight, rate_per_second=self._bucket.rate)
+        if waits:
+            out["queue_wait_ms_avg"] = round(sum(waits) / len(waits) * 1000, 1)
+            out["queue_wait_ms_p95"] = round(waits[min(len(waits) - 1, int(0.95 * len(waits)))] * 1000, 1)
+            out["queue_wait_ms_max"] = round(waits[-1] * 1000, 1)
+        else:
+            out["queue_wait_ms_avg"] = out["queue_wait_ms_p95"] = out["queue_wait_ms_max"] = 0.0
+        return out
+
+
+_gateway = LLMGateway()
+
+
+def invoke(key: str, fn):
+    """Run an upstream call through the shared gateway (see ``LLMGateway.invoke``)."""
+    return _gateway.invoke(key, fn)
+
+
+def stream(key: str, fn):
+    """Run an upstream stream through the shared gateway (see ``LLMGateway.stream``)."""
+    return _gateway.stream(key, fn)
+
+
+def stats() -> dict:
+    return _gateway.stats()
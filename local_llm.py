@@ -0,0 +1,169 @@
+"""Deterministic local stand-in for the Groq chat model.
+
+Selected with ``LLM_BACKEND=local`` (see ``model_cache.get_chat_model``) so the
+whole pipeline — analysis, decision support, Ask, the report — runs offline for
+load and latency testing. It implements the two calls the app makes,
+``invoke`` and ``stream``, and simulates provider behaviour from ``Settings``:
+
+- time to first token drawn from ``local_llm_latency`` (``fixed``, ``uniform``
+  or ``lognormal``) around ``local_llm_latency_ms``;
+- tokens streamed at ``local_llm_tokens_per_second``;
+- a ``local_llm_failure_rate`` share of calls failing with
+  ``local_llm_failure_status`` (e.g. 429 to exercise rate-limit handling).
+
+Replies are a pure function of the prompt (well-formed for each template, e.g.
+strict JSON for decision support); latency and failures come from a random
+stream seeded by ``local_llm_seed``, so a load test replays identically.
+"""
+import hashlib
+import json
+import logging
+import math
+import random
+import threading
+import time
+from functools import lru_cache
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+LOCAL_MODEL = "local-stand-in"
+# Rough characters per token, for the simulated token usage.
+_CHARS_PER_TOKEN = 4
+
+
+class LocalLLMError(Exception):
+    """A simulated provider failure; ``status_code`` mirrors the HTTP status."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Simulated provider error {status_code}")
+        self.status_code = status_code
+
+
+class LocalMessage:
+    """A reply (or streamed chunk) shaped like a LangChain message."""
+
+    def __init__(self, content: str, response_metadata: dict | None = None):
+        self.content = content
+        self.response_metadata = response_metadata or {}
+
+
+def _prompt_text(messages) -> str:
+    if isinstance(messages, str):
+        return messages
+    return "\n".join(getattr(m, "content", str(m)) for m in messages)
+
+
+def reply_for(prompt: str) -> str:
+    """The stand-in's reply to ``prompt``: deterministic and shaped like the
+    output its template asks for."""
+    digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+    pick = lambda options, i: options[digest[i] % len(options)]  # noqa: E731
+    state = pick(["Anxious and tired", "Low mood, withdrawn", "Calmer than last session",
+                  "Frustrated about work"], 0)
+
+    if "STRICT JSON" in prompt:
+        return json.dumps({
+            "emotional_state": state,
+            "state_confidence": pick(["high", "medium", "low"], 1),
+            "next_questions": ["Consider asking how sleep has been this week",
+                               "Consider asking what support they have at home"],
+            "follow_ups": ["Revisit the work stressor next session"],
+            "missing_info": ["Duration of the current symptoms"],
+            "red_flags": [] if digest[2] % 3 else ["Possible hopelessness - check in directly"],
+            "caveat": "Local stand-in output.",
+        }, indent=2)
+    if "END-OF-SESSION SUMMARY" in prompt:
+        return ("**Presentation & key themes**\n"
+                f"- {state}; sleep and work stress came up repeatedly.\n\n"
+                "**Areas of concern / risk**\n- No risk flags beyond those listed.\n\n"
+                "**Suggested follow-up**\n- Consider reviewing sleep routines next time.\n")
+    if "QUERY ASSISTANT" in prompt:
+        return ("- From the patient record: see the summary above.\n"
+                f"- Earlier in today's session the patient seemed {state.lower()}.\n")
+    if "running summary" in prompt:
+        return (f"- Patient presented as {state.lower()}.\n"
+                "- Clinician explored sleep and work stress.\n")
+    return ("Advice: Acknowledge the patient's feelings and explore one concrete stressor.\n"
+            "Rationale: Similar cases responded well to validation first.\n"
+            "Suggested Actions: 1. Reflect back. 2. Ask about sleep. 3. Agree a small next step.\n")
+
+
+def _tokens(text: str) -> list:
+    """Split a reply into word-sized stream chunks that join back exactly."""
+    parts = text.split(" ")
+    return [p + " " for p in parts[:-1]] + [parts[-1]]
+
+
+class LocalChatModel:
+    """Chat model stand-in with simulated latency, streaming rate and failures."""
+
+    def __init__(self, temperature: float = 0.7, latency: str | None = None,
+                 latency_ms: float | None = None, tokens_per_second: float | None = None,
+                 failure_rate: float | None = None, failure_status: int | None = None,
+                 seed: int | None = None, sleep=time.sleep):
+        self.temperature = temperature
+        self.latency = latency or settings.local_llm_latency
+        self.latency_ms = settings.local_llm_latency_ms if latency_ms is None else latency_ms
+        self.tokens_per_second = (settings.local_llm_tokens_per_second
+                                  if tokens_per_second is None else tokens_per_second)
+        self.failure_rate = settings.local_llm_failure_rate if failure_rate is None else failure_rate
+        self.failure_status = failure_status or settings.local_llm_failure_status
+        self._random = random.Random(settings.local_llm_seed if seed is None else seed)
+        self._lock = threading.Lock()
+        self._sleep = sleep
+        if self.latency not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {self.latency!r}")
+
+    def _first_token_delay(self) -> float:
+        """Seconds to the first token, drawn from the configured distribution."""
+        mean = self.latency_ms / 1000.0
+        with self._lock:
+            if self.latency == "fixed":
+                return mean
+            if self.latency == "uniform":
+                return self._random.uniform(0.5 * mean, 1.5 * mean)
+            # Lognormal with the configured mean: a long right tail like a real provider.
+            sigma = settings.local_llm_latency_sigma
+            return self._random.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma) if mean else 0.0
+
+    def _maybe_fail(self) -> None:
+        with self._lock:
+            failed = self._random.random() < self.failure_rate
+        if failed:
+            raise LocalLLMError(self.failure_status)
+
+    def _usage(self, prompt: str, reply: str) -> dict:
+        prompt_tokens = -(-len(prompt) // _CHARS_PER_TOKEN)
+        completion_tokens = len(_tokens(reply))
+        return {"token_usage": {"prompt_tokens": prompt_tokens,
+                                "completion_tokens": completion_tokens,
+                                "total_tokens": prompt_tokens + completion_tokens},
+                "model_name": LOCAL_MODEL}
+
+    def stream(self, messages):
+        """Yield the reply in word-sized chunks at the configured rate."""
+        prompt = _prompt_text(messages)
+        self._sleep(self._first_token_delay())
+        self._maybe_fail()
+        interval = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        for i, token in enumerate(_tokens(reply_for(prompt))):
+            if i and interval:
+                self._sleep(interval)
+            yield LocalMessage(token)
+
+    def invoke(self, messages) -> LocalMessage:
+        """Return the whole reply after the simulated generation time."""
+        prompt = _prompt_text(messages)
+        reply = "".join(chunk.content for chunk in self.stream(messages))
+        return LocalMessage(reply, self._usage(prompt, reply))
+
+
+@lru_cache(maxsize=4)
+def get_local_chat_model(temperature: float = 0.7) -> LocalChatModel:
+    """Return a cached stand-in (one per temperature, like ``get_chat_groq``)."""
+    logger.info("Using the local LLM stand-in (%s latency, %.0f ms, %.0f tok/s, %.0f%% failures).",
+                settings.local_llm_latency, settings.local_llm_latency_ms,
+                settings.local_llm_tokens_per_second, settings.local_llm_failure_rate * 100)
+    return LocalChatModel(temperature)
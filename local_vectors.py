@@ -0,0 +1,118 @@
+"""Offline stand-in for the embedding model and the Pinecone index.
+
+Selected with ``VECTOR_BACKEND=local`` (see ``model_cache``) so retrieval runs
+without the MiniLM model or a Pinecone account, e.g. for load testing:
+
+- ``HashingEmbeddings`` maps each word to one of ``dim`` signed buckets and
+  L2-normalises the counts: deterministic, instant, and good enough to rank
+  texts that share words;
+- ``LocalIndex`` offers the ``upsert`` / ``query`` / ``delete`` calls the app
+  makes, scoring by cosine similarity over an inverted index of the (sparse)
+  vectors, so a query costs in proportion to the vectors sharing its buckets.
+
+The index lives in process memory: a process that queries it must upsert the
+corpus first (``benchmark.py`` does so from the ``corpus`` collection).
+"""
+import hashlib
+import heapq
+import math
+import re
+import threading
+from functools import lru_cache
+
+# Same width as all-MiniLM-L6-v2, so vectors are interchangeable in shape.
+DIMENSIONS = 384
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+class HashingEmbeddings:
+    """Embedding model with the ``embed_query`` / ``embed_documents`` interface."""
+
+    def __init__(self, dim: int = DIMENSIONS):
+        self.dim = dim
+
+    def embed_query(self, text: str) -> list:
+        vector = [0.0] * self.dim
+        for word in _WORD.findall((text or "").lower()):
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(x * x for x in vector))
+        return [x / norm for x in vector] if norm else vector
+
+    def embed_documents(self, texts) -> list:
+        return [self.embed_query(text) for text in texts]
+
+
+class LocalIndex:
+    """In-memory vector index with the subset of the Pinecone ``Index`` API the app uses."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._namespaces: dict = {}
+
+    def _space(self, namespace: str) -> dict:
+        return self._namespaces.setdefault(namespace, {"vectors": {}, "postings": {}})
+
+    def upsert(self, vectors, namespace: str = "") -> dict:
+        with self._lock:
+            space = self._space(namespace)
+            for item in vectors:
+                vid = item["id"]
+                self._remove(space, vid)
+                sparse = {i: v for i, v in enumerate(item["values"]) if v}
+                space["vectors"][vid] = (sparse, dict(item.get("metadata") or {}))
+                for i, v in sparse.items():
+                    space["postings"].setdefault(i, {})[vid] = v
+        return {"upserted_count": len(vectors)}
+
+    @staticmethod
+    def _remove(space: dict, vid) -> None:
+        old = space["vectors"].pop(vid, None)
+        if old:
+            for i in old[0]:
+                space["postings"][i].pop(vid, None)
+
+    def query(self, vector, top_k: int = 10, namespace: str = "",
+              include_metadata: bool = False, **kw) -> dict:
+        scores: dict = {}
+        with self._lock:
+            space = self._space(namespace)
+            for i, q in enumerate(vector):
+                if not q:
+                    continue
+                for vid, v in space["postings"].get(i, {}).items():
+                    scores[vid] = scores.get(vid, 0.0) + q * v
+            best = heapq.nlargest(top_k, scores.items(), key=lambda kv: kv[1])
+            matches = [{"id": vid, "score": score,
+                        **({"metadata": space["vectors"][vid][1]} if include_metadata else {})}
+                       for vid, score in best]
+        return {"matches": matches, "namespace": namespace}
+
+    def delete(self, ids=None, delete_all: bool = False, namespace: str = "") -> dict:
+        with self._lock:
+            if delete_all:
+                self._namespaces.pop(namespace, None)
+            else:
+                space = self._space(namespace)
+                for vid in ids or []:
+                    self._remove(space, vid)
+        return {}
+
+    def describe_index_stats(self) -> dict:
+        with self._lock:
+            namespaces = {name: {"vector_count": len(space["vectors"])}
+                          for name, space in self._namespaces.items()}
+        return {"dimension": DIMENSIONS, "namespaces": namespaces,
+                "total_vector_count": sum(n["vector_count"] for n in namespaces.values())}
+
+
+@lru_cache(maxsize=1)
+def get_local_embeddings() -> HashingEmbeddings:
+    return HashingEmbeddings()
+
+
+@lru_cache(maxsize=1)
+def get_local_index() -> LocalIndex:
+    return LocalIndex()
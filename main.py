@@ -3,6 +3,7 @@ setup_logging()
 
 import logging
 from unified_guidance import generate_counselor_guidance
+from rolling_summary import RollingSummary
 
 logger = logging.getLogger(__name__)
 
@@ -10,7 +11,9 @@ def unified_chat_mode():
     logger.info("Starting Unified Guidance Chat Mode (multi-turn conversation)")
     print("Unified Guidance Chat Mode (multi-turn conversation):")
     print("Type 'exit' to end the session.\n")
-    conversation_history = ""
+    # Older exchanges are folded into a rolling summary; recent ones stay verbatim.
+    summary = RollingSummary()
+    turns = []
     patient_profile = {}
     while True:
         user_input = input("Counselor: ").strip()
@@ -18,7 +21,7 @@ def unified_chat_mode():
             logger.info("Exiting chat mode")
             break
         
-        guidance = generate_counselor_guidance(user_input, patient_profile, conversation_history)
+        guidance = generate_counselor_guidance(user_input, patient_profile, summary.context(turns))
         
         print("\n--- Generated Advice ---")
         print(guidance.get("generated_advice", "No advice generated."))
@@ -46,7 +49,8 @@ def unified_chat_mode():
         else:
             print("No historical examples found.")
         
-        conversation_history += "\nCounselor: " + user_input + "\nAdvice: " + guidance.get("generated_advice", "") + "\n"
+        turns.append("Counselor: " + user_input)
+        turns.append("Advice: " + guidance.get("generated_advice", ""))
         print("\n-------------------------------------------\n")
         
 def main():
@@ -1,7 +1,13 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
+from datetime import datetime
 from typing import Optional, List, Dict, Any
 from unified_guidance import generate_counselor_guidance
+from db import pool_stats
+import analysis_memo
+import llm_cache
+import llm_gateway
+import population_analytics
 from logging_config import setup_logging
 import logging
 
@@ -61,3 +67,63 @@ def get_guidance(request: GuidanceRequest):
 @app.get("/health")
 def health_check():
     return {"status": "OK"}
+
+
+@app.get("/metrics")
+def metrics():
+    """Runtime metrics for tuning under concurrent sessions."""
+    return {"mongo_pool": pool_stats(), "llm_cache": llm_cache.stats(),
+            "llm_gateway": llm_gateway.stats(), "analysis_memo": analysis_memo.stats(),
+            "analytics": population_analytics.stats()}
+
+
+# Population analytics: read from the materialized session rollups. ``days`` is
+# the window length ending on ``end`` (default today); ``cohort`` is an intake
+# month ("YYYY-MM").
+def _analytics(query, days: int, end: Optional[datetime], cohort: Optional[str]):
+    if days < 1 or days > 3660:
+        raise HTTPException(status_code=422, detail="days must be between 1 and 3660")
+    population_analytics.ensure_fresh()
+    try:
+        return query(days=days, end=end, cohort=cohort)
+    except Exception:
+        logger.exception("Population analytics query failed")
+        raise HTTPException(status_code=503, detail="Analytics are unavailable right now.")
+
+
+@app.get("/analytics/topics")
+def analytics_topics(days: int = 30, end: Optional[datetime] = None, cohort: Optional[str] = None):
+    """Sessions per detected topic in the window."""
+    return _analytics(population_analytics.topic_frequencies, days, end, cohort)
+
+
+@app.get("/analytics/topics/trends")
+def analytics_topic_trends(days: int = 30, end: Optional[datetime] = None,
+                           cohort: Optional[str] = None):
+    """Topics ranked by the change in their share versus the previous window."""
+    return _analytics(population_analytics.topic_trends, days, end, cohort)
+
+
+@app.get("/analytics/risk-flags")
+def analytics_risk_flags(days: int = 30, end: Optional[datetime] = None,
+                         cohort: Optional[str] = None):
+    """Flagged sessions and distinct patients per risk flag, with rates."""
+    return _analytics(population_analytics.risk_flag_rates, days, end, cohort)
+
+
+@app.get("/analytics/sentiment")
+def analytics_sentiment(days: int = 180, end: Optional[datetime] = None,
+                        cohort: Optional[str] = None):
+    """Mean session sentiment per intake cohort, month by month."""
+    return _analytics(population_analytics.sentiment_by_cohort, days, end, cohort)
+
+
+@app.post("/analytics/refresh")
+def analytics_refresh():
+    """Bring the rollups up to date now (incremental; ``--full`` rebuilds offline)."""
+    try:
+        days = population_analytics.refresh()
+    except Exception:
+        logger.exception("Population analytics refresh failed")
+        raise HTTPException(status_code=503, detail="Analytics refresh failed.")
+    return {"refreshed_days": days}
@@ -1,18 +1,15 @@
-import pymongo
 import pandas as pd
 import logging
 from sklearn.pipeline import make_pipeline
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import train_test_split
-from config import settings
-from db import CORPUS_COLLECTION
+from db import get_db, CORPUS_COLLECTION
 
 logger = logging.getLogger(__name__)
 
 def load_data_from_mongodb():
-    client = pymongo.MongoClient(settings.safe_mongo_uri)
-    db = client.get_database("MentalHealthDB")
+    db = get_db(secondary_ok=True)
     collection = db[CORPUS_COLLECTION]
     data = list(collection.find({}))
     logger.info("Loaded %d documents from MongoDB", len(data))
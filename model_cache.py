@@ -5,22 +5,58 @@ from config import settings
 
 @lru_cache(maxsize=1)
 def get_embedding_model():
-    """Return a cached embedding model instance."""
+    """Return a cached embedding model instance (``settings.vector_backend``)."""
+    if settings.vector_backend == "local":
+        from local_vectors import get_local_embeddings
+        return get_local_embeddings()
     return HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
 
-@lru_cache(maxsize=1)
-def get_chat_groq():
-    """Return a cached ChatGroq instance."""
+CHAT_MODEL = "llama-3.3-70b-versatile"
+CHAT_TEMPERATURE = 0.7
+
+
+@lru_cache(maxsize=4)
+def get_chat_groq(temperature: float = CHAT_TEMPERATURE):
+    """Return a cached ChatGroq instance (one per temperature)."""
     return ChatGroq(
-        temperature=0.7,
-        model_name="llama-3.3-70b-versatile",
+        temperature=temperature,
+        model_name=CHAT_MODEL,
         groq_api_key=settings.groq_api_key,
     )
 
 
+def get_chat_model(temperature: float = CHAT_TEMPERATURE):
+    """Return the chat model for ``settings.llm_backend``.
+
+    ``"groq"`` is the hosted model; ``"local"`` is the deterministic offline
+    stand-in (local_llm.py) for load and latency testing. Both offer
+    ``invoke`` and ``stream``.
+    """
+    if settings.llm_backend == "groq":
+        return get_chat_groq(temperature)
+    if settings.llm_backend == "local":
+        from local_llm import get_local_chat_model
+        return get_local_chat_model(temperature)
+    raise ValueError(f"Unknown LLM backend: {settings.llm_backend!r}")
+
+
+def chat_model_name() -> str:
+    """Name of the model behind ``get_chat_model`` (part of the LLM cache key)."""
+    if settings.llm_backend == "local":
+        from local_llm import LOCAL_MODEL
+        return LOCAL_MODEL
+    return CHAT_MODEL
+
+
 @lru_cache(maxsize=1)
 def get_pinecone_index():
-    """Return a cached Pinecone index handle (reused across messages)."""
+    """Return a cached Pinecone index handle (reused across messages).
+
+    With ``vector_backend="local"`` this is the in-process ``LocalIndex``.
+    """
+    if settings.vector_backend == "local":
+        from local_vectors import get_local_index
+        return get_local_index()
     from pinecone import Pinecone
     pc = Pinecone(api_key=settings.pinecone_api_key)
     return pc.Index(settings.pinecone_index_name)
@@ -0,0 +1,140 @@
+"""Session-scoped patient context shared by the live-session features.
+
+Within one live session the same patient data is read over and over: the
+overview on every rerun, Ask on every question, the history summary for
+decision support and the end-of-session report. ``get_patient_context`` loads
+it once — the profile and the materialized history summary (one read of the
+patient document), plus the last prior transcript on first use — and hands the
+same object to every caller.
+
+Contexts are keyed by ``(patient_id, live session_id)`` and dropped only when
+the archiver writes something that changes a patient's *prior* history (see
+``invalidate_patient_context``); the live session's own per-turn archival
+leaves them intact.
+"""
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Prior sessions kept for the timeline / prompt summaries (newest first).
+HISTORY_LIMIT = 8
+# Messages kept from the last prior session's transcript.
+MAX_PRIOR_MSGS = 30
+# Upper bound on cached contexts per process (least recently used evicted).
+_MAX_CONTEXTS = 256
+
+_lock = threading.Lock()
+_contexts: "OrderedDict[tuple, PatientContext]" = OrderedDict()
+
+
+class PatientContext:
+    """A patient's record and prior history, as seen from one live session."""
+
+    def __init__(self, patient_id, session_id, profile, prior_sessions, session_count):
+        self.patient_id = patient_id
+        self.session_id = session_id
+        self.profile = profile or {}
+        self.prior_sessions = prior_sessions or []
+        self.session_count = session_count
+        self._last_transcript = None
+        self._transcript_loaded = False
+        self._last_log = None
+
+    @property
+    def last_session(self):
+        """The most recent prior session's timeline item, or None."""
+        return self.prior_sessions[0] if self.prior_sessions else None
+
+    def last_session_log(self):
+        """The most recent prior session log, with its clinician notes.
+
+        The timeline items leave out ``doctor_notes``; the full summary fields
+        of the last session are read on first use and kept.
+        """
+        if self._last_log is None and self.last_session:
+            from patient_profile import get_patient_sessions, SESSION_SUMMARY_FIELDS
+            logs = get_patient_sessions(self.patient_id, fields=SESSION_SUMMARY_FIELDS,
+                                        limit=1, exclude_session_id=self.session_id)
+            self._last_log = logs[0] if logs else self.last_session
+        return self._last_log
+
+    def last_transcript(self):
+        """Messages of the last prior session (last ``MAX_PRIOR_MSGS``).
+
+        Loaded on first use and kept; returns None when there is no prior
+        session or its conversation was never archived. A failed load raises
+        and is retried on the next call.
+        """
+        if not self._transcript_loaded:
+            last = self.last_session
+            messages = None
+            if last:
+                from patient_profile import get_conversation
+                conv = get_conversation(last.get("session_id"), max_messages=MAX_PRIOR_MSGS)
+                if conv and conv.get("patient_id") in (None, "", self.patient_id):
+                    messages = conv.get("messages") or []
+            self._last_transcript = messages
+            self._transcript_loaded = True
+        return self._last_transcript
+
+
+def _load(patient_id, session_id, profile, summary):
+    from patient_profile import get_patient_record
+    from patient_summary import summary_view
+    if profile is None or summary is None:
+        # One read of the patient document: profile + materialized summary.
+        record, loaded_summary = get_patient_record(patient_id)
+        if profile is None:
+            profile = record.dict() if record else {}
+        if summary is None:
+            summary = loaded_summary
+    view = summary_view(summary, exclude_session_id=session_id)
+    return PatientContext(patient_id, session_id, profile,
+                          view["timeline"][:HISTORY_LIMIT], view["session_count"])
+
+
+def get_patient_context(patient_id: str, session_id: str | None = None,
+                        profile: dict | None = None, summary: dict | None = None) -> PatientContext:
+    """Return the cached context for this patient's live session, loading it once.
+
+    ``session_id`` is the in-progress session (excluded from the prior
+    history). ``profile`` / ``summary`` may be passed when the caller already
+    read the patient document, to skip the read. Load failures propagate and
+    are not cached.
+    """
+    key = (patient_id, session_id)
+    with _lock:
+        ctx = _contexts.get(key)
+        if ctx is not None:
+            _contexts.move_to_end(key)
+            return ctx
+    ctx = _load(patient_id, session_id, profile, summary)
+    with _lock:
+        _contexts[key] = ctx
+        _contexts.move_to_end(key)
+        while len(_contexts) > _MAX_CONTEXTS:
+            _contexts.popitem(last=False)
+    logger.debug("Loaded patient context for %s", patient_id)
+    return ctx
+
+
+def invalidate_patient_context(patient_id: str, session_id: str | None = None) -> None:
+    """Drop cached contexts whose prior history a write to ``session_id`` changes.
+
+    A write to a live session's own ``session_id`` does not touch that
+    session's prior history, so its context is kept; every other context for
+    the patient is dropped. ``session_id=None`` drops them all (e.g. after a
+    profile change).
+    """
+    with _lock:
+        for key in [k for k in _contexts if k[0] == patient_id]:
+            if session_id is None or key[1] != session_id:
+                del _contexts[key]
+
+
+def clear_patient_contexts() -> None:
+    """Drop every cached context."""
+    with _lock:
+        _contexts.clear()
@@ -38,34 +38,47 @@ def _normalize_sentiment_label(raw: str) -> str:
     return "neutral"
 
 
-def analyze_sentiment(text: str):
-    """Classify the sentiment of ``text``.
+def classify_sentiment(text: str):
+    """Classify the sentiment of ``text`` with the transformer model.
 
     Returns a ``(label, score)`` tuple where label is one of
     ``"Positive"``/``"Negative"``/``"Neutral"`` and score is a signed
-    confidence in ``[-1.0, 1.0]`` (0.0 for Neutral). Falls back to the
-    word-count heuristic if the transformer model cannot be loaded or run.
+    confidence in ``[-1.0, 1.0]`` (0.0 for Neutral). Raises if the model
+    cannot be loaded or run.
     """
     if not text or not text.strip():
         return "Neutral", 0.0
+    from chunked_inference import classify_scores
+    classifier = load_sentiment_model()
+    # Long text is scored in overlapping model-length windows, not cut.
+    scores = classify_scores(classifier, text)
+    raw = max(scores, key=scores.get)
+    label = _normalize_sentiment_label(raw)
+    confidence = scores[raw]
+    if label == "positive":
+        return "Positive", confidence
+    if label == "negative":
+        return "Negative", -confidence
+    return "Neutral", 0.0
+
+
+def fallback_sentiment(text: str):
+    """``(label, score)`` from the word-count heuristic."""
+    score = simple_sentiment_analysis(text or "")
+    label = "Positive" if score > 0 else "Negative" if score < 0 else "Neutral"
+    # Clamp to the documented [-1.0, 1.0] contract (the heuristic returns an
+    # unbounded word-count difference).
+    return label, float(max(-1, min(1, score)))
+
+
+def analyze_sentiment(text: str):
+    """``classify_sentiment``, falling back to the word-count heuristic if the
+    transformer model cannot be loaded or run."""
     try:
-        classifier = load_sentiment_model()
-        # Truncate to roughly the model's max sequence length to avoid errors.
-        result = classifier(text[:512])[0]
-        label = _normalize_sentiment_label(result["label"])
-        confidence = float(result["score"])
-        if label == "positive":
-            return "Positive", confidence
-        if label == "negative":
-            return "Negative", -confidence
-        return "Neutral", 0.0
+        return classify_sentiment(text)
     except Exception:
         logger.exception("Sentiment model failed; using word-count fallback.")
-        score = simple_sentiment_analysis(text)
-        label = "Positive" if score > 0 else "Negative" if score < 0 else "Neutral"
-        # Clamp to the documented [-1.0, 1.0] contract (the heuristic returns an
-        # unbounded word-count difference).
-        return label, float(max(-1, min(1, score)))
+        return fallback_sentiment(text)
 
 
 def train_patient_ml_model(patient_id: str):
@@ -74,11 +87,21 @@ def train_patient_ml_model(patient_id: str):
     if not conv:
         logger.warning("No conversation found for patient %s", patient_id)
         return None
-    patient_texts = [msg.get("content", "") for msg in conv.get("messages", []) if msg.get("is_user")]
-    if not patient_texts:
+    import analysis_memo
+    from session_aggregate import SessionAggregate
+    patient_messages = [msg for msg in conv.get("messages", []) if msg.get("is_user")]
+    if not any(msg.get("content") for msg in patient_messages):
         logger.warning("No patient messages found for sentiment analysis for patient %s", patient_id)
         return None
-    full_text = " ".join(patient_texts)
-    sentiment, score = analyze_sentiment(full_text)
-    logger.info("Patient %s sentiment: %s (score: %s)", patient_id, sentiment.lower(), score)
-    return sentiment.lower()
+    # Turns analysed live carry their signals: seed the memo with them, so
+    # only the rest reach the model.
+    aggregate = SessionAggregate()
+    for msg in patient_messages:
+        if not msg.get("content"):
+            continue
+        analysis_memo.remember_message(msg)
+        aggregate.add_turn(sentiment_score=analysis_memo.analyze_sentiment(msg["content"])[1])
+    sentiment = aggregate.sentiment_label.lower()
+    logger.info("Patient %s sentiment: %s (score: %s)", patient_id, sentiment,
+                round(aggregate.sentiment_mean, 4))
+    return sentiment
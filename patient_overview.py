@@ -57,8 +57,8 @@ def build_history_summary(sessions, limit=5):
 def render_patient_overview(patient_id, profile=None, exclude_session_id=None):
     """Left-column patient context: overview card + session-history timeline.
 
-    Reads the profile (passed in to avoid a re-fetch) and the patient's prior
-    session logs. ``exclude_session_id`` drops the in-progress session so the
+    Reads the session's shared ``PatientContext`` (loaded once, not on every
+    rerun). ``exclude_session_id`` is the in-progress session, dropped so the
     counts/timeline reflect *prior* context.
     """
     import streamlit as st
@@ -69,12 +69,11 @@ def render_patient_overview(patient_id, profile=None, exclude_session_id=None):
     therapy_goals = profile.get("therapy_goals") or []
 
     try:
-        from patient_profile import get_patient_sessions
-        sessions = get_patient_sessions(patient_id)
+        from patient_context import get_patient_context
+        ctx = get_patient_context(patient_id, exclude_session_id, profile=profile)
+        sessions, session_count = ctx.prior_sessions, ctx.session_count
     except Exception:
-        sessions = []
-    if exclude_session_id:
-        sessions = [s for s in sessions if s.get("session_id") != exclude_session_id]
+        sessions, session_count = [], 0
 
     last = sessions[0] if sessions else None
     subtitle = "returning patient" if sessions else "new patient"
@@ -85,13 +84,13 @@ def render_patient_overview(patient_id, profile=None, exclude_session_id=None):
         last_seen = "first session"
 
     st.markdown(
-        ui.patient_overview_card(patient_id, subtitle, len(sessions),
+        ui.patient_overview_card(patient_id, subtitle, session_count,
                                  medical_history, therapy_goals, last_seen),
         unsafe_allow_html=True,
     )
 
     items = []
-    for s in sessions[:8]:
+    for s in sessions:
         flags = s.get("risk_flags") or []
         items.append({
             "date": _fmt_date(s.get("created_at")),
@@ -3,8 +3,6 @@ import json
 import logging
 from config import settings
 from db import get_db
-from pinecone import Pinecone, ServerlessSpec
-from model_cache import get_embedding_model
 from schemas import PatientProfile
 
 logger = logging.getLogger(__name__)
@@ -16,53 +14,182 @@ def get_patient_conversation(patient_id: str):
     return conv
 
 
-def get_patient_sessions(patient_id: str):
-    """Return the patient's past session logs (raw dicts), most recent first."""
-    cursor = get_db()["sessions"].find({"patient_id": patient_id}).sort("created_at", -1)
-    return list(cursor)
+# The session-log fields the history views (overview card, timeline, prompt
+# summaries) read. Leaves out the per-turn ``suggestions`` audit trail, which
+# grows with every turn of every session.
+SESSION_SUMMARY_FIELDS = (
+    "session_id", "created_at", "detected_topics", "risk_flags",
+    "sentiment_score", "doctor_notes",
+)
 
+# Conversation fields without the (potentially long) ``messages`` transcript.
+CONVERSATION_META_FIELDS = ("session_id", "patient_id", "created_at", "updated_at")
 
-def get_patient_conversations(patient_id: str):
-    """Return the patient's archived conversations (raw dicts), most recent first."""
-    cursor = get_db()["PatientConvo"].find({"patient_id": patient_id}).sort("created_at", -1)
-    return list(cursor)
+# Newest first; session_id breaks ties so keyset pages never skip or repeat.
+_HISTORY_SORT = [("created_at", -1), ("session_id", -1)]
 
 
-def get_patient_profile(patient_id: str) -> PatientProfile | None:
-    db = get_db()
-    collection = db["patients"]
-    data = collection.find_one({"patient_id": patient_id})
-    if not data:
+def _projection(fields):
+    """Mongo projection for ``fields`` (None -> whole document).
+
+    The sort keys are always included so a page's last item can seed the next
+    page's ``after`` cursor.
+    """
+    if fields is None:
         return None
+    projection = {f: 1 for f in fields}
+    projection.update({"_id": 0, "created_at": 1, "session_id": 1})
+    return projection
 
-    medical_history = data.get("medical_history", [])
-    therapy_goals = data.get("therapy_goals", [])
 
-    if isinstance(medical_history, str):
-        try:
-            medical_history = json.loads(medical_history)
-        except json.JSONDecodeError:
-            medical_history = [medical_history]
-    if isinstance(therapy_goals, str):
+def _history_query(patient_id: str, after=None, exclude_session_id=None) -> dict:
+    """Filter for one page of a patient's history, newest first.
+
+    ``after`` is the last item of the previous page; the next page continues
+    strictly below its ``(created_at, session_id)`` position.
+    """
+    query = {"patient_id": patient_id}
+    if exclude_session_id:
+        query["session_id"] = {"$ne": exclude_session_id}
+    if after:
+        created, sid = after.get("created_at"), after.get("session_id")
+        query["$or"] = [
+            {"created_at": {"$lt": created}},
+            {"created_at": created, "session_id": {"$lt": sid}},
+        ]
+    return query
+
+
+def _history_page(collection: str, patient_id: str, fields, limit, after, exclude_session_id):
+    cursor = get_db(secondary_ok=True)[collection].find(
+        _history_query(patient_id, after, exclude_session_id), _projection(fields)
+    ).sort(_HISTORY_SORT)
+    if limit:
+        cursor = cursor.limit(limit)
+    return list(cursor)
+
+
+def get_patient_sessions(patient_id: str, fields=None, limit: int = 0, after=None,
+                         exclude_session_id: str | None = None):
+    """Return the patient's past session logs (raw dicts), most recent first.
+
+    ``fields`` projects each log down to the named fields (e.g.
+    ``SESSION_SUMMARY_FIELDS``), ``limit`` caps the page size and ``after`` —
+    the last item of the previous page — continues the listing from there.
+    Pages are served from the ``(patient_id, created_at)`` index, so their cost
+    does not grow with the length of the patient's history.
+    """
+    return _history_page("sessions", patient_id, fields, limit, after, exclude_session_id)
+
+
+def get_patient_conversations(patient_id: str, fields=None, limit: int = 0, after=None,
+                              exclude_session_id: str | None = None):
+    """Return the patient's archived conversations (raw dicts), most recent first.
+
+    Takes the same ``fields`` / ``limit`` / ``after`` paging arguments as
+    ``get_patient_sessions``; pass ``CONVERSATION_META_FIELDS`` to list
+    conversations without their transcripts.
+    """
+    return _history_page("PatientConvo", patient_id, fields, limit, after, exclude_session_id)
+
+
+def count_patient_sessions(patient_id: str, exclude_session_id: str | None = None) -> int:
+    """Number of session logs on record for the patient (index-only count)."""
+    return get_db(secondary_ok=True)["sessions"].count_documents(
+        _history_query(patient_id, exclude_session_id=exclude_session_id)
+    )
+
+
+def get_recent_patients(limit: int = 6):
+    """The most recently seen patients with their latest session, newest first.
+
+    Returns ``[{"patient_id", "last": timeline item | None}]``, read from the
+    materialized patient summaries in one indexed query (``summary.last_seen``)
+    however many patients are listed. Patients with no sessions yet only pad
+    the list when fewer than ``limit`` have been seen.
+    """
+    projection = {"_id": 0, "patient_id": 1, "summary.timeline": {"$slice": 1}}
+    collection = get_db(secondary_ok=True)["patients"]
+    docs = list(collection.find({"summary.last_seen": {"$ne": None}}, projection)
+                .sort("summary.last_seen", -1).limit(limit))
+    if len(docs) < limit:
+        docs += list(collection.find({"summary.last_seen": None}, projection)
+                     .limit(limit - len(docs)))
+    out = []
+    for d in docs:
+        timeline = (d.get("summary") or {}).get("timeline") or []
+        out.append({"patient_id": d.get("patient_id"), "last": timeline[0] if timeline else None})
+    return out
+
+
+def get_conversation(session_id: str, max_messages: int | None = None):
+    """Return one archived conversation by ``session_id`` (or None).
+
+    ``max_messages`` keeps only the last N messages, sliced server-side so a
+    long transcript is never shipped in full.
+    """
+    projection = None
+    if max_messages:
+        projection = {"messages": {"$slice": -max_messages}}
+    return get_db(secondary_ok=True)["PatientConvo"].find_one({"session_id": session_id}, projection)
+
+
+def _normalize_list_field(value):
+    if isinstance(value, str):
         try:
-            therapy_goals = json.loads(therapy_goals)
+            value = json.loads(value)
         except json.JSONDecodeError:
-            therapy_goals = [therapy_goals]
+            value = [value]
+    return value if isinstance(value, list) else [value]
 
-    data["medical_history"] = medical_history if isinstance(medical_history, list) else [medical_history]
-    data["therapy_goals"] = therapy_goals if isinstance(therapy_goals, list) else [therapy_goals]
 
-    collection.update_one(
-        {"patient_id": patient_id},
-        {"$set": {
-            "medical_history": data["medical_history"],
-            "therapy_goals": data["therapy_goals"]
-        }}
-    )
+def _load_patient_doc(patient_id: str, projection=None):
+    """Read a patient document, normalizing legacy string-encoded list fields.
+
+    The normalized fields are written back only when they actually changed,
+    so a routine read stays a read.
+    """
+    collection = get_db()["patients"]
+    data = collection.find_one({"patient_id": patient_id}, projection)
+    if not data:
+        return None
 
+    updates = {}
+    for field in ("medical_history", "therapy_goals"):
+        raw = data.get(field, [])
+        normalized = _normalize_list_field(raw)
+        if normalized != raw:
+            updates[field] = normalized
+        data[field] = normalized
+    if updates:
+        collection.update_one({"patient_id": patient_id}, {"$set": updates})
+    return data
+
+
+def get_patient_profile(patient_id: str) -> PatientProfile | None:
+    data = _load_patient_doc(patient_id, {"summary": 0})
+    if not data:
+        return None
     return PatientProfile(**data)
 
 
+def get_patient_record(patient_id: str):
+    """Return ``(PatientProfile, summary)`` for a patient in one read.
+
+    ``summary`` is the materialized history summary kept on the patient
+    document (see ``patient_summary``); it is rebuilt from ``sessions`` when
+    missing. Returns ``(None, None)`` for an unknown patient.
+    """
+    data = _load_patient_doc(patient_id)
+    if not data:
+        return None, None
+    summary = data.get("summary")
+    if summary is None:
+        from patient_summary import rebuild_summary
+        summary = rebuild_summary(get_db(), patient_id)
+    return PatientProfile(**data), summary
+
+
 def create_patient_profile(patient_id: str, medical_history=None, therapy_goals=None) -> PatientProfile:
     db = get_db()
     collection = db["patients"]
@@ -86,6 +213,8 @@ def update_patient_fields(patient_id: str, medical_history=None, therapy_goals=N
         updates["therapy_goals"] = therapy_goals
     if updates:
         db["patients"].update_one({"patient_id": patient_id}, {"$set": updates})
+        from patient_context import invalidate_patient_context
+        invalidate_patient_context(patient_id)
     return get_patient_profile(patient_id)
 
 def update_patient_profile(patient_id: str):
@@ -110,6 +239,9 @@ def update_patient_profile(patient_id: str):
         return
     profile_text = "\n".join(patient_texts)
 
+    from pinecone import Pinecone, ServerlessSpec
+    from model_cache import get_embedding_model
+
     embedding_model = get_embedding_model()
     embedding = embedding_model.embed_query(profile_text)
 
@@ -0,0 +1,240 @@
+"""Materialized per-patient history summary, maintained on archive.
+
+Each ``patients`` document carries a small ``summary`` sub-document:
+
+    session_count     sessions on record
+    first_seen        created_at of the oldest session
+    last_seen         created_at of the newest session
+    sentiment_total   sum of the sessions' sentiment scores
+    sentiment_count   sessions that have a score (mean = total / count)
+    timeline          newest-first session items, capped at TIMELINE_LIMIT —
+                      session_id, created_at, detected_topics, risk_flags,
+                      sentiment_score (the sentiment trend; None when unscored)
+    topic_counts      {topic: number of sessions it was detected in}
+    risk_flag_counts  {flag: number of sessions it was raised in}
+
+``archiver.archive_session`` keeps it current with one atomic update per write
+(``$inc`` for the counters, ``$push`` + ``$sort`` + ``$slice`` for a new
+timeline item, a positional ``$set`` when a session is re-archived), so opening
+a patient is a single small read instead of a scan of their sessions.
+``rebuild_summary`` / ``rebuild_summaries`` recompute it from ``sessions``
+(backfill, bulk seeding, repair); a patient whose summary is missing is rebuilt
+on first read.
+
+    python patient_summary.py --rebuild     # backfill every patient
+"""
+import logging
+from datetime import datetime
+from itertools import groupby
+
+logger = logging.getLogger(__name__)
+
+# Timeline items kept on the summary (the UI shows 8; one spare slot covers the
+# live session, which is archived every turn but excluded from the views).
+TIMELINE_LIMIT = 12
+
+# Session-log fields a summary is computed from.
+SOURCE_FIELDS = ("session_id", "patient_id", "created_at", "detected_topics",
+                 "risk_flags", "sentiment_score")
+
+
+def _key(label) -> str:
+    """A topic/flag label made safe to use as a Mongo field name."""
+    return str(label).replace(".", "_").lstrip("$")
+
+
+def _score(log: dict | None) -> float | None:
+    """A session's sentiment score, or None when it has none."""
+    score = (log or {}).get("sentiment_score")
+    return float(score) if isinstance(score, (int, float)) else None
+
+
+def timeline_item(log: dict) -> dict:
+    """The timeline entry for one session log (same field names as the log)."""
+    return {
+        "session_id": log.get("session_id"),
+        "created_at": log.get("created_at"),
+        "detected_topics": list(log.get("detected_topics") or []),
+        "risk_flags": list(log.get("risk_flags") or []),
+        "sentiment_score": _score(log),
+    }
+
+
+def summarize(sessions) -> dict:
+    """Compute a summary from a patient's session logs, newest first."""
+    sessions = list(sessions)
+    topic_counts, flag_counts = {}, {}
+    total, scored = 0.0, 0
+    for s in sessions:
+        for topic in set(s.get("detected_topics") or []):
+            topic_counts[_key(topic)] = topic_counts.get(_key(topic), 0) + 1
+        for flag in set(s.get("risk_flags") or []):
+            flag_counts[_key(flag)] = flag_counts.get(_key(flag), 0) + 1
+        if _score(s) is not None:
+            total += _score(s)
+            scored += 1
+    summary = {
+        "session_count": len(sessions),
+        "sentiment_total": total,
+        "sentiment_count": scored,
+        "timeline": [timeline_item(s) for s in sessions[:TIMELINE_LIMIT]],
+        "topic_counts": topic_counts,
+        "risk_flag_counts": flag_counts,
+        "updated_at": datetime.now(),
+    }
+    # Left out (not null) when unknown: $min/$max would otherwise keep the null.
+    created = [s["created_at"] for s in sessions if s.get("created_at")]
+    if created:
+        summary["first_seen"] = min(created)
+        summary["last_seen"] = max(created)
+    return summary
+
+
+def _set_deltas(inc: dict, field: str, new, old) -> None:
+    new, old = set(new or []), set(old or [])
+    for label in new - old:
+        inc[f"summary.{field}.{_key(label)}"] = 1
+    for label in old - new:
+        inc[f"summary.{field}.{_key(label)}"] = -1
+
+
+def summary_update(log: dict, previous: dict | None):
+    """The atomic update applying an archived session log to the summary.
+
+    ``previous`` is the session log as it was before this write (None for a new
+    session). Returns ``(update, array_filters)``; re-archiving a session only
+    applies the difference, so repeated per-turn archival never double-counts.
+    """
+    item = timeline_item(log)
+    inc = {}
+    setter = {"summary.updated_at": datetime.now()}
+    update = {}
+    array_filters = None
+    if previous is None:
+        inc["summary.session_count"] = 1
+        if item["sentiment_score"] is not None:
+            inc["summary.sentiment_total"] = item["sentiment_score"]
+            inc["summary.sentiment_count"] = 1
+        _set_deltas(inc, "topic_counts", item["detected_topics"], None)
+        _set_deltas(inc, "risk_flag_counts", item["risk_flags"], None)
+        update["$push"] = {"summary.timeline": {
+            "$each": [item], "$sort": {"created_at": -1}, "$slice": TIMELINE_LIMIT,
+        }}
+    else:
+        new, old = item["sentiment_score"], _score(previous)
+        if (new or 0.0) != (old or 0.0):
+            inc["summary.sentiment_total"] = (new or 0.0) - (old or 0.0)
+        if (new is None) != (old is None):
+            inc["summary.sentiment_count"] = 1 if old is None else -1
+        _set_deltas(inc, "topic_counts", item["detected_topics"], previous.get("detected_topics"))
+        _set_deltas(inc, "risk_flag_counts", item["risk_flags"], previous.get("risk_flags"))
+        setter["summary.timeline.$[t]"] = item
+        array_filters = [{"t.session_id": item["session_id"]}]
+    if item["created_at"]:
+        update["$min"] = {"summary.first_seen": item["created_at"]}
+        update["$max"] = {"summary.last_seen": item["created_at"]}
+    if inc:
+        update["$inc"] = inc
+    update["$set"] = setter
+    return update, array_filters
+
+
+def apply_archived_session(db, log: dict, previous: dict | None) -> None:
+    """Fold one archived session log into the patient's summary.
+
+    A patient without a summary yet (legacy data) is rebuilt from ``sessions``
+    instead, which already includes this write.
+    """
+    update, array_filters = summary_update(log, previous)
+    res = db["patients"].update_one(
+        {"patient_id": log.get("patient_id"), "summary": {"$exists": True}},
+        update, array_filters=array_filters,
+    )
+    if res.matched_count == 0:
+        rebuild_summary(db, log.get("patient_id"))
+
+
+def rebuild_summary(db, patient_id: str) -> dict:
+    """Recompute one patient's summary from their session logs and store it."""
+    projection = {f: 1 for f in SOURCE_FIELDS}
+    projection["_id"] = 0
+    sessions = db["sessions"].find({"patient_id": patient_id}, projection).sort(
+        [("created_at", -1), ("session_id", -1)]
+    )
+    summary = summarize(sessions)
+    db["patients"].update_one({"patient_id": patient_id}, {"$set": {"summary": summary}})
+    return summary
+
+
+def rebuild_summaries(db, batch_size: int = 1000) -> int:
+    """Recompute every patient's summary in one pass over ``sessions``.
+
+    Streams the sessions in index order (patient, newest first) and writes the
+    summaries with unordered bulk updates, so memory stays bounded by one
+    patient's history plus one batch. Returns the number of patients written.
+    """
+    from pymongo import UpdateOne
+
+    projection = {f: 1 for f in SOURCE_FIELDS}
+    projection["_id"] = 0
+    cursor = db["sessions"].find({}, projection, batch_size=batch_size).sort(
+        [("patient_id", 1), ("created_at", -1), ("session_id", -1)]
+    )
+    ops, written = [], 0
+    for patient_id, group in groupby(cursor, key=lambda s: s.get("patient_id")):
+        if not patient_id:
+            continue
+        ops.append(UpdateOne({"patient_id": patient_id}, {"$set": {"summary": summarize(group)}}))
+        if len(ops) >= batch_size:
+            db["patients"].bulk_write(ops, ordered=False)
+            written += len(ops)
+            ops = []
+    if ops:
+        db["patients"].bulk_write(ops, ordered=False)
+        written += len(ops)
+    logger.info("Rebuilt %d patient summaries.", written)
+    return written
+
+
+def summary_view(summary: dict | None, exclude_session_id: str | None = None) -> dict:
+    """What the history views read from a summary, minus the live session.
+
+    Returns ``session_count``, the newest-first ``timeline``, the ``last``
+    prior session (or None), ``topic_counts``, ``risk_flag_counts`` and the
+    mean sentiment over the prior sessions that have a score (None without any).
+    """
+    summary = summary or {}
+    timeline = list(summary.get("timeline") or [])
+    count = int(summary.get("session_count") or 0)
+    total = float(summary.get("sentiment_total") or 0.0)
+    # Summaries written before sentiment_count existed scored every session.
+    scored = int(summary.get("sentiment_count", count) or 0)
+    if exclude_session_id:
+        kept = [t for t in timeline if t.get("session_id") != exclude_session_id]
+        count -= len(timeline) - len(kept)
+        for t in timeline:
+            if t.get("session_id") == exclude_session_id and _score(t) is not None:
+                total -= _score(t)
+                scored -= 1
+        timeline = kept
+    return {
+        "session_count": max(count, 0),
+        "timeline": timeline,
+        "last": timeline[0] if timeline else None,
+        "topic_counts": dict(summary.get("topic_counts") or {}),
+        "risk_flag_counts": dict(summary.get("risk_flag_counts") or {}),
+        "sentiment_mean": total / scored if scored > 0 else None,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    from db import get_db
+
+    ap = argparse.ArgumentParser(description="Backfill the materialized patient summaries.")
+    ap.add_argument("--rebuild", action="store_true", help="recompute every patient's summary")
+    args = ap.parse_args()
+    if args.rebuild:
+        print(f"rebuilt {rebuild_summaries(get_db())} patient summaries")
+    else:
+        print("Pass --rebuild to recompute every patient's summary from `sessions`.")
@@ -0,0 +1,413 @@
+"""Cross-patient analytics over ``sessions``: topics, risk flags, sentiment.
+
+Questions such as "how many patients had a suicide_risk flag this month" or
+"which topics are trending up" are answered from a materialized rollup,
+``session_rollups``, rather than by scanning ``sessions``. One aggregation
+pipeline groups the session logs by day, cohort and label and ``$merge``s
+the result:
+
+    _id        {day, cohort, kind, label}
+    kind       "all" (every session; label None), "topic" or "flag"
+    sessions   number of sessions
+    patients   distinct patient_ids (counted across days at query time)
+    sentiment_sum / sentiment_count   over the sessions that have a sentiment score
+
+``day`` is the day the session started (``aggregate.started_at``; for a session
+logged without one, the day of its ``created_at``). ``cohort`` is the month of
+the patient's first session (``patients.summary.first_seen``), so sentiment can
+be followed per intake cohort.
+
+``refresh()`` is incremental. A session's ``created_at`` is its last archive, so
+the sessions archived since the last rolled-up day are the ones that changed;
+the days recomputed are each such session's day and the day it was last rolled
+into (``session_rollup_days``, so a session whose day moved leaves no stale
+count behind). ``refresh(full=True)`` rebuilds from scratch after bulk loads
+such as seeding.
+
+Distinct patients cannot be summed across days, so each refresh also stores
+them for the windows of ``analytics_windows`` days ending today, per cohort and
+label, in ``session_rollup_windows``: a query over such a window reads a few
+rows there. Other windows count them from the per-day ``patients`` sets, which
+costs in proportion to the patients in the window.
+
+Queries read only the rollups through the ``(kind, day)`` index and are cached
+for ``analytics_cache_ttl_seconds``; the API triggers a background refresh
+when the rollups are older than ``analytics_refresh_seconds``.
+
+    python population_analytics.py --refresh [--full]
+"""
+import argparse
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from config import settings
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COLLECTION = "session_rollups"
+# session_id -> the day the session was last rolled into.
+ROLLED_DAYS_COLLECTION = "session_rollup_days"
+# Distinct patients per (window, cohort, kind, label) for the standard windows.
+WINDOW_COLLECTION = "session_rollup_windows"
+# Kinds whose queries report distinct patients.
+_PATIENT_KINDS = ["all", "flag"]
+
+# The day a session is rolled up under.
+_DAY = {"$dateTrunc": {"date": {"$ifNull": ["$aggregate.started_at", "$created_at"]},
+                       "unit": "day"}}
+
+_cache = TTLCache(maxsize=256, ttl=settings.analytics_cache_ttl_seconds)
+_lock = threading.Lock()
+# Held for a whole refresh: clearing days and $merge-ing them back is not
+# atomic, so the API, the background refresh and seeding take turns.
+_refresh_lock = threading.Lock()
+_last_refresh = 0.0   # time.monotonic() of the last refresh in this process
+_refreshing = None    # Future of an in-flight background refresh
+
+
+def _db(secondary_ok: bool = True):
+    from db import get_db
+    return get_db(secondary_ok=secondary_ok)
+
+
+def window(days: int, end: datetime | None = None) -> tuple[datetime, datetime]:
+    """``[start, end)`` covering the ``days`` days up to and including ``end``'s day
+    (default: today)."""
+    end_day = (end or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    end = end_day + timedelta(days=1)
+    return end - timedelta(days=max(1, days)), end
+
+
+# ---------------------------------------------------------------------- refresh
+def _sessions_on(days: list | None) -> list:
+    """``$match`` for the sessions rolled up under ``days`` (None: every session)."""
+    if days is None:
+        return []
+    # A session's day is never after its last archive, so created_at bounds the scan.
+    return [{"$match": {"created_at": {"$gte": min(days)}, "$expr": {"$in": [_DAY, days]}}}]
+
+
+def rollup_pipeline(days: list | None = None) -> list:
+    """The pipeline that rebuilds the rollups of ``days`` (None: every day)."""
+    pipeline = _sessions_on(days)
+    pipeline += [
+        {"$lookup": {"from": "patients", "localField": "patient_id",
+                     "foreignField": "patient_id", "as": "p",
+                     "pipeline": [{"$project": {"_id": 0, "first_seen": "$summary.first_seen"}}]}},
+        {"$project": {
+            "patient_id": 1,
+            "day": _DAY,
+            "cohort": {"$ifNull": [{"$dateToString": {"format": "%Y-%m",
+                                                      "date": {"$first": "$p.first_seen"}}},
+                                   "unknown"]},
+            "sentiment": "$sentiment_score",
+            "labels": {"$concatArrays": [
+                [{"kind": "all", "label": None}],
+                {"$map": {"input": {"$setUnion": [{"$ifNull": ["$detected_topics", []]}]},
+                          "in": {"kind": "topic", "label": "$$this"}}},
+                {"$map": {"input": {"$setUnion": [{"$ifNull": ["$risk_flags", []]}]},
+                          "in": {"kind": "flag", "label": "$$this"}}},
+            ]},
+        }},
+        {"$unwind": "$labels"},
+        {"$group": {
+            "_id": {"day": "$day", "cohort": "$cohort",
+                    "kind": "$labels.kind", "label": "$labels.label"},
+            "sessions": {"$sum": 1},
+            "patients": {"$addToSet": "$patient_id"},
+            # Sessions without a score are left out of the mean, not read as 0.
+            "sentiment_sum": {"$sum": "$sentiment"},
+            "sentiment_count": {"$sum": {"$cond": [{"$isNumber": "$sentiment"}, 1, 0]}},
+        }},
+        {"$set": {"day": "$_id.day", "cohort": "$_id.cohort",
+                  "kind": "$_id.kind", "label": "$_id.label"}},
+        {"$merge": {"into": ROLLUP_COLLECTION, "on": "_id",
+                    "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+    return pipeline
+
+
+def rolled_days_pipeline(days: list | None = None) -> list:
+    """The pipeline that records the day each session of ``days`` is rolled up under."""
+    return _sessions_on(days) + [
+        {"$project": {"_id": "$session_id", "day": _DAY}},
+        {"$merge": {"into": ROLLED_DAYS_COLLECTION, "on": "_id",
+                    "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+
+
+def window_pipeline(start: datetime, end: datetime) -> list:
+    """The pipeline that stores distinct patients per cohort and label for ``[start, end)``."""
+    days = (end - start).days
+    return [
+        {"$match": {"kind": {"$in": _PATIENT_KINDS}, "day": {"$gte": start, "$lt": end}}},
+        {"$unwind": "$patients"},
+        {"$group": {"_id": {"cohort": "$cohort", "kind": "$kind", "label": "$label",
+                            "patient": "$patients"}}},
+        {"$group": {"_id": {"cohort": "$_id.cohort", "kind": "$_id.kind", "label": "$_id.label"},
+                    "patients": {"$sum": 1}}},
+        {"$project": {"_id": {"end": end, "days": days, "cohort": "$_id.cohort",
+                              "kind": "$_id.kind", "label": "$_id.label"},
+                      "end": end, "days": days, "cohort": "$_id.cohort",
+                      "kind": "$_id.kind", "label": "$_id.label", "patients": 1}},
+        {"$merge": {"into": WINDOW_COLLECTION, "on": "_id",
+                    "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+
+
+def standard_windows() -> list:
+    """Window lengths in days whose patient counts are precomputed."""
+    return sorted({int(d) for d in settings.analytics_windows.split(",") if d.strip()})
+
+
+def _refresh_windows(db) -> None:
+    # Rebuilt whole: a window ending on an earlier day is never asked for again.
+    db[WINDOW_COLLECTION].delete_many({})
+    for days in standard_windows():
+        start, end = window(days)
+        db[ROLLUP_COLLECTION].aggregate(window_pipeline(start, end), allowDiskUse=True)
+
+
+def changed_days(db, since: datetime) -> list:
+    """Days whose rollups the sessions archived since ``since`` change: each
+    session's day now and the day it was last rolled up under."""
+    rows = db["sessions"].aggregate([
+        {"$match": {"created_at": {"$gte": since}}},
+        {"$lookup": {"from": ROLLED_DAYS_COLLECTION, "localField": "session_id",
+                     "foreignField": "_id", "as": "rolled"}},
+        {"$project": {"_id": 0, "days": {"$concatArrays": [[_DAY], "$rolled.day"]}}},
+        {"$unwind": "$days"},
+        {"$group": {"_id": "$days"}},
+    ])
+    return sorted(row["_id"] for row in rows)
+
+
+def refresh(full: bool = False, db=None) -> list | None:
+    """Bring the rollups up to date; returns the days recomputed (None: all).
+
+    One refresh runs at a time in this process; a second caller waits for it.
+    """
+    with _refresh_lock:
+        return _refresh(full, db)
+
+
+def _refresh(full: bool, db) -> list | None:
+    global _last_refresh
+    db = db if db is not None else _db(secondary_ok=False)
+    rollups = db[ROLLUP_COLLECTION]
+    days = None
+    if not full:
+        latest = rollups.find_one({}, {"day": 1}, sort=[("day", -1)])
+        if latest:
+            days = changed_days(db, latest["day"])
+    # Days being recomputed are cleared first, so a label no session carries
+    # any more, or a session that moved to another day, does not linger.
+    if days is None:
+        rollups.delete_many({})
+        db[ROLLED_DAYS_COLLECTION].delete_many({})
+    elif days:
+        rollups.delete_many({"day": {"$in": days}})
+    if days is None or days:
+        db["sessions"].aggregate(rollup_pipeline(days), allowDiskUse=True)
+        db["sessions"].aggregate(rolled_days_pipeline(days), allowDiskUse=True)
+    _refresh_windows(db)
+    with _lock:
+        _last_refresh = time.monotonic()
+    _cache.clear()
+    if days is None:
+        logger.info("Session rollups rebuilt from every session.")
+    else:
+        logger.info("Session rollups refreshed: %d day(s) recomputed.", len(days))
+    return days
+
+
+def ensure_fresh() -> None:
+    """Start a background refresh when the rollups are stale (never blocks)."""
+    global _refreshing
+    with _lock:
+        stale = time.monotonic() - _last_refresh > settings.analytics_refresh_seconds
+        idle = (_refreshing is None or _refreshing.done()) and not _refresh_lock.locked()
+        if stale and idle:
+            import background
+            _refreshing = background.submit(refresh)
+
+
+# ---------------------------------------------------------------------- queries
+def _cached(name: str, args: tuple, compute):
+    key = (name,) + args
+    value = _cache.get(key)
+    if value is None:
+        value = compute()
+        _cache.set(key, value)
+    return value
+
+
+def _match(kind: str, start: datetime, end: datetime, cohort: str | None = None) -> dict:
+    match = {"kind": kind, "day": {"$gte": start, "$lt": end}}
+    if cohort:
+        match["cohort"] = cohort
+    return match
+
+
+def _window_patients(db, kind, start, end, cohort) -> dict | None:
+    """Distinct patients per label from the precomputed window, or None when
+    ``[start, end)`` is not one (see ``standard_windows``)."""
+    query = {"end": end, "days": (end - start).days, "kind": {"$in": ["all", kind]}}
+    if cohort:
+        query["cohort"] = cohort
+    rows = list(db[WINDOW_COLLECTION].find(query, {"_id": 0, "kind": 1, "label": 1, "patients": 1}))
+    # The "all" row exists whenever the window has a session at all.
+    if not any(row["kind"] == "all" for row in rows):
+        return None
+    patients = {}
+    for row in rows:
+        if row["kind"] == kind:
+            # A patient belongs to one cohort, so per-cohort counts add up.
+            patients[row["label"]] = patients.get(row["label"], 0) + row["patients"]
+    return patients
+
+
+def _label_counts(db, kind, start, end, cohort, with_patients=False) -> list:
+    """``[{label, sessions[, patients]}]`` for ``kind`` in the window, most sessions first."""
+    facets = {"sessions": [{"$group": {"_id": "$label", "n": {"$sum": "$sessions"}}}]}
+    precomputed = _window_patients(db, kind, start, end, cohort) if with_patients else None
+    if with_patients and precomputed is None:
+        # Distinct patients across days and cohorts: one row per (label, patient).
+        facets["patients"] = [
+            {"$unwind": "$patients"},
+            {"$group": {"_id": {"label": "$label", "patient": "$patients"}}},
+            {"$group": {"_id": "$_id.label", "n": {"$sum": 1}}},
+        ]
+    result = next(iter(db[ROLLUP_COLLECTION].aggregate([
+        {"$match": _match(kind, start, end, cohort)},
+        {"$facet": facets},
+    ])), {})
+    patients = (precomputed if precomputed is not None
+                else {row["_id"]: row["n"] for row in result.get("patients") or []})
+    rows = []
+    for row in result.get("sessions") or []:
+        item = {"label": row["_id"], "sessions": row["n"]}
+        if with_patients:
+            item["patients"] = patients.get(row["_id"], 0)
+        rows.append(item)
+    rows.sort(key=lambda item: (-item["sessions"], str(item["label"])))
+    return rows
+
+
+def _totals(db, start, end, cohort, with_patients=True) -> dict:
+    rows = _label_counts(db, "all", start, end, cohort, with_patients)
+    return rows[0] if rows else {"label": None, "sessions": 0, "patients": 0}
+
+
+def _share(part: float, whole: float) -> float:
+    return round(part / whole, 4) if whole else 0.0
+
+
+def topic_frequencies(days: int = 30, end: datetime | None = None,
+                      cohort: str | None = None, db=None) -> dict:
+    """Sessions per detected topic in the window, with each topic's share of sessions."""
+    start, stop = window(days, end)
+
+    def compute():
+        d = db if db is not None else _db()
+        total = _totals(d, start, stop, cohort, with_patients=False)["sessions"]
+        topics = [{**row, "share": _share(row["sessions"], total)}
+                  for row in _label_counts(d, "topic", start, stop, cohort)]
+        return {"start": start, "end": stop, "sessions": total, "topics": topics}
+
+    return _cached("topics", (start, stop, cohort), compute)
+
+
+def topic_trends(days: int = 30, end: datetime | None = None,
+                 cohort: str | None = None, db=None) -> dict:
+    """Topics ranked by the change in their share versus the previous window."""
+    current = topic_frequencies(days, end, cohort, db)
+    previous = topic_frequencies(days, current["start"] - timedelta(days=1), cohort, db)
+    before = {row["label"]: row["share"] for row in previous["topics"]}
+    labels = {row["label"] for row in current["topics"]} | set(before)
+    now = {row["label"]: row for row in current["topics"]}
+    trends = [{
+        "label": label,
+        "sessions": now.get(label, {}).get("sessions", 0),
+        "share": now.get(label, {}).get("share", 0.0),
+        "previous_share": before.get(label, 0.0),
+        "change": round(now.get(label, {}).get("share", 0.0) - before.get(label, 0.0), 4),
+    } for label in labels]
+    trends.sort(key=lambda row: (-row["change"], row["label"]))
+    return {"start": current["start"], "end": current["end"],
+            "previous_start": previous["start"], "trends": trends}
+
+
+def risk_flag_rates(days: int = 30, end: datetime | None = None,
+                    cohort: str | None = None, db=None) -> dict:
+    """Per flag: flagged sessions and distinct patients, as counts and rates."""
+    start, stop = window(days, end)
+
+    def compute():
+        d = db if db is not None else _db()
+        totals = _totals(d, start, stop, cohort)
+        flags = [{
+            **row,
+            "session_rate": _share(row["sessions"], totals["sessions"]),
+            "patient_rate": _share(row["patients"], totals["patients"]),
+        } for row in _label_counts(d, "flag", start, stop, cohort, with_patients=True)]
+        return {"start": start, "end": stop, "sessions": totals["sessions"],
+                "patients": totals["patients"], "flags": flags}
+
+    return _cached("flags", (start, stop, cohort), compute)
+
+
+def sentiment_by_cohort(days: int = 180, end: datetime | None = None,
+                        cohort: str | None = None, db=None) -> dict:
+    """Mean session sentiment per intake cohort, month by month."""
+    start, stop = window(days, end)
+
+    def compute():
+        d = db if db is not None else _db()
+        rows = d[ROLLUP_COLLECTION].aggregate([
+            {"$match": _match("all", start, stop, cohort)},
+            {"$group": {"_id": {"cohort": "$cohort",
+                                "month": {"$dateTrunc": {"date": "$day", "unit": "month"}}},
+                        "sessions": {"$sum": "$sessions"},
+                        "sentiment_sum": {"$sum": "$sentiment_sum"},
+                        "sentiment_count": {"$sum": "$sentiment_count"}}},
+            {"$sort": {"_id.cohort": 1, "_id.month": 1}},
+        ])
+        cohorts: dict = {}
+        for row in rows:
+            cohorts.setdefault(row["_id"]["cohort"], []).append({
+                "month": row["_id"]["month"], "sessions": row["sessions"],
+                "mean_sentiment": round(row["sentiment_sum"] / row["sentiment_count"], 4)
+                if row["sentiment_count"] else 0.0,
+            })
+        return {"start": start, "end": stop, "cohorts": cohorts}
+
+    return _cached("sentiment", (start, stop, cohort), compute)
+
+
+def stats() -> dict:
+    """Query cache counters and the age of the rollups in this process."""
+    out = _cache.stats()
+    out["refreshed_seconds_ago"] = (round(time.monotonic() - _last_refresh, 1)
+                                    if _last_refresh else None)
+    return out
+
+
+def main():
+    from logging_config import setup_logging
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Maintain the cross-patient session rollups.")
+    parser.add_argument("--refresh", action="store_true", help="bring the rollups up to date")
+    parser.add_argument("--full", action="store_true", help="rebuild from every session")
+    args = parser.parse_args()
+    if not (args.refresh or args.full):
+        parser.error("nothing to do: pass --refresh (and optionally --full)")
+    days = refresh(full=args.full)
+    print("Rollups rebuilt." if days is None else f"Rollups refreshed: {len(days)} day(s) recomputed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Token-budgeted prompt assembly shared by every LLM template.
+
+Each template in ``prompt_templates`` has a budget: a cap on the whole prompt
+and, per variable section, ``(max tokens, priority, keep)``. ``build_prompt``
+clips every section to its cap, then — if the prompt is still over the total —
+cuts the lowest-priority sections first until it fits. ``keep`` says which part
+of an over-long section survives: ``"head"`` (records, case lists), ``"tail"``
+(transcripts, most recent last) or ``"ends"`` (the opening and the latest turns).
+Cuts fall on line boundaries and leave a marker saying how much was omitted.
+
+Tokens are counted with the chat model's tokenizer (``settings.prompt_tokenizer``,
+loaded through ``transformers``). The first count starts loading it on the
+background pool — a Hub name may have to be downloaded — and counts estimate
+from characters per token until it is ready, or for good when it is unset or
+cannot be loaded, so prompts stay bounded either way and no turn waits on it.
+"""
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rough characters per token for English text, used without a tokenizer.
+CHARS_PER_TOKEN = 4
+# A section cut below this many tokens is dropped outright.
+MIN_SECTION_TOKENS = 24
+OMITTED = "(omitted for length)"
+
+
+_tokenizer_lock = threading.Lock()
+_tokenizer_load: Optional[Future] = None
+
+
+def _load_tokenizer():
+    try:
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(settings.prompt_tokenizer)
+    except Exception:
+        logger.warning("Tokenizer %s unavailable; estimating prompt tokens from length.",
+                       settings.prompt_tokenizer)
+        return None
+
+
+def _get_tokenizer():
+    """The chat model's tokenizer, or None while it loads or when it cannot be loaded."""
+    global _tokenizer_load
+    if not settings.prompt_tokenizer:
+        return None
+    with _tokenizer_lock:
+        if _tokenizer_load is None:
+            import background
+            _tokenizer_load = background.submit(_load_tokenizer)
+    return _tokenizer_load.result() if _tokenizer_load.done() else None
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens ``text`` costs in a prompt."""
+    if not text:
+        return 0
+    tokenizer = _get_tokenizer()
+    if tokenizer is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(tokenizer.encode(text, add_special_tokens=False))
+
+
+def _cut(text: str, max_tokens: int, from_end: bool = False) -> str:
+    """The first (or last) ``max_tokens`` tokens of a single piece of text."""
+    if max_tokens <= 0:
+        return ""
+    tokenizer = _get_tokenizer()
+    if tokenizer is None:
+        n = max_tokens * CHARS_PER_TOKEN
+        return text[-n:] if from_end else text[:n]
+    ids = tokenizer.encode(text, add_special_tokens=False)
+    ids = ids[-max_tokens:] if from_end else ids[:max_tokens]
+    return tokenizer.decode(ids)
+
+
+def truncate(text: str, max_tokens: int) -> str:
+    """``text`` cut to its first ``max_tokens`` tokens, with an ellipsis if cut."""
+    text = text or ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    return _cut(text, max_tokens - 1).rstrip() + "…"
+
+
+def _take(lines, max_tokens: int, from_end: bool = False) -> tuple[list, int]:
+    """Whole lines, in order, until ``max_tokens`` is spent; a first line that
+    does not fit on its own is cut instead. Returns ``(lines, tokens used)``."""
+    kept, used = [], 0
+    for line in lines:
+        n = count_tokens(line) + 1  # + the newline
+        if used + n > max_tokens:
+            if not kept and max_tokens > 1:
+                part = _cut(line, max_tokens - 2, from_end=from_end)
+                kept.append("…" + part if from_end else part + "…")
+                used = max_tokens
+            break
+        kept.append(line)
+        used += n
+    return kept, used
+
+
+def _marker(omitted: int) -> str:
+    return f"…[{omitted} line{'s' if omitted != 1 else ''} omitted for length]…"
+
+
+def clip(text: str, max_tokens: int, keep: str = "tail") -> str:
+    """Fit ``text`` into ``max_tokens``, dropping whole lines from the cut end.
+
+    ``keep`` is ``"head"``, ``"tail"`` or ``"ends"`` (a quarter of the budget for
+    the opening lines, the rest for the latest).
+    """
+    text = text or ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    if max_tokens < MIN_SECTION_TOKENS:
+        return OMITTED
+    lines = text.splitlines()
+    budget = max_tokens - count_tokens(_marker(len(lines))) - 1
+
+    if keep == "head":
+        head, _ = _take(lines, budget)
+        tail = []
+    elif keep == "tail":
+        head = []
+        tail, _ = _take(reversed(lines), budget, from_end=True)
+    elif keep == "ends":
+        head, used = _take(lines, budget // 4)
+        rest = lines[len(head):]
+        tail, _ = _take(reversed(rest), budget - used, from_end=True)
+    else:
+        raise ValueError(f"Unknown keep mode: {keep!r}")
+    tail.reverse()
+
+    omitted = len(lines) - len(head) - len(tail)
+    if omitted <= 0:
+        return "\n".join(head + tail)
+    return "\n".join(head + [_marker(omitted)] + tail)
+
+
+def build_prompt(template, budget: dict, **values) -> str:
+    """Format ``template`` with ``values`` fitted to ``budget``.
+
+    ``template`` is anything with ``.format(**values)`` (a plain string or a
+    LangChain prompt template). Sections the budget does not list are passed
+    through unchanged.
+    """
+    sections = budget.get("sections", {})
+    values = {k: "" if v is None else str(v) for k, v in values.items()}
+    for name, (cap, _priority, keep) in sections.items():
+        if name in values:
+            values[name] = clip(values[name], cap, keep)
+
+    fixed = count_tokens(template.format(**{k: "" for k in values}))
+    sizes = {k: count_tokens(v) for k, v in values.items()}
+    over = fixed + sum(sizes.values()) - budget["total"]
+    if over > 0:
+        for name in sorted((n for n in sections if n in values), key=lambda n: sections[n][1]):
+            if over <= 0:
+                break
+            values[name] = clip(values[name], sizes[name] - over, sections[name][2])
+            new_size = count_tokens(values[name])
+            over -= sizes[name] - new_size
+            logger.debug("Prompt over budget: cut %s to %d tokens.", name, new_size)
+    return template.format(**values)
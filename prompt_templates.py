@@ -10,6 +10,17 @@ ADVICE_TEMPLATE = ChatPromptTemplate.from_template(
     "Suggested Actions: <numbered steps>\n"
 )
 
+# Token budgets (prompt_budget.build_prompt): a cap on the whole prompt and,
+# per section, (max tokens, priority, keep). When the prompt is over its total
+# the lowest-priority sections are cut first; ``keep`` is the part that survives.
+ADVICE_BUDGET = {
+    "total": 3000,
+    "sections": {
+        "query": (2000, 100, "ends"),
+        "examples_text": (900, 50, "head"),
+    },
+}
+
 
 # Decision-support for a clinician during a live session. Plain str.format
 # template (JSON braces are doubled). Reused by session_assistant.py.
@@ -46,6 +57,18 @@ SESSION_ASSISTANT_TEMPLATE = (
     "- Output ONLY the JSON object, with no prose before or after.\n"
 )
 
+SESSION_ASSISTANT_BUDGET = {
+    "total": 6000,
+    "sections": {
+        "transcript": (3000, 100, "tail"),
+        "patient_summary": (500, 90, "head"),
+        "signals": (400, 80, "head"),
+        "doctor_questions": (400, 60, "tail"),
+        "history_summary": (800, 50, "head"),
+        "retrieved_cases": (700, 40, "head"),
+    },
+}
+
 
 # Free-form Q&A for the clinician during a live session ("Ask" mode). Plain
 # str.format template (no literal braces). Reused by doctor_qa.py.
@@ -74,6 +97,20 @@ DOCTOR_QA_TEMPLATE = (
     "question.\n"
 )
 
+DOCTOR_QA_BUDGET = {
+    "total": 7000,
+    "sections": {
+        "question": (300, 100, "head"),
+        "live_transcript": (2500, 90, "ends"),
+        "patient_summary": (500, 85, "head"),
+        "session_signals": (300, 80, "head"),
+        "last_session_detail": (500, 70, "head"),
+        "history_summary": (800, 60, "head"),
+        "last_session_transcript": (1500, 50, "tail"),
+        "retrieved_cases": (700, 40, "head"),
+    },
+}
+
 
 # End-of-session clinician summary. Plain str.format template (no literal
 # braces). Reused by session_report.py.
@@ -85,6 +122,7 @@ REPORT_TEMPLATE = (
     "PRIOR SESSIONS:\n{history_summary}\n\n"
     "TOPICS OBSERVED THIS SESSION:\n{topics}\n\n"
     "RISK FLAGS RAISED THIS SESSION (deterministic crisis screen):\n{risk_flags}\n\n"
+    "SESSION SIGNALS (computed per turn):\n{signals}\n\n"
     "CLINICIAN NOTES:\n{notes}\n\n"
     "SESSION TRANSCRIPT (doctor & patient, most recent last):\n{transcript}\n\n"
     "Write a structured summary in markdown with exactly these three sections:\n"
@@ -97,3 +135,41 @@ REPORT_TEMPLATE = (
     "- Do NOT diagnose or prescribe; phrase follow-ups as 'Consider...'.\n"
     "- Be concise — a few short bullets under each heading.\n"
 )
+
+REPORT_BUDGET = {
+    "total": 6000,
+    "sections": {
+        "transcript": (3500, 100, "ends"),
+        "risk_flags": (200, 95, "head"),
+        "notes": (800, 90, "head"),
+        "signals": (300, 85, "head"),
+        "patient_summary": (500, 80, "head"),
+        "topics": (200, 70, "head"),
+        "history_summary": (800, 50, "head"),
+    },
+}
+
+
+# Running summary of a live session's older turns (rolling_summary.py). Plain
+# str.format template (no literal braces).
+SESSION_SUMMARY_TEMPLATE = (
+    "You maintain a running summary of a live mental-health session for the clinician's "
+    "decision-support tools. Update the summary so far with the new transcript turns.\n\n"
+    "SUMMARY SO FAR:\n{summary}\n\n"
+    "NEW TURNS (oldest first):\n{turns}\n\n"
+    "RULES:\n"
+    "- Keep every disclosure of risk (self-harm, suicidal thoughts, abuse, violence) with the "
+    "patient's own words quoted.\n"
+    "- Keep what the patient reported (events, symptoms, feelings, people, dates), what the "
+    "clinician asked, and anything left unresolved.\n"
+    "- Drop greetings, filler and repetition. Do not interpret, diagnose or add facts.\n"
+    "- At most 12 short bullets, oldest first. Output only the bullets.\n"
+)
+
+SESSION_SUMMARY_BUDGET = {
+    "total": 3500,
+    "sections": {
+        "turns": (2500, 100, "head"),
+        "summary": (600, 90, "head"),
+    },
+}
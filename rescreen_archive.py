@@ -0,0 +1,221 @@
+"""Re-screen the archived conversations with the current crisis phrase lists.
+
+Run after ``SafetyChecker.RED_FLAG_PHRASES`` changes:
+
+    python rescreen_archive.py                # screen + write flags back
+    python rescreen_archive.py --dry-run      # report only
+    python rescreen_archive.py --workers 8 --report rescreen.json
+
+Conversations are streamed from ``PatientConvo`` with only the message fields
+the screen needs, screened in batches across a process pool, and written back
+with unordered ``bulk_write``:
+
+- ``messages.<i>.metadata.safety_flags`` — the flags raised by each patient message
+- ``safety_screen`` — ``{version, flags, screened_at}`` for the conversation
+
+``version`` fingerprints the phrase lists, so a rerun skips conversations
+already screened with them (``--all`` re-screens everything). The report lists
+the sessions whose conversation now raises a flag their session log's
+``risk_flags`` never recorded, plus throughput in messages per second.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+
+from safety import SafetyChecker
+
+logger = logging.getLogger(__name__)
+
+_PROJECTION = {"_id": 1, "session_id": 1, "patient_id": 1,
+               "messages.content": 1, "messages.is_user": 1, "messages.speaker": 1}
+
+_checker = None
+
+
+def screen_version(checker_cls=SafetyChecker) -> str:
+    """Fingerprint of the phrase lists a screen was run with."""
+    table = {flag: sorted(phrases) for flag, phrases in checker_cls.RED_FLAG_PHRASES.items()}
+    return hashlib.sha1(json.dumps(table, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def _init_worker():
+    global _checker
+    _checker = SafetyChecker()
+
+
+def _is_patient(message: dict) -> bool:
+    speaker = message.get("speaker")
+    return speaker == "patient" if speaker else bool(message.get("is_user"))
+
+
+def screen_batch(batch):
+    """Screen ``[[(index, text), ...], ...]``; return ``[[(index, flags), ...], ...]``.
+
+    Runs in the pool workers (one ``SafetyChecker`` per process).
+    """
+    if _checker is None:
+        _init_worker()
+    out = []
+    for messages in batch:
+        screened = []
+        for index, text in messages:
+            flags = []
+            for m in _checker.screen(text)["matches"]:
+                if m["flag_type"] not in flags:
+                    flags.append(m["flag_type"])
+            screened.append((index, flags))
+        out.append(screened)
+    return out
+
+
+def _patient_texts(conv: dict):
+    return [(i, m.get("content") or "") for i, m in enumerate(conv.get("messages") or [])
+            if isinstance(m, dict) and _is_patient(m)]
+
+
+def _batches(cursor, size):
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class _Job:
+    """Folds screened batches into write-backs and the report."""
+
+    def __init__(self, db, version, write):
+        self.db = db
+        self.version = version
+        self.write = write
+        self.conversations = 0
+        self.messages = 0
+        self.flagged_messages = 0
+        self.by_flag = {}
+        self.newly_flagged = []
+
+    def finish(self, batch, results):
+        from pymongo import UpdateOne
+
+        sids = [c.get("session_id") for c in batch if c.get("session_id")]
+        recorded = {
+            s.get("session_id"): set(s.get("risk_flags") or [])
+            for s in self.db["sessions"].find({"session_id": {"$in": sids}},
+                                              {"_id": 0, "session_id": 1, "risk_flags": 1})
+        }
+        now = datetime.now()
+        ops = []
+        for conv, screened in zip(batch, results):
+            self.conversations += 1
+            self.messages += len(screened)
+            update, flags, flagged_at = {}, [], []
+            for index, msg_flags in screened:
+                update[f"messages.{index}.metadata.safety_flags"] = msg_flags
+                if msg_flags:
+                    self.flagged_messages += 1
+                    flagged_at.append(index)
+                for flag in msg_flags:
+                    if flag not in flags:
+                        flags.append(flag)
+            for flag in flags:
+                self.by_flag[flag] = self.by_flag.get(flag, 0) + 1
+            new = [f for f in flags if f not in recorded.get(conv.get("session_id"), set())]
+            if new:
+                self.newly_flagged.append({"session_id": conv.get("session_id"),
+                                           "patient_id": conv.get("patient_id"),
+                                           "flags": new, "messages": flagged_at})
+            update["safety_screen"] = {"version": self.version, "flags": flags, "screened_at": now}
+            ops.append(UpdateOne({"_id": conv["_id"]}, {"$set": update}))
+        if self.write and ops:
+            self.db["PatientConvo"].bulk_write(ops, ordered=False)
+
+
+def rescreen_archive(db, workers: int | None = None, batch_size: int = 200,
+                     write: bool = True, rescreen_all: bool = False) -> dict:
+    """Re-screen ``PatientConvo``; return the summary report.
+
+    ``workers`` defaults to the CPU count; ``workers <= 1`` screens in-process.
+    At most two batches per worker are in flight, so memory stays bounded
+    however large the archive is.
+    """
+    version = screen_version()
+    query = {} if rescreen_all else {"safety_screen.version": {"$ne": version}}
+    cursor = db["PatientConvo"].find(query, _PROJECTION, batch_size=batch_size)
+    job = _Job(db, version, write)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    started = time.perf_counter()
+
+    if workers <= 1:
+        for batch in _batches(cursor, batch_size):
+            job.finish(batch, screen_batch([_patient_texts(c) for c in batch]))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            pending = deque()
+            for batch in _batches(cursor, batch_size):
+                pending.append((batch, pool.submit(screen_batch, [_patient_texts(c) for c in batch])))
+                if len(pending) >= 2 * workers:
+                    done, future = pending.popleft()
+                    job.finish(done, future.result())
+            while pending:
+                done, future = pending.popleft()
+                job.finish(done, future.result())
+
+    seconds = time.perf_counter() - started
+    report = {
+        "version": version,
+        "written": write,
+        "conversations": job.conversations,
+        "messages": job.messages,
+        "flagged_messages": job.flagged_messages,
+        "sessions_by_flag": job.by_flag,
+        "newly_flagged_sessions": job.newly_flagged,
+        "seconds": round(seconds, 3),
+        "messages_per_sec": round(job.messages / seconds, 1) if seconds > 0 else 0.0,
+    }
+    logger.info("Re-screened %d messages in %d conversations (%.1f msg/s); %d sessions newly flagged.",
+                job.messages, job.conversations, report["messages_per_sec"], len(job.newly_flagged))
+    return report
+
+
+def main():
+    from db import get_db
+    from logging_config import setup_logging
+
+    setup_logging()
+    ap = argparse.ArgumentParser(description="Re-screen archived conversations for crisis language.")
+    ap.add_argument("--workers", type=int, default=None, help="screening processes (default: CPU count)")
+    ap.add_argument("--batch-size", type=int, default=200, help="conversations per batch")
+    ap.add_argument("--dry-run", action="store_true", help="report only; write nothing back")
+    ap.add_argument("--all", action="store_true",
+                    help="re-screen conversations already screened with these phrase lists")
+    ap.add_argument("--report", help="also write the full report to this JSON file")
+    args = ap.parse_args()
+
+    report = rescreen_archive(get_db(secondary_ok=args.dry_run), workers=args.workers,
+                              batch_size=args.batch_size, write=not args.dry_run,
+                              rescreen_all=args.all)
+    print(f"screen version {report['version']}: {report['messages']} messages in "
+          f"{report['conversations']} conversations, {report['flagged_messages']} flagged "
+          f"({report['messages_per_sec']} msg/s, {report['seconds']}s)")
+    for item in report["newly_flagged_sessions"]:
+        print(f"  NEW  {item['patient_id']}  {item['session_id']}  {', '.join(item['flags'])}")
+    if not report["written"]:
+        print("dry run — nothing written")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
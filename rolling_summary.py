@@ -0,0 +1,78 @@
+"""Rolling summary of a live session's older turns.
+
+Every patient turn sends the session transcript to the analysis context and
+the decision-support prompt, so without a bound both grow with the session.
+``RollingSummary.context`` returns the last ``summary_recent_turns`` turns
+verbatim, preceded by a running summary of everything older. Older turns are
+folded into the summary on the background pool, ``summary_fold_turns`` at a
+time, so no turn waits on the summarizer; until a fold lands, the not-yet-
+folded turns are simply sent verbatim. A failed fold is retried on a later turn.
+
+Short sessions (never past the recent window) get the plain transcript, the
+same text as before.
+"""
+import logging
+import threading
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def summarize_turns(summary: str, turns: list) -> str:
+    """Fold ``turns`` into the running ``summary`` with the LLM; returns the new summary."""
+    import llm_cache
+    from prompt_budget import build_prompt
+    from prompt_templates import SESSION_SUMMARY_TEMPLATE, SESSION_SUMMARY_BUDGET
+
+    prompt = build_prompt(
+        SESSION_SUMMARY_TEMPLATE, SESSION_SUMMARY_BUDGET,
+        summary=summary or "(none yet)",
+        turns="\n".join(turns),
+    )
+    return (llm_cache.complete(prompt, purpose="summary") or "").strip()
+
+
+class RollingSummary:
+    """One session's running summary; keep one instance per live session.
+
+    ``turns`` passed to ``context`` are the session's formatted transcript lines
+    (``"Speaker: text"``), oldest first; the list only ever grows within a session.
+    """
+
+    def __init__(self, recent_turns: int | None = None, fold_turns: int | None = None,
+                 summarize=summarize_turns):
+        self.recent_turns = settings.summary_recent_turns if recent_turns is None else recent_turns
+        self.fold_turns = settings.summary_fold_turns if fold_turns is None else fold_turns
+        self._summarize = summarize
+        self._lock = threading.Lock()
+        self.summary = ""
+        self.folded = 0  # leading turns covered by ``summary``
+        self._future = None
+
+    def context(self, turns: list) -> str:
+        """Transcript text for prompts: the summary of older turns + the recent ones."""
+        with self._lock:
+            if self.folded > len(turns):  # a different (shorter) transcript: start over
+                self.summary, self.folded = "", 0
+            summary, folded = self.summary, self.folded
+            idle = self._future is None or self._future.done()
+            if idle and len(turns) - folded >= self.recent_turns + self.fold_turns:
+                import background
+                upto = len(turns) - self.recent_turns
+                self._future = background.submit(self._fold, summary, list(turns[folded:upto]),
+                                                 folded, upto)
+
+        recent = "\n".join(turns[folded:])
+        if not summary:
+            return recent
+        return f"[Summary of earlier turns]\n{summary}\n\n[Recent turns]\n{recent}"
+
+    def _fold(self, summary: str, turns: list, start: int, upto: int) -> None:
+        text = self._summarize(summary, turns)
+        if not text:
+            logger.warning("Session summarizer returned nothing; keeping turns verbatim.")
+            return
+        with self._lock:
+            if self.folded == start:
+                self.summary, self.folded = text, upto
@@ -1,19 +1,76 @@
+import copy
 import re
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+def _variants(*phrases):
+    """Expand ``don't`` spellings: each phrase with and without the apostrophe."""
+    out = []
+    for p in phrases:
+        out.append(p)
+        if "'" in p:
+            out.append(p.replace("'", ""))
+    return tuple(out)
+
+
+def _pairs(verbs, objects):
+    """Every ``"<verb> <object>"`` combination."""
+    return tuple(f"{v} {o}" for v in verbs for o in objects)
+
+
+def _trie_regex(phrases) -> str:
+    """One regex matching any of ``phrases`` as whole words, factored as a trie.
+
+    The engine branches on one character at a time instead of retrying every
+    phrase at every position, and the pattern opens with a plain alternation
+    of first letters so ``re`` can skip ahead to candidate characters. The
+    leading word boundary is checked by a lookbehind after that first letter.
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node, depth):
+        branches = []
+        for ch, child in sorted(node.items()):
+            if not ch:
+                continue
+            head = re.escape(ch)
+            if depth == 0:
+                head += r"(?<!\w" + re.escape(ch) + ")"
+            branches.append(head + build(child, depth + 1))
+        if not branches:
+            return ""
+        body = "(?:" + "|".join(branches) + ")"
+        # Greedy: a longer phrase is tried first, a shorter one on backtrack.
+        return body + "?" if "" in node else body
+
+    return build(trie, 0) + r"\b"
+
+
 class SafetyChecker:
-    RED_FLAGS = {
-        r"\b(suicide|suicidal|kill myself|killing myself|end it all|end my life|"
-        r"ending my life|take my life|take my own life|want to die|wanting to die|"
-        r"better off dead|don'?t want to live|don'?t want to be alive|"
-        r"no reason to live|no point in living)\b": "suicide_risk",
-        r"\b(abuse|abused|abusing|abuser|molest|molested|molesting|molester|"
-        r"rape|raped|raping|rapist|sexual assault|sexually assaulted)\b": "abuse_disclosure",
-        r"\b((harm|harming|hurt|hurting|kill|killing|cut|cutting) "
-        r"(myself|himself|herself|themselves|others|someone|him|her|them)|"
-        r"self[- ]?harm)\b": "violence_risk",
+    # Red-flag phrases per flag, matched case-insensitively on word boundaries.
+    RED_FLAG_PHRASES = {
+        "suicide_risk": _variants(
+            "suicide", "suicidal", "kill myself", "killing myself", "end it all",
+            "end my life", "ending my life", "take my life", "take my own life",
+            "want to die", "wanting to die", "better off dead", "don't want to live",
+            "don't want to be alive", "no reason to live", "no point in living",
+        ),
+        "abuse_disclosure": (
+            "abuse", "abused", "abusing", "abuser", "molest", "molested", "molesting",
+            "molester", "rape", "raped", "raping", "rapist", "sexual assault",
+            "sexually assaulted",
+        ),
+        "violence_risk": _pairs(
+            ("harm", "harming", "hurt", "hurting", "kill", "killing", "cut", "cutting"),
+            ("myself", "himself", "herself", "themselves", "others", "someone", "him", "her", "them"),
+        ) + ("self-harm", "self harm", "selfharm"),
     }
     
     PROTOCOLS = {
@@ -37,28 +94,164 @@ class SafetyChecker:
     # Higher rank wins when multiple red flags co-occur in one message.
     _ACTION_SEVERITY = {"CRITICAL": 2, "URGENT": 1}
 
+    def __init__(self):
+        # phrase -> flags it raises (a phrase may raise several, e.g. "kill myself").
+        self._phrase_flags = {}
+        for flag_type, phrases in self.RED_FLAG_PHRASES.items():
+            for phrase in phrases:
+                flags = self._phrase_flags.setdefault(phrase.casefold(), [])
+                if flag_type not in flags:
+                    flags.append(flag_type)
+        self._order = {flag: i for i, flag in enumerate(self.RED_FLAG_PHRASES)}
+        pattern = _trie_regex(self._phrase_flags)
+        # Scanned against lowercased text (fast path); the case-insensitive
+        # variant covers text whose lowercase form changes length, so spans
+        # always index the original text.
+        self._matcher = re.compile(pattern)
+        self._matcher_ci = re.compile(pattern, re.IGNORECASE)
+        # For streaming: the longest phrase, and phrases a longer phrase
+        # continues past a word boundary (a match on them may still grow).
+        self._max_len = max(map(len, self._phrase_flags), default=0)
+        self._extendable = {
+            p for p in self._phrase_flags
+            if any(q.startswith(p) and len(q) > len(p) and not q[len(p)].isalnum()
+                   for q in self._phrase_flags)
+        }
+
+    def _finditer(self, text: str, pos: int = 0):
+        """Yield ``(start, end, phrase)`` for each red-flag phrase in ``text``."""
+        folded = text.lower()
+        if len(folded) == len(text):
+            found = self._matcher.finditer(folded, pos)
+        else:
+            found = self._matcher_ci.finditer(text, pos)
+        for m in found:
+            yield m.start(), m.end(), m.group(0).casefold()
+
+    def _rank(self, flag_type: str):
+        protocol = self.PROTOCOLS.get(flag_type)
+        if not protocol:
+            return None
+        return (self._ACTION_SEVERITY.get(protocol["action"], 0), -self._order[flag_type])
+
+    def _protocol(self, flag_type):
+        return {**self.PROTOCOLS[flag_type], "flag_type": flag_type} if flag_type else None
+
+    def screen(self, text: str) -> dict:
+        """Screen ``text`` for red flags in a single pass.
+
+        Returns ``{"matches": [...], "protocol": ...}`` — every match as
+        ``{"flag_type", "start", "end", "text"}`` (spans index the original
+        text; matches do not overlap) and the protocol of the highest-severity
+        flag, or None. On a severity tie the flag listed first in
+        ``RED_FLAG_PHRASES`` wins. Negation is intentionally NOT handled: for a
+        crisis screen, over-triggering is the safe direction — the clinician can
+        dismiss a false positive, but a missed crisis is unacceptable.
+        """
+        text = text or ""
+        matches = []
+        best_flag, best_key = None, None
+        for start, end, phrase in self._finditer(text):
+            for flag_type in self._phrase_flags.get(phrase, ()):
+                matches.append({"flag_type": flag_type, "start": start,
+                                "end": end, "text": text[start:end]})
+                key = self._rank(flag_type)
+                if key is not None and (best_key is None or key > best_key):
+                    best_flag, best_key = flag_type, key
+        if best_flag:
+            logger.info("Safety check triggered: %s", best_flag)
+        return {"matches": matches, "protocol": self._protocol(best_flag)}
+
+    def stream(self) -> "SafetyStream":
+        """A streaming screen over text that arrives in chunks; see ``SafetyStream``."""
+        return SafetyStream(self)
+
     def check_input(self, text: str):
         """Return the protocol for the highest-severity red flag in ``text``.
 
-        All patterns are evaluated (not just the first match) so a CRITICAL
-        flag is never masked by a lower-severity one that happens to be checked
-        first. Negation is intentionally NOT handled: for a crisis screen,
-        over-triggering is the safe direction — the clinician can dismiss a
-        false positive, but a missed crisis is unacceptable.
+        Every flag is considered (not just the first match) so a CRITICAL flag
+        is never masked by a lower-severity one; see ``screen``.
         """
-        text = text.lower()
-        best = None
-        best_rank = -1
-        for pattern, flag_type in self.RED_FLAGS.items():
-            if not re.search(pattern, text):
-                continue
-            protocol = self.PROTOCOLS.get(flag_type)
-            if not protocol:
-                continue
-            rank = self._ACTION_SEVERITY.get(protocol["action"], 0)
-            if rank > best_rank:
-                best_rank = rank
-                best = {**protocol, "flag_type": flag_type}
-        if best:
-            logger.info("Safety check triggered: %s", best["flag_type"])
-        return best
+        return self.screen(text)["protocol"]
+
+
+class SafetyStream:
+    """Incremental crisis screen for a turn that arrives in chunks (typing, dictation).
+
+    ``feed`` scans only the new text plus a short tail kept from earlier chunks,
+    so a phrase split across chunks is still caught, and returns each match the
+    moment it is complete — i.e. once the character after it arrives and
+    confirms the word boundary ("want to die" is not yet a match in "want to
+    di…"). ``flush`` ends the turn and releases a match held at the very end.
+    Matches carry absolute offsets into the whole streamed text and equal what
+    ``SafetyChecker.screen`` returns for the concatenated chunks.
+    """
+
+    def __init__(self, checker: SafetyChecker):
+        self._checker = checker
+        self._buf = ""
+        self._base = 0   # absolute offset of _buf[0]
+        self._pos = 0    # absolute offset the next scan resumes from
+        self._best_key = None
+        self.matches = []
+        self.protocol = None
+
+    @property
+    def length(self) -> int:
+        """Characters streamed so far."""
+        return self._base + len(self._buf)
+
+    def feed(self, chunk: str) -> list:
+        """Add a chunk of text; return the matches it completed."""
+        self._buf += chunk or ""
+        return self._scan(final=False)
+
+    def flush(self) -> list:
+        """End of the turn: return any match held back at the end of the text."""
+        return self._scan(final=True)
+
+    def peek(self):
+        """The protocol if the text ended here: a match held back at the very
+        end counts, but the stream is left as it was so more text can follow."""
+        clone = copy.copy(self)
+        clone.matches = list(self.matches)
+        clone.flush()
+        return clone.protocol
+
+    def _scan(self, final: bool) -> list:
+        checker, buf = self._checker, self._buf
+        n = len(buf)
+        new, held = [], None
+        for start, end, phrase in checker._finditer(buf, self._pos - self._base):
+            # A match touching the end of the text may still grow ("abuse" ->
+            # "abused") or lose its word boundary; hold it until more text comes.
+            if not final and (end == n or (phrase in checker._extendable
+                                           and start + checker._max_len >= n)):
+                held = start
+                break
+            for flag_type in checker._phrase_flags.get(phrase, ()):
+                match = {"flag_type": flag_type, "start": self._base + start,
+                         "end": self._base + end, "text": buf[start:end]}
+                new.append(match)
+                key = checker._rank(flag_type)
+                if key is not None and (self._best_key is None or key > self._best_key):
+                    self._best_key = key
+                    self.protocol = checker._protocol(flag_type)
+            self._pos = self._base + end
+        if held is not None:
+            self._pos = self._base + held
+        elif final:
+            self._pos = self._base + n
+        else:
+            # Earlier positions were fully decided; later ones may start a
+            # phrase that is still arriving.
+            self._pos = max(self._pos, self._base + n - checker._max_len)
+        # Keep one character before the resume point for the word-boundary check.
+        keep = max(self._pos - self._base - 1, 0)
+        self._buf = buf[keep:]
+        self._base += keep
+        if new:
+            self.matches.extend(new)
+            logger.info("Streaming safety screen flagged: %s",
+                        ", ".join(sorted({m["flag_type"] for m in new})))
+        return new
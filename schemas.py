@@ -35,4 +35,6 @@ class SessionLog(BaseModel):
     sentiment_score: float = 0.0
     doctor_notes: str = ""
     suggestions: List[dict] = Field(default_factory=list)
+    # Session analytics maintained per turn (session_aggregate.SessionAggregate.as_dict).
+    aggregate: dict = Field(default_factory=dict)
     created_at: datetime = Field(default_factory=datetime.now)
\ No newline at end of file
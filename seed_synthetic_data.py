@@ -3,26 +3,39 @@
 DESTRUCTIVE. Run with --confirm to actually wipe and reseed:
 
     KMP_DUPLICATE_LIB_OK=TRUE python seed_synthetic_data.py --confirm
+    python seed_synthetic_data.py --confirm --patients 1000000 --corpus 200000
 
 Builds:
-  - a synthetic mental-health Q&A corpus in PatientConvo + Pinecone (so the
+  - a synthetic mental-health Q&A corpus in `corpus` + Pinecone (so the
     assistant's "similar cases" grounding still works),
   - ~N synthetic patients (profiles) in `patients`,
   - 2-4 past sessions per patient in `sessions` (matching the current schema),
   - one short archived conversation per session in PatientConvo.
+
+Data is generated in chunks of ``--batch-size`` and inserted unordered as each
+chunk is ready, so memory stays bounded at any volume: patient chunks are
+built across a process pool, and corpus chunks are embedded and upserted on
+a thread pool while the next ones are inserted. Each chunk draws from its own
+seeded random stream, so a reseed is reproducible however the work is spread.
+Indexes, patient summaries and the population rollups are built once, after
+the load.
 """
 import os
 os.environ.setdefault("KMP_DUPLICATE_LIB_OK", "TRUE")
 
 import argparse
 import random
-import uuid
+import time
+from collections import deque
 from datetime import datetime, timedelta
 
 from db import get_db, CORPUS_COLLECTION
-from model_cache import get_embedding_model, get_pinecone_index
+from patient_summary import rebuild_summaries
 
-random.seed(42)
+SEED = 42
+random.seed(SEED)
+# Collections a reseed replaces.
+SEEDED_COLLECTIONS = ("patients", "sessions", "PatientConvo", CORPUS_COLLECTION, "session_rollups")
 
 CONDITIONS = {
     "anxiety": {
@@ -92,6 +105,7 @@ _OPENERS = {
     "family-conflict": ["My family relationships are tense", "We argue all the time at home", "I feel caught in family conflict"],
     "workplace-relationships": ["My workplace feels toxic", "I clash with my manager", "I dread going to work"],
 }
+_TOPICS = list(_OPENERS)
 _DETAILS = ["and it affects my sleep", "and I can't focus at work", "and it's straining my relationships",
             "especially in the mornings", "and I feel exhausted", "and it's getting worse",
             "and I don't know how to cope", "and I feel alone in it", "and it comes in waves"]
@@ -119,11 +133,30 @@ _ADVICE = {
 }
 
 
+class _Progress:
+    """Prints ``label: done/total (rate/s)`` at most once a second, and at the end."""
+
+    def __init__(self, label: str, total: int, out=print):
+        self.label, self.total, self.out = label, total, out
+        self.done = 0
+        self.started = self._last = time.perf_counter()
+
+    def add(self, n: int) -> None:
+        self.done += n
+        now = time.perf_counter()
+        if now - self._last >= 1.0 or self.done >= self.total:
+            self._last = now
+            rate = self.done / max(now - self.started, 1e-9)
+            self.out(f"  {self.label}: {self.done:,}/{self.total:,} ({rate:,.0f}/s)")
+
+
 def _wipe(db, index):
+    # Dropping is far faster than deleting millions of documents; the indexes
+    # are rebuilt once the data is loaded (see _build_indexes).
     print("Wiping MongoDB collections…")
-    for coll in ("patients", "sessions", "PatientConvo", CORPUS_COLLECTION):
-        res = db[coll].delete_many({})
-        print(f"  cleared {coll}: {res.deleted_count}")
+    for coll in SEEDED_COLLECTIONS:
+        db[coll].drop()
+        print(f"  dropped {coll}")
     print("Wiping Pinecone 'default' namespace…")
     try:
         index.delete(delete_all=True, namespace="default")
@@ -132,103 +165,200 @@ def _wipe(db, index):
         print("  Pinecone delete note:", repr(e))
 
 
-def _build_corpus(db, index, embed, per_topic=14):
-    print("Building synthetic Q&A corpus…")
-    docs = []
-    qid = 1
-    topics = list(_OPENERS.keys())
-    for topic in topics:
-        seen = set()
-        attempts = 0
-        added = 0
-        while added < per_topic and attempts < per_topic * 6:
-            attempts += 1
-            opener = random.choice(_OPENERS[topic])
-            detail = random.choice(_DETAILS)
-            question = f"{opener} {detail}."
-            if question in seen:
-                continue
-            seen.add(question)
-            answer_pool = _ADVICE.get(topic, []) + _ADVICE["default"]
-            answer = " ".join(random.sample(answer_pool, k=min(2, len(answer_pool))))
-            docs.append({
-                "questionID": qid,
-                "questionTitle": opener,
-                "questionText": question,
-                "answerText": answer,
-                "topic": topic,
-                "therapistInfo": "Synthetic Counselor, LCSW",
-                "upvotes": random.randint(0, 40),
-                "views": random.randint(20, 500),
-            })
-            qid += 1
-            added += 1
-    db[CORPUS_COLLECTION].insert_many([dict(d) for d in docs])
-    print(f"  inserted {len(docs)} corpus docs into {CORPUS_COLLECTION}")
-
-    print("  embedding + upserting to Pinecone…")
-    texts = [d["questionText"] for d in docs]
-    vectors = embed.embed_documents(texts)
-    batch = []
-    for d, vec in zip(docs, vectors):
-        batch.append({"id": f"q{d['questionID']}", "values": vec,
-                      "metadata": {"questionID": d["questionID"], "topic": d["topic"],
-                                   "questionTitle": d["questionTitle"]}})
-    for i in range(0, len(batch), 100):
-        index.upsert(vectors=batch[i:i + 100], namespace="default")
-    print(f"  upserted {len(batch)} vectors to Pinecone")
-    return len(docs)
-
-
-def _build_patients(db, n_patients=50):
-    print(f"Building {n_patients} synthetic patients + sessions…")
-    cond_keys = list(CONDITIONS.keys())
-    patients, sessions, conversations = [], [], []
+def _build_indexes():
+    from db import ensure_indexes
+    print("  indexes built" if ensure_indexes(force=True) else "  index build failed (see log)")
+
+
+def corpus_doc(qid: int, rng=random) -> dict:
+    """Synthetic corpus Q&A document number ``qid``.
+
+    Topics rotate with ``qid`` and each topic walks through its opener x detail
+    combinations, so questions stay distinct until those run out.
+    """
+    topic = _TOPICS[qid % len(_TOPICS)]
+    openers = _OPENERS[topic]
+    k = qid // len(_TOPICS)
+    opener = openers[k % len(openers)]
+    question = f"{opener} {_DETAILS[(k // len(openers)) % len(_DETAILS)]}."
+    answer_pool = _ADVICE.get(topic, []) + _ADVICE["default"]
+    return {
+        "questionID": qid,
+        "questionTitle": opener,
+        "questionText": question,
+        "answerText": " ".join(rng.sample(answer_pool, k=min(2, len(answer_pool)))),
+        "topic": topic,
+        "therapistInfo": "Synthetic Counselor, LCSW",
+        "upvotes": rng.randint(0, 40),
+        "views": rng.randint(20, 500),
+    }
+
+
+def corpus_chunk(start: int, stop: int, seed: int = SEED) -> list:
+    """Corpus documents ``start..stop-1``, from a random stream of their own
+    (the same documents whichever worker builds them, in whatever order)."""
+    rng = random.Random(f"{seed}:corpus:{start}")
+    return [corpus_doc(qid, rng) for qid in range(start, stop)]
+
+
+def corpus_vectors(docs, embed) -> list:
+    """Index entries (id, vector, metadata) for corpus documents."""
+    vectors = embed.embed_documents([d["questionText"] for d in docs])
+    return [{"id": f"q{d['questionID']}", "values": vec,
+             "metadata": {"questionID": d["questionID"], "topic": d["topic"],
+                          "questionTitle": d["questionTitle"]}}
+            for d, vec in zip(docs, vectors)]
+
+
+def _index_docs(index, embed, docs, upsert_batch: int = 100) -> int:
+    batch = corpus_vectors(docs, embed)
+    for i in range(0, len(batch), upsert_batch):
+        index.upsert(vectors=batch[i:i + upsert_batch], namespace="default")
+    return len(batch)
+
+
+def seed_corpus(db, index, embed, n_docs: int, batch_size: int = 1000,
+                workers: int = 4, seed: int = SEED, out=print) -> int:
+    """Insert ``n_docs`` corpus documents and index them, chunk by chunk.
+
+    Each chunk is inserted unordered, then embedded and upserted on one of
+    ``workers`` threads while the next chunks are built, so MongoDB writes,
+    embedding and Pinecone upserts overlap. At most ``2 * workers`` chunks are
+    in flight.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    inserted, indexed = _Progress("corpus inserted", n_docs, out), _Progress("corpus indexed", n_docs, out)
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="seed-embed") as pool:
+        pending = deque()
+        for start in range(1, n_docs + 1, batch_size):
+            docs = corpus_chunk(start, min(n_docs + 1, start + batch_size), seed)
+            db[CORPUS_COLLECTION].insert_many(docs, ordered=False)
+            inserted.add(len(docs))
+            pending.append(pool.submit(_index_docs, index, embed, docs))
+            while len(pending) >= 2 * max(1, workers):
+                indexed.add(pending.popleft().result())
+        while pending:
+            indexed.add(pending.popleft().result())
+    return inserted.done
+
+
+def patient_records(i: int, rng=random, now=None, n_sessions=None) -> tuple:
+    """``(patient, sessions, conversations)`` for synthetic patient number ``i``
+    (2-4 sessions unless ``n_sessions`` is given)."""
+    now = now or datetime.now()
+    pid = f"PT-{i:04d}"
+    cond = CONDITIONS[rng.choice(list(CONDITIONS))]
+    mh = rng.sample(cond["history"], k=min(2, len(cond["history"])))
+    tg = rng.sample(cond["goals"], k=min(2, len(cond["goals"])))
+    patient = {"patient_id": pid, "medical_history": mh, "therapy_goals": tg}
+
+    sessions, conversations = [], []
+    n_sessions = n_sessions or rng.randint(2, 4)
+    for s in range(n_sessions):
+        days_ago = (n_sessions - s) * rng.randint(14, 40)
+        created = now - timedelta(days=days_ago)
+        sid = f"{pid}-S{s + 1}"
+        topics = rng.sample(cond["topics"], k=min(2, len(cond["topics"])))
+        risk = ["suicide_risk"] if rng.random() < 0.06 else []
+        sentiment = round(rng.uniform(-0.95, -0.2) + s * 0.2, 3)
+        sessions.append({
+            "session_id": sid, "patient_id": pid,
+            "detected_topics": topics, "recommendations": [],
+            "risk_flags": risk, "sentiment_score": sentiment,
+            "doctor_notes": rng.choice(["", "", "Patient engaged; reviewed coping plan.",
+                                        "Discussed sleep hygiene and follow-up."]),
+            "suggestions": [], "created_at": created,
+        })
+        conversations.append({
+            "session_id": sid, "patient_id": pid,
+            "messages": [
+                {"content": "How have you been since our last session?", "is_user": False,
+                 "speaker": "doctor", "timestamp": created, "metadata": {}},
+                {"content": f"{rng.choice(_OPENERS[topics[0]])} this week.", "is_user": True,
+                 "speaker": "patient", "timestamp": created, "metadata": {}},
+            ],
+            "created_at": created, "updated_at": created,
+        })
+    return patient, sessions, conversations
+
+
+def patient_chunk(start: int, stop: int, seed: int = SEED, now=None, n_sessions=None) -> dict:
+    """Documents for patients ``start..stop-1``, by collection, from a random
+    stream of their own (reproducible in any worker, in any order)."""
+    rng = random.Random(f"{seed}:patients:{start}")
+    chunk = {"patients": [], "sessions": [], "PatientConvo": []}
+    for i in range(start, stop):
+        patient, sessions, conversations = patient_records(i, rng, now, n_sessions)
+        chunk["patients"].append(patient)
+        chunk["sessions"].extend(sessions)
+        chunk["PatientConvo"].extend(conversations)
+    return chunk
+
+
+def _insert_chunk(db, chunk: dict) -> int:
+    for name, docs in chunk.items():
+        if docs:
+            db[name].insert_many(docs, ordered=False)
+    return len(chunk["patients"])
+
+
+def seed_patients(db, n_patients: int, sessions_per_patient=None, batch_size: int = 1000,
+                  workers: int | None = None, seed: int = SEED, out=print) -> dict:
+    """Generate and insert ``n_patients`` patients with their sessions and conversations.
+
+    Chunks of ``batch_size`` patients are generated across ``workers`` processes
+    (default: CPU count; ``<= 1`` in-process) and inserted unordered from a few
+    threads as they arrive. At most ``2 * workers`` chunks are in flight, so
+    memory stays bounded however many patients are seeded.
+    """
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
     now = datetime.now()
-    for i in range(1, n_patients + 1):
-        pid = f"PT-{i:04d}"
-        cond = CONDITIONS[random.choice(cond_keys)]
-        mh = random.sample(cond["history"], k=min(2, len(cond["history"])))
-        tg = random.sample(cond["goals"], k=min(2, len(cond["goals"])))
-        patients.append({"patient_id": pid, "medical_history": mh, "therapy_goals": tg})
-
-        n_sessions = random.randint(2, 4)
-        for s in range(n_sessions):
-            days_ago = (n_sessions - s) * random.randint(14, 40)
-            created = now - timedelta(days=days_ago)
-            sid = f"{pid}-S{s + 1}"
-            topics = random.sample(cond["topics"], k=min(2, len(cond["topics"])))
-            risk = ["suicide_risk"] if random.random() < 0.06 else []
-            sentiment = round(random.uniform(-0.95, -0.2) + s * 0.2, 3)
-            sessions.append({
-                "session_id": sid, "patient_id": pid,
-                "detected_topics": topics, "recommendations": [],
-                "risk_flags": risk, "sentiment_score": sentiment,
-                "doctor_notes": random.choice(["", "", "Patient engaged; reviewed coping plan.",
-                                               "Discussed sleep hygiene and follow-up."]),
-                "suggestions": [], "created_at": created,
-            })
-            conversations.append({
-                "session_id": sid, "patient_id": pid,
-                "messages": [
-                    {"content": f"How have you been since our last session?", "is_user": False,
-                     "speaker": "doctor", "timestamp": created, "metadata": {}},
-                    {"content": f"{random.choice(_OPENERS[topics[0]])} this week.", "is_user": True,
-                     "speaker": "patient", "timestamp": created, "metadata": {}},
-                ],
-                "created_at": created, "updated_at": created,
-            })
-    db["patients"].insert_many(patients)
-    db["sessions"].insert_many(sessions)
-    db["PatientConvo"].insert_many(conversations)
-    print(f"  inserted {len(patients)} patients, {len(sessions)} sessions, {len(conversations)} conversations")
-    return len(patients), len(sessions)
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    progress = _Progress("patients", n_patients, out)
+    starts = range(1, n_patients + 1, batch_size)
+    bounds = [(a, min(n_patients + 1, a + batch_size)) for a in starts]
+    with ThreadPoolExecutor(max_workers=4, thread_name_prefix="seed-insert") as writers:
+        inserts = deque()
+
+        def insert(chunk):
+            inserts.append(writers.submit(_insert_chunk, db, chunk))
+            while len(inserts) >= 8:
+                progress.add(inserts.popleft().result())
+
+        if workers <= 1:
+            for a, b in bounds:
+                insert(patient_chunk(a, b, seed, now, sessions_per_patient))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for a, b in bounds:
+                    pending.append(pool.submit(patient_chunk, a, b, seed, now, sessions_per_patient))
+                    if len(pending) >= 2 * workers:
+                        insert(pending.popleft().result())
+                while pending:
+                    insert(pending.popleft().result())
+        while inserts:
+            progress.add(inserts.popleft().result())
+    return {name: db[name].estimated_document_count()
+            for name in ("patients", "sessions", "PatientConvo")}
 
 
 def main():
+    from model_cache import get_embedding_model, get_pinecone_index
+
     ap = argparse.ArgumentParser()
     ap.add_argument("--confirm", action="store_true", help="actually wipe + reseed")
     ap.add_argument("--patients", type=int, default=50)
+    ap.add_argument("--sessions-per-patient", type=int, default=None,
+                    help="sessions per patient (default: 2-4 at random)")
+    ap.add_argument("--corpus", type=int, default=14 * len(_TOPICS), help="corpus documents")
+    ap.add_argument("--batch-size", type=int, default=1000, help="documents per chunk / insert")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="processes generating patient data (default: CPU count)")
+    ap.add_argument("--embed-workers", type=int, default=4,
+                    help="threads embedding + upserting corpus chunks")
     args = ap.parse_args()
 
     db = get_db()
@@ -236,17 +366,29 @@ def main():
 
     if not args.confirm:
         print("DRY RUN — pass --confirm to wipe MongoDB + Pinecone and reseed.")
-        print("Current counts:", {c: db[c].count_documents({}) for c in ("patients", "sessions", "PatientConvo")})
+        print("Current counts:", {c: db[c].estimated_document_count() for c in ("patients", "sessions", "PatientConvo")})
         return
 
     embed = get_embedding_model()
+    started = time.perf_counter()
     _wipe(db, index)
-    n_corpus = _build_corpus(db, index, embed)
-    n_pat, n_sess = _build_patients(db, args.patients)
+    print(f"Building {args.corpus:,} corpus documents…")
+    n_corpus = seed_corpus(db, index, embed, args.corpus, args.batch_size, args.embed_workers)
+    print(f"Building {args.patients:,} synthetic patients + sessions…")
+    counts = seed_patients(db, args.patients, args.sessions_per_patient, args.batch_size, args.workers)
+    print("Building indexes…")
+    _build_indexes()
+    print(f"  built {rebuild_summaries(db):,} patient summaries")
+    try:
+        import population_analytics
+        population_analytics.refresh(full=True, db=db)
+        print("  population rollups rebuilt")
+    except Exception as e:
+        print("  population rollups not rebuilt:", repr(e))
 
     print("\n=== DONE ===")
-    print({c: db[c].count_documents({}) for c in ("patients", "sessions", "PatientConvo")})
-    print(f"corpus docs: {n_corpus}, patients: {n_pat}, sessions: {n_sess}")
+    print(counts)
+    print(f"corpus docs: {n_corpus:,}, seeded in {time.perf_counter() - started:,.1f}s")
 
 
 if __name__ == "__main__":
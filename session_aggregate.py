@@ -0,0 +1,153 @@
+"""Session-level analytics, updated once per analysed patient turn.
+
+The report and the dashboard used to re-derive session signals from the whole
+transcript on every rerun (re-classifying the joined patient text, rebuilding
+the sentiment series). ``SessionAggregate.add_turn`` folds one turn's signals
+in, in O(1):
+
+- sentiment: count, running mean and variance (Welford), min / max, and the
+  per-turn series for the trajectory sparkline;
+- emotion histogram (the emotion model's label per turn);
+- topic distribution weighted by classifier confidence;
+- risk flags: counts, plus the first flag and the seconds from the session
+  start until it was raised (time-to-flag).
+
+``as_dict`` is stored on the ``SessionLog`` (``aggregate``), so reports and
+dashboards read precomputed values. A signal that is None (its stage degraded)
+is skipped rather than counted as neutral.
+"""
+import math
+from datetime import datetime
+
+# Mean sentiment within this of zero reads as Neutral overall.
+NEUTRAL_BAND = 0.05
+
+
+class SessionAggregate:
+    """Running analytics for one session; keep one instance per live session."""
+
+    def __init__(self, started_at: datetime | None = None):
+        self.started_at = started_at or datetime.now()
+        self.turns = 0
+        self.sentiment_count = 0
+        self.sentiment_mean = 0.0
+        self._sentiment_m2 = 0.0
+        self.sentiment_min = None
+        self.sentiment_max = None
+        self.sentiment_series = []
+        self.emotions = {}
+        self.topic_weights = {}
+        self.flags = {}
+        self.first_flag = None
+        self.first_flag_seconds = None
+
+    def add_turn(self, sentiment_score: float | None = None, emotion: str | None = None,
+                 topic: str | None = None, topic_confidence: float | None = None,
+                 flag_type: str | None = None, at: datetime | None = None) -> None:
+        """Fold one analysed turn into the aggregate."""
+        self.turns += 1
+        if sentiment_score is not None:
+            x = float(sentiment_score)
+            self.sentiment_count += 1
+            delta = x - self.sentiment_mean
+            self.sentiment_mean += delta / self.sentiment_count
+            self._sentiment_m2 += delta * (x - self.sentiment_mean)
+            self.sentiment_min = x if self.sentiment_min is None else min(self.sentiment_min, x)
+            self.sentiment_max = x if self.sentiment_max is None else max(self.sentiment_max, x)
+            self.sentiment_series.append(round(x, 4))
+        if emotion:
+            self.emotions[emotion] = self.emotions.get(emotion, 0) + 1
+        if topic:
+            weight = float(topic_confidence) if topic_confidence is not None else 1.0
+            self.topic_weights[topic] = self.topic_weights.get(topic, 0.0) + weight
+        if flag_type:
+            self.flags[flag_type] = self.flags.get(flag_type, 0) + 1
+            if self.first_flag is None:
+                self.first_flag = flag_type
+                elapsed = ((at or datetime.now()) - self.started_at).total_seconds()
+                self.first_flag_seconds = max(0.0, round(elapsed, 1))
+
+    @property
+    def sentiment_std(self) -> float:
+        if self.sentiment_count < 2:
+            return 0.0
+        return math.sqrt(self._sentiment_m2 / (self.sentiment_count - 1))
+
+    @property
+    def sentiment_label(self) -> str:
+        """Overall sentiment of the session, from the mean per-turn score."""
+        if self.sentiment_mean > NEUTRAL_BAND:
+            return "Positive"
+        if self.sentiment_mean < -NEUTRAL_BAND:
+            return "Negative"
+        return "Neutral"
+
+    def dominant_topic(self) -> tuple:
+        """``(topic, share of the confidence-weighted distribution)``, or ``(None, 0.0)``."""
+        if not self.topic_weights:
+            return None, 0.0
+        topic = max(self.topic_weights, key=self.topic_weights.get)
+        total = sum(self.topic_weights.values()) or 1.0
+        return topic, self.topic_weights[topic] / total
+
+    def summary_text(self) -> str:
+        """One line per signal, for the report prompt."""
+        if not self.turns:
+            return "(no analysed turns)"
+        lines = []
+        if self.sentiment_count:
+            lines.append(
+                f"Sentiment: {self.sentiment_label} overall (mean {self.sentiment_mean:+.2f}, "
+                f"sd {self.sentiment_std:.2f}, range {self.sentiment_min:+.2f} to "
+                f"{self.sentiment_max:+.2f}, first {self.sentiment_series[0]:+.2f} -> last "
+                f"{self.sentiment_series[-1]:+.2f} over {self.sentiment_count} turns)")
+        if self.emotions:
+            lines.append("Emotions: " + ", ".join(
+                f"{k} x{v}" for k, v in sorted(self.emotions.items(), key=lambda kv: -kv[1])))
+        if self.topic_weights:
+            total = sum(self.topic_weights.values()) or 1.0
+            lines.append("Topics (confidence-weighted): " + ", ".join(
+                f"{k} {v / total:.0%}"
+                for k, v in sorted(self.topic_weights.items(), key=lambda kv: -kv[1])[:5]))
+        if self.first_flag:
+            lines.append(f"First risk flag: {self.first_flag} after "
+                         f"{self.first_flag_seconds / 60:.1f} min")
+        return "\n".join(lines) or "(no analysed turns)"
+
+    def as_dict(self) -> dict:
+        """Plain (BSON-friendly) form, stored as ``SessionLog.aggregate``."""
+        topic, share = self.dominant_topic()
+        return {
+            "started_at": self.started_at,
+            "turns": self.turns,
+            "sentiment": {"count": self.sentiment_count, "mean": self.sentiment_mean,
+                          "m2": self._sentiment_m2, "std": self.sentiment_std,
+                          "min": self.sentiment_min, "max": self.sentiment_max,
+                          "label": self.sentiment_label, "series": list(self.sentiment_series)},
+            "emotions": dict(self.emotions),
+            "topics": dict(self.topic_weights),
+            "dominant_topic": topic,
+            "dominant_topic_share": share,
+            "flags": dict(self.flags),
+            "first_flag": self.first_flag,
+            "first_flag_seconds": self.first_flag_seconds,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SessionAggregate":
+        """Rebuild an aggregate from ``as_dict`` output (e.g. a stored session)."""
+        agg = cls(started_at=data.get("started_at"))
+        sentiment = data.get("sentiment") or {}
+        agg.turns = data.get("turns", 0)
+        agg.sentiment_count = sentiment.get("count", 0)
+        agg.sentiment_mean = sentiment.get("mean", 0.0)
+        agg._sentiment_m2 = sentiment.get("m2", 0.0)
+        agg.sentiment_min = sentiment.get("min")
+        agg.sentiment_max = sentiment.get("max")
+        agg.sentiment_series = list(sentiment.get("series") or [])
+        agg.emotions = dict(data.get("emotions") or {})
+        agg.topic_weights = dict(data.get("topics") or {})
+        agg.flags = dict(data.get("flags") or {})
+        agg.first_flag = data.get("first_flag")
+        agg.first_flag_seconds = data.get("first_flag_seconds")
+        return agg
@@ -1,5 +1,6 @@
 import json
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +52,10 @@ def parse_suggestions(text):
         out = dict(_EMPTY)
         out["_raw"] = (text or "").strip()
         return out
+    return _normalize(data)
+
+
+def _normalize(data):
     return {
         "emotional_state": str(data.get("emotional_state") or "").strip(),
         "state_confidence": str(data.get("state_confidence") or "low").strip().lower(),
@@ -62,24 +67,126 @@ def parse_suggestions(text):
     }
 
 
-def generate_session_suggestions(transcript, patient_summary, history_summary,
-                                 signals, examples, doctor_questions):
-    """Call the LLM for decision-support and return parsed suggestions.
+_KEY = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:')
 
-    The deterministic crisis flag is NOT produced here — it comes from
-    analyze_message's safety_protocol and is rendered first by render_suggestions.
+
+class SuggestionStream:
+    """Incremental parser for the decision-support JSON as the model streams it.
+
+    ``feed`` takes the next chunk of the reply and returns the names of the
+    fields that changed: a scalar field once its value is complete, a list
+    field each time one more item is complete. ``fields`` holds the values
+    parsed so far. Prose or a code fence before the object is skipped.
     """
-    from langchain.schema import HumanMessage
-    from model_cache import get_chat_groq
-    from prompt_templates import SESSION_ASSISTANT_TEMPLATE
+
+    def __init__(self):
+        self.text = ""
+        self.fields = {}
+        self.done = False
+        self._pos = 0
+        self._stack = []      # open containers, outermost first
+        self._in_str = False
+        self._escape = False
+        self._member = None   # start of the current top-level member
+        self._list_key = None  # key of the list value being read
+        self._item = None     # start of the current list item
+
+    def _finish_member(self, end, changed):
+        segment = self.text[self._member:end].strip()
+        self._member = end + 1
+        if not segment:
+            return
+        try:
+            member = json.loads("{" + segment + "}")
+        except ValueError:
+            return
+        for key, value in member.items():
+            self.fields[key] = value
+            changed.add(key)
+
+    def _finish_item(self, end, changed):
+        raw = self.text[self._item:end].strip()
+        self._item = None
+        if not raw or self._list_key is None:
+            return
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return
+        self.fields.setdefault(self._list_key, []).append(value)
+        changed.add(self._list_key)
+
+    def feed(self, chunk: str) -> set:
+        changed = set()
+        self.text += chunk or ""
+        text = self.text
+        for i in range(self._pos, len(text)):
+            if self.done:
+                break
+            c = text[i]
+            in_list = len(self._stack) == 2 and self._stack[-1] == "["
+            if self._in_str:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_str = False
+                continue
+            if c == '"':
+                self._in_str = True
+                if in_list and self._item is None:
+                    self._item = i
+            elif c in "{[":
+                if not self._stack:
+                    if c == "{":
+                        self._stack.append(c)
+                        self._member = i + 1
+                    continue
+                if in_list and self._item is None:
+                    self._item = i
+                self._stack.append(c)
+                if len(self._stack) == 2 and c == "[":
+                    keys = _KEY.findall(text, self._member, i)
+                    self._list_key = json.loads(f'"{keys[-1]}"') if keys else None
+                    self._item = None
+            elif c in "}]":
+                if not self._stack:
+                    continue
+                if in_list and self._item is not None:
+                    self._finish_item(i, changed)
+                self._stack.pop()
+                if not self._stack:
+                    self._finish_member(i, changed)
+                    self.done = True
+            elif c == ",":
+                if len(self._stack) == 1:
+                    self._finish_member(i, changed)
+                elif in_list and self._item is not None:
+                    self._finish_item(i, changed)
+            elif in_list and self._item is None and not c.isspace():
+                self._item = i
+        self._pos = len(text)
+        return changed
+
+    def suggestions(self) -> dict:
+        """The fields parsed so far, normalized like ``parse_suggestions``."""
+        return _normalize(self.fields)
+
+
+def _build_prompt(transcript, patient_summary, history_summary, signals, examples,
+                  doctor_questions):
+    from prompt_budget import build_prompt, truncate
+    from prompt_templates import SESSION_ASSISTANT_TEMPLATE, SESSION_ASSISTANT_BUDGET
 
     cases_text = ""
     for ex in (examples or [])[:3]:
         cases_text += (
-            f"- Patient: {(ex.get('questionText') or '')[:200]}\n"
-            f"  Therapist: {(ex.get('answerText') or '')[:200]}\n"
+            f"- Patient: {truncate(ex.get('questionText') or '', 60)}\n"
+            f"  Therapist: {truncate(ex.get('answerText') or '', 60)}\n"
         )
-    prompt = SESSION_ASSISTANT_TEMPLATE.format(
+    return build_prompt(
+        SESSION_ASSISTANT_TEMPLATE, SESSION_ASSISTANT_BUDGET,
         patient_summary=patient_summary or "(none)",
         history_summary=history_summary or "(no prior sessions)",
         signals=signals or "(none)",
@@ -87,17 +194,76 @@ def generate_session_suggestions(transcript, patient_summary, history_summary,
         doctor_questions=doctor_questions or "(none yet)",
         transcript=transcript or "",
     )
+
+
+def _failed():
+    # Flag the failure so the UI can distinguish "the model errored" from
+    # "the model ran and had nothing high-value to add".
+    out = dict(_EMPTY)
+    out["_error"] = "generation_failed"
+    return out
+
+
+def generate_session_suggestions(transcript, patient_summary, history_summary,
+                                 signals, examples, doctor_questions):
+    """Call the LLM for decision-support and return parsed suggestions.
+
+    The deterministic crisis flag is NOT produced here — it comes from
+    analyze_message's safety_protocol and is rendered first by render_suggestions.
+    """
+    import llm_cache
+
+    prompt = _build_prompt(transcript, patient_summary, history_summary, signals,
+                           examples, doctor_questions)
     try:
-        response = get_chat_groq().invoke([HumanMessage(content=prompt)])
-        text = response.content if hasattr(response, "content") else str(response)
-        return parse_suggestions(text)
+        return parse_suggestions(llm_cache.complete(prompt, purpose="suggestions"))
     except Exception:
         logger.exception("Session suggestion generation failed.")
-        # Flag the failure so the UI can distinguish "the model errored" from
-        # "the model ran and had nothing high-value to add".
-        out = dict(_EMPTY)
-        out["_error"] = "generation_failed"
-        return out
+        return _failed()
+
+
+def stream_session_suggestions(transcript, patient_summary, history_summary,
+                               signals, examples, doctor_questions):
+    """Streaming ``generate_session_suggestions``: yield the suggestions so far.
+
+    Each yield is the full normalized shape, filled in as fields (and list
+    items) complete in the model's reply, so red flags and the first question
+    can be shown before the whole JSON is written. The last yield is the
+    complete result, parsed exactly as ``parse_suggestions`` would.
+    """
+    import llm_cache
+
+    prompt = _build_prompt(transcript, patient_summary, history_summary, signals,
+                           examples, doctor_questions)
+    parser = SuggestionStream()
+    try:
+        for chunk in llm_cache.stream(prompt, purpose="suggestions"):
+            if parser.feed(chunk):
+                yield parser.suggestions()
+    except Exception:
+        logger.exception("Session suggestion generation failed.")
+        yield _failed()
+        return
+    yield parse_suggestions(parser.text)
+
+
+def suggestions_panel(data, analysis):
+    """HTML for the decision-support panel (also used while suggestions stream in)."""
+    import ui
+
+    data = data or {}
+    analysis = analysis or {}
+    return ui.decision_support(
+        state=data.get("emotional_state"),
+        confidence=data.get("state_confidence"),
+        red_flags=data.get("red_flags") or [],
+        missing=data.get("missing_info") or [],
+        questions=data.get("next_questions") or [],
+        follow_ups=data.get("follow_ups") or [],
+        caveat=data.get("caveat"),
+        error=bool(data.get("_error")),
+        degraded=analysis.get("errors") or [],
+    )
 
 
 def render_suggestions(data, analysis):
@@ -107,26 +273,12 @@ def render_suggestions(data, analysis):
     transcript) by the app; here we show the LLM aids and degraded-state notes.
     """
     import streamlit as st
-    import ui
     from explain import render_why
 
     data = data or {}
     analysis = analysis or {}
 
-    st.markdown(
-        ui.decision_support(
-            state=data.get("emotional_state"),
-            confidence=data.get("state_confidence"),
-            red_flags=data.get("red_flags") or [],
-            missing=data.get("missing_info") or [],
-            questions=data.get("next_questions") or [],
-            follow_ups=data.get("follow_ups") or [],
-            caveat=data.get("caveat"),
-            error=bool(data.get("_error")),
-            degraded=analysis.get("errors") or [],
-        ),
-        unsafe_allow_html=True,
-    )
+    st.markdown(suggestions_panel(data, analysis), unsafe_allow_html=True)
 
     if data.get("_raw"):
         with st.expander("Raw assistant output (could not parse as JSON)"):
@@ -9,15 +9,16 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-_MAX_TRANSCRIPT = 8000
+
+_NO_REPORT = "No summary could be generated for this session."
+_UNAVAILABLE = ("The report could not be generated right now (the language model was "
+                "unreachable). Please try again.")
 
 
-def generate_session_report(active: dict, transcript: str, notes: str) -> str:
-    """Return a markdown end-of-session summary for the active patient session."""
-    from langchain.schema import HumanMessage
-    from model_cache import get_chat_groq
-    from prompt_templates import REPORT_TEMPLATE
-    from patient_profile import get_patient_sessions
+def _build_prompt(active: dict, transcript: str, notes: str) -> str:
+    from prompt_budget import build_prompt
+    from prompt_templates import REPORT_TEMPLATE, REPORT_BUDGET
+    from patient_context import get_patient_context
     from patient_overview import build_patient_summary, build_history_summary
 
     active = active or {}
@@ -26,30 +27,58 @@ def generate_session_report(active: dict, transcript: str, notes: str) -> str:
     cur_session_id = active.get("session_id")
 
     try:
-        sessions = get_patient_sessions(pid) if pid else []
+        prior = (get_patient_context(pid, cur_session_id, profile=profile).prior_sessions
+                 if pid else [])
     except Exception:
         logger.exception("Failed to load sessions for the report")
-        sessions = []
-    prior = [s for s in sessions if s.get("session_id") != cur_session_id]
+        prior = []
 
-    t = transcript or "(no turns logged)"
-    if len(t) > _MAX_TRANSCRIPT:
-        t = t[:2000] + "\n…[earlier turns omitted]…\n" + t[-5000:]
-
-    prompt = REPORT_TEMPLATE.format(
+    return build_prompt(
+        REPORT_TEMPLATE, REPORT_BUDGET,
         patient_summary=build_patient_summary(profile),
         history_summary=build_history_summary(prior, limit=5),
         topics=", ".join(active.get("topics") or []) or "—",
         risk_flags=", ".join(active.get("risk_flags") or []) or "none",
+        signals=active["aggregate"].summary_text() if active.get("aggregate") else "—",
         notes=(notes or "").strip() or "(none)",
-        transcript=t,
+        transcript=transcript or "(no turns logged)",
     )
 
+
+def generate_session_report(active: dict, transcript: str, notes: str,
+                            refresh: bool = False) -> str:
+    """Return a markdown end-of-session summary for the active patient session.
+
+    ``refresh`` (the clinician asked to regenerate) writes a new report rather
+    than returning the cached one for the same session state.
+    """
+    import llm_cache
+
+    prompt = _build_prompt(active, transcript, notes)
     try:
-        resp = get_chat_groq().invoke([HumanMessage(content=prompt)])
-        text = resp.content if hasattr(resp, "content") else str(resp)
-        return (text or "").strip() or "No summary could be generated for this session."
+        text = llm_cache.complete(prompt, purpose="report", refresh=refresh)
+        return (text or "").strip() or _NO_REPORT
     except Exception:
         logger.exception("Session report generation failed")
-        return ("The report could not be generated right now (the language model was "
-                "unreachable). Please try again.")
+        return _UNAVAILABLE
+
+
+def stream_session_report(active: dict, transcript: str, notes: str, refresh: bool = False):
+    """Streaming ``generate_session_report``: yield the report in chunks as it is written."""
+    import llm_cache
+
+    prompt = _build_prompt(active, transcript, notes)
+    wrote = False
+    try:
+        for chunk in llm_cache.stream(prompt, purpose="report", refresh=refresh):
+            if not wrote:
+                chunk = chunk.lstrip()
+            if chunk:
+                wrote = True
+                yield chunk
+    except Exception:
+        logger.exception("Session report generation failed")
+        yield "\n\n_(The report was cut short — the language model stopped responding.)_" if wrote else _UNAVAILABLE
+        return
+    if not wrote:
+        yield _NO_REPORT
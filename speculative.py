@@ -0,0 +1,103 @@
+"""Speculative analysis of a patient turn while it is still being typed.
+
+The cockpit already streams the patient's draft to the crisis screen as it is
+logged. ``SpeculativeAnalysis.prefetch`` also starts the model stages (emotion,
+sentiment + topic, retrieval) on that draft in the background, so by the time
+the turn is sent its analysis is usually done and the turn waits on little
+more than the decision-support LLM call.
+
+``take`` hands the result to the real turn. A prefetch of the same text
+(ignoring whitespace) is reused whole, waiting for it if it is still running.
+When the final text only extends the prefetched draft, the retrieved examples
+are kept (they are prompt context, and a draft covering at least
+``speculative_retrieval_reuse`` of the turn finds the same cases) while the
+classifiers, which can flip on the last words, run again. Anything else runs
+as a normal turn. One prefetch runs per session at a time; of the drafts
+arriving meanwhile only the latest is kept, and it starts when the running
+prefetch finishes.
+"""
+import logging
+import threading
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+def _prefetch(text: str) -> dict:
+    from unified_guidance import prefetch_stages
+    return prefetch_stages(text)
+
+
+class SpeculativeAnalysis:
+    """One session's in-flight prefetch; keep one instance per live session."""
+
+    def __init__(self, min_chars: int | None = None, run=_prefetch):
+        self.min_chars = settings.speculative_min_chars if min_chars is None else min_chars
+        self._run = run
+        self._lock = threading.Lock()
+        self._text = None
+        self._future = None
+        self._queued = None  # latest draft that arrived while a prefetch ran
+
+    def prefetch(self, draft: str) -> bool:
+        """Start analysing ``draft`` unless it is too short or already analysed.
+        While another prefetch is running the draft is queued instead (replacing
+        any queued before it). Returns whether one started."""
+        text = _normalize(draft)
+        if not settings.speculative_prefetch or len(text) < self.min_chars:
+            return False
+        with self._lock:
+            if text == self._text:
+                self._queued = None
+                return False
+            if self._future is not None and not self._future.done():
+                self._queued = text
+                return False
+            future = self._start(text)
+        # Outside the lock: a future that is already done runs the callback here.
+        future.add_done_callback(self._start_queued)
+        return True
+
+    def _start(self, text: str):
+        # Caller holds the lock.
+        import background
+        self._text, self._queued = text, None
+        self._future = background.submit(self._run, text)
+        return self._future
+
+    def _start_queued(self, finished) -> None:
+        with self._lock:
+            if finished is not self._future or self._queued is None:
+                return
+            future = self._start(self._queued)
+        future.add_done_callback(self._start_queued)
+
+    def take(self, final: str) -> dict:
+        """Prefetched stage values reusable for the sent turn ``final`` (see
+        ``complete_analysis``); empty when none apply. Clears the prefetch."""
+        text = _normalize(final)
+        with self._lock:
+            draft, future = self._text, self._future
+            self._text = self._future = self._queued = None
+        if future is None:
+            return {}
+        exact = draft == text
+        extended = (text.startswith(draft) and future.done()
+                    and len(draft) >= settings.speculative_retrieval_reuse * len(text))
+        if not (exact or extended):
+            logger.debug("Speculative analysis missed; running the turn in full.")
+            return {}
+        try:
+            stages = future.result(timeout=settings.model_stage_timeout_seconds)
+        except Exception:  # failed, or still running past the stage deadline
+            logger.warning("Speculative analysis unavailable; running the turn in full.")
+            return {}
+        if not exact:
+            stages = {k: v for k, v in stages.items() if k == "retrieval"}
+        logger.debug("Speculative analysis reused: %s.", ", ".join(sorted(stages)) or "nothing")
+        return stages
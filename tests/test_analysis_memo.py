@@ -0,0 +1,106 @@
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import analysis_memo
+from config import settings
+
+
+@pytest.fixture(autouse=True)
+def fresh_memo():
+    analysis_memo.clear()
+    yield
+    analysis_memo.clear()
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+
+    def find_one(self, query, projection=None):
+        return self.docs.get(query["_id"])
+
+    def update_one(self, query, update, upsert=False):
+        self.docs.setdefault(query["_id"], dict(update["$setOnInsert"]))
+
+
+def test_a_text_is_analysed_once():
+    calls = []
+
+    def compute(text):
+        calls.append(text)
+        return ["anxiety", 0.7]
+
+    assert analysis_memo.memoized("topic", "m", "I worry", compute) == ("anxiety", 0.7)
+    assert analysis_memo.memoized("topic", "m", "I worry", compute) == ("anxiety", 0.7)
+    assert analysis_memo.memoized("topic", "other-model", "I worry", compute) == ("anxiety", 0.7)
+    assert calls == ["I worry", "I worry"]  # the model is part of the key
+    assert analysis_memo.stats()["memory_hits"] == 1
+
+
+def test_concurrent_requests_for_one_text_share_the_computation():
+    release = threading.Event()
+    calls = []
+
+    def compute(text):
+        calls.append(text)
+        release.wait(5)
+        return ("stress", 0.5)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        analysis_memo.memoized("topic", "m", "work", compute))) for _ in range(3)]
+    for t in threads:
+        t.start()
+    while analysis_memo.stats()["coalesced"] < 2:
+        pass
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert results == [("stress", 0.5)] * 3 and calls == ["work"]
+
+
+def test_the_store_is_shared_across_processes(monkeypatch):
+    store = FakeCollection()
+    monkeypatch.setattr(settings, "analysis_memo_store", True)
+    monkeypatch.setattr(analysis_memo, "_collection", lambda: store)
+
+    analysis_memo.memoized("sentiment", "m", "fine", lambda t: ("Positive", 0.9))
+    analysis_memo.clear()  # a fresh process: empty in-process memo
+    value = analysis_memo.memoized("sentiment", "m", "fine", lambda t: pytest.fail("recomputed"))
+    assert value == ("Positive", 0.9) and analysis_memo.stats()["store_hits"] == 1
+
+
+def test_the_sentiment_fallback_is_not_memoized(monkeypatch):
+    store = FakeCollection()
+    monkeypatch.setattr(settings, "analysis_memo_store", True)
+    monkeypatch.setattr(analysis_memo, "_collection", lambda: store)
+
+    def broken_model(text):
+        raise RuntimeError("inference failed")
+
+    monkeypatch.setitem(sys.modules, "patient_ml", SimpleNamespace(
+        SENTIMENT_MODEL="fake", classify_sentiment=broken_model,
+        fallback_sentiment=lambda text: ("Neutral", 0.0)))
+    assert analysis_memo.analyze_sentiment("so-so") == ("Neutral", 0.0)
+    assert analysis_memo.stats()["entries"] == 0 and not store.docs
+
+
+def test_archived_signals_seed_the_memo(monkeypatch):
+    monkeypatch.setitem(sys.modules, "patient_ml", SimpleNamespace(
+        SENTIMENT_MODEL="fake", classify_sentiment=lambda text: pytest.fail("model ran")))
+    analysis_memo.remember_message({"content": "I feel low", "metadata": {
+        "topic": "depression", "topic_confidence": 0.8,
+        "sentiment": "Negative", "sentiment_score": -0.6,
+        "urgency": {"is_urgent": False, "label": None, "score": None}}})
+    assert analysis_memo.analyze_sentiment("I feel low") == ("Negative", -0.6)
+    assert analysis_memo.stats()["entries"] == 2  # urgency had degraded: not seeded
+
+
+def test_a_crisis_turns_forced_urgency_is_not_seeded():
+    analysis_memo.remember_message({"content": "I want to end it all", "metadata": {
+        "safety_protocol": {"flag_type": "suicide_risk"},
+        "urgency": {"is_urgent": True, "label": "sadness", "score": 0.4}}})
+    assert analysis_memo.stats()["entries"] == 0
@@ -0,0 +1,65 @@
+import threading
+import time
+
+import background
+
+
+def test_submit_runs_and_returns_future():
+    future = background.submit(lambda a, b=0: a + b, 2, b=3)
+    assert future.result(timeout=5) == 5
+
+
+def test_failures_are_logged_and_kept_on_the_future(caplog):
+    def boom():
+        raise RuntimeError("model crashed")
+
+    future = background.submit(boom)
+    assert isinstance(future.exception(timeout=5), RuntimeError)
+    # The done-callback runs on the worker thread just after the result is set.
+    deadline = time.monotonic() + 5
+    while "Background job failed" not in caplog.text and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert "Background job failed" in caplog.text
+
+
+def test_gather_runs_steps_concurrently_with_deadlines():
+    def slow():
+        time.sleep(0.5)
+        return "late"
+
+    def broken():
+        raise ConnectionError("mongo down")
+
+    start = time.monotonic()
+    results, failed = background.gather(
+        {"fast": lambda: 1, "slow": slow, "broken": broken, "also_fast": lambda: 2},
+        deadlines={"slow": 0.1},
+    )
+    assert time.monotonic() - start < 0.4
+    assert results == {"fast": 1, "also_fast": 2}
+    assert failed == {"slow", "broken"}
+
+
+def test_gather_skips_deadlined_steps_when_the_pool_is_saturated(monkeypatch):
+    monkeypatch.setattr(background.settings, "gather_workers", 1)
+    monkeypatch.setattr(background, "_gather_in_flight", 0)
+    background.get_gather_executor.cache_clear()
+    release = threading.Event()
+    try:
+        # The straggler misses its deadline but keeps the only worker busy.
+        _, failed = background.gather({"straggler": release.wait}, deadlines={"straggler": 0.05})
+        assert failed == {"straggler"}
+
+        start = time.monotonic()
+        results, failed = background.gather(
+            {"context": lambda: "late", "prompt": lambda: "inline"},
+            deadlines={"context": 5.0},
+        )
+        assert time.monotonic() - start < 1.0
+        assert results == {"prompt": "inline"}
+        assert failed == {"context"}
+    finally:
+        release.set()
+        background.get_gather_executor().shutdown(wait=True)
+        background.get_gather_executor.cache_clear()
+    assert background._gather_in_flight == 0
@@ -0,0 +1,68 @@
+import benchmark
+from benchmark import Recorder, compare, percentile
+
+
+def test_percentile_interpolates_between_ranks():
+    values = [10.0, 20.0, 30.0, 40.0]
+    assert percentile(values, 0) == 10.0
+    assert percentile(values, 50) == 25.0
+    assert percentile(values, 100) == 40.0
+    assert percentile([], 95) == 0.0
+
+
+def test_recorder_summarises_latencies_and_counts_failures(monkeypatch):
+    ticks = iter([0.0, 0.010, 1.0, 1.030, 2.0])
+    monkeypatch.setattr(benchmark.time, "perf_counter", lambda: next(ticks))
+    rec = Recorder()
+    assert rec.time("analyze", lambda x: x * 2, 21) == 42
+    rec.time("analyze", lambda: None)
+
+    def boom():
+        raise RuntimeError("down")
+
+    assert rec.time("report", boom) is None
+    summary = rec.summary(wall_seconds=2.0)
+    assert summary["analyze"]["count"] == 2
+    assert summary["analyze"]["throughput_per_s"] == 1.0
+    assert (summary["analyze"]["p50_ms"], summary["analyze"]["max_ms"]) == (20.0, 30.0)
+    assert summary["report"] == {**summary["report"], "count": 0, "errors": 1}
+
+
+def test_compare_reports_stages_whose_p95_grew_past_tolerance():
+    baseline = {"turn": {"p95_ms": 100.0}, "ask": {"p95_ms": 50.0}}
+    current = {"turn": {"count": 8, "p95_ms": 110.0}, "ask": {"count": 2, "p95_ms": 80.0},
+               "report": {"count": 1, "p95_ms": 900.0}}
+    assert compare(current, baseline, tolerance=0.2) == [
+        {"stage": "ask", "baseline_p95_ms": 50.0, "p95_ms": 80.0, "change": 0.6}]
+
+
+def test_analytics_are_checked_against_the_session_logs():
+    from datetime import datetime
+
+    start, end = datetime(2026, 3, 1), datetime(2026, 4, 1)
+    sessions = [
+        {"patient_id": "PT-1", "created_at": datetime(2026, 3, 5, 10), "sentiment_score": -0.4,
+         "detected_topics": ["sleep", "sleep"], "risk_flags": ["suicide_risk"]},
+        # Started in March, last archived in April: counted on its start day.
+        {"patient_id": "PT-2", "created_at": datetime(2026, 4, 2),
+         "aggregate": {"started_at": datetime(2026, 3, 31, 23)}, "sentiment_score": None,
+         "detected_topics": ["sleep"], "risk_flags": []},
+        {"patient_id": "PT-3", "created_at": datetime(2026, 2, 27), "sentiment_score": 0.9},
+    ]
+    first_seen = {"PT-1": datetime(2025, 11, 2)}
+    expected = benchmark.expected_analytics(sessions, first_seen, start, end)
+    march = datetime(2026, 3, 1)
+    assert expected == {
+        "sessions": 2, "patients": 2, "topics": {"sleep": 2},
+        "flags": {"suicide_risk": (1, 1)},
+        "sentiment": {("2025-11", march): (1, -0.4), ("unknown", march): (1, 0.0)},
+    }
+
+    topics = {"sessions": 2, "topics": [{"label": "sleep", "sessions": 2}]}
+    flags = {"sessions": 2, "patients": 2,
+             "flags": [{"label": "suicide_risk", "sessions": 1, "patients": 1}]}
+    sentiment = {"cohorts": {
+        "2025-11": [{"month": march, "sessions": 1, "mean_sentiment": -0.4}],
+        "unknown": [{"month": march, "sessions": 1, "mean_sentiment": -0.2}]}}
+    assert benchmark.analytics_mismatches(expected, topics, flags, sentiment) == [
+        "sentiment unknown 2026-03: expected (1, 0.0), got (1, -0.2)"]
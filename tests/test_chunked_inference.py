@@ -0,0 +1,98 @@
+import pytest
+
+import patient_ml
+from chunked_inference import aggregate, classify_scores, split_windows, zero_shot_scores
+from config import settings
+
+
+class WordTokenizer:
+    """One token per word; ids index into the words seen."""
+
+    model_max_length = 10
+
+    def __init__(self):
+        self.words = []
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+    def encode(self, text, add_special_tokens=False):
+        ids = []
+        for word in text.split():
+            self.words.append(word)
+            ids.append(len(self.words) - 1)
+        return ids
+
+    def decode(self, ids, skip_special_tokens=True):
+        return " ".join(self.words[i] for i in ids)
+
+
+class FakeSentiment:
+    """Negative while any word is 'awful', else positive; records each batch."""
+
+    def __init__(self):
+        self.tokenizer = WordTokenizer()
+        self.batches = []
+
+    def __call__(self, windows, top_k=None, truncation=True, batch_size=8):
+        self.batches.append(list(windows))
+        neg = [0.9 if "awful" in w.split() else 0.1 for w in windows]
+        return [[{"label": "negative", "score": n}, {"label": "positive", "score": 1 - n}]
+                for n in neg]
+
+
+@pytest.fixture(autouse=True)
+def small_overlap(monkeypatch):
+    monkeypatch.setattr(settings, "inference_window_overlap_tokens", 2)
+
+
+def test_long_text_is_split_into_overlapping_windows_covering_it_all():
+    text = " ".join(f"w{i}" for i in range(20))
+    windows, weights = split_windows(text, WordTokenizer())
+    # 8-token windows (10 minus 2 special tokens) stepping by 6.
+    assert windows[0].split() == [f"w{i}" for i in range(8)]
+    assert windows[1].split()[0] == "w6"
+    assert windows[-1].split()[-1] == "w19"
+    assert weights == [8, 8, 8]
+    assert split_windows("short text", WordTokenizer()) == (["short text"], [2])
+    # Without a tokenizer: the old 512-character windows.
+    windows, _ = split_windows("x" * 1000)
+    assert len(windows[0]) == 512 and windows[-1].endswith("x") and len(windows) == 3
+
+
+def test_scores_are_aggregated_by_mean_or_max():
+    per_window = [{"sad": 0.2, "joy": 0.8}, {"sad": 0.9, "joy": 0.1}]
+    assert aggregate(per_window, [3, 1]) == pytest.approx({"sad": 0.375, "joy": 0.625})
+    assert aggregate(per_window, [3, 1], how="max") == {"sad": 0.9, "joy": 0.8}
+
+
+def test_every_window_runs_in_one_batch():
+    pipe = FakeSentiment()
+    text = " ".join(["fine"] * 16 + ["awful"] * 4)
+    scores = classify_scores(pipe, text)
+    assert len(pipe.batches) == 1 and len(pipe.batches[0]) == 3
+    assert scores["negative"] == pytest.approx((0.1 * 8 + 0.1 * 8 + 0.9 * 8) / 24)
+    # The tail is read, not cut off: the strongest window is the last one.
+    assert classify_scores(FakeSentiment(), text, how="max")["negative"] == 0.9
+
+
+def test_zero_shot_scores_average_the_windows():
+    class FakeZeroShot:
+        tokenizer = WordTokenizer()
+        tokenizer.model_max_length = 26  # 8 tokens left after the hypothesis reserve
+
+        def __call__(self, windows, candidate_labels, batch_size=8):
+            return [{"labels": ["sleep", "work"] if "bed" in w else ["work", "sleep"],
+                     "scores": [0.7, 0.3]} for w in windows]
+
+    text = " ".join(["office"] * 8 + ["bed"] * 12)
+    scores = zero_shot_scores(FakeZeroShot(), text, ["sleep", "work"])
+    assert max(scores, key=scores.get) == "sleep"
+
+
+def test_analyze_sentiment_reads_the_whole_text(monkeypatch):
+    pipe = FakeSentiment()
+    monkeypatch.setattr(patient_ml, "load_sentiment_model", lambda: pipe)
+    label, score = patient_ml.analyze_sentiment(" ".join(["awful"] * 30))
+    assert label == "Negative" and score == pytest.approx(-0.9)
+    assert len(pipe.batches[0]) > 1
@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+import pymongo
+import pytest
+
+import db
+
+
+def _settings(**overrides):
+    base = dict(
+        mongo_max_pool_size=20, mongo_min_pool_size=2, mongo_max_idle_time_ms=None,
+        mongo_connect_timeout_ms=5000, mongo_server_selection_timeout_ms=5000,
+        mongo_socket_timeout_ms=None, mongo_wait_queue_timeout_ms=1000,
+        mongo_compressors="", mongo_history_read_preference="primary",
+    )
+    base.update(overrides)
+    return SimpleNamespace(**base)
+
+
+def test_client_options_skip_unset_timeouts():
+    opts = db.client_options(_settings())
+    assert opts["maxPoolSize"] == 20 and opts["minPoolSize"] == 2
+    assert opts["waitQueueTimeoutMS"] == 1000
+    assert "socketTimeoutMS" not in opts and "maxIdleTimeMS" not in opts
+    assert "compressors" not in opts
+
+
+def test_client_options_compressors():
+    opts = db.client_options(_settings(mongo_compressors=" zstd, snappy ,"))
+    assert opts["compressors"] == ["zstd", "snappy"]
+
+
+def test_history_read_preference():
+    assert db.history_read_preference(_settings()) == pymongo.ReadPreference.PRIMARY
+    pref = db.history_read_preference(_settings(mongo_history_read_preference="secondaryPreferred"))
+    assert pref == pymongo.ReadPreference.SECONDARY_PREFERRED
+    with pytest.raises(ValueError):
+        db.history_read_preference(_settings(mongo_history_read_preference="fastest"))
+
+
+def test_pool_stats_tracks_checkouts_and_waits():
+    stats = db.PoolStats()
+    ev = SimpleNamespace(duration=0.02)
+    stats.connection_created(ev)
+    stats.connection_check_out_started(ev)
+    stats.connection_check_out_started(ev)
+    assert stats.snapshot()["waiting"] == 2
+    stats.connection_checked_out(ev)
+    stats.connection_check_out_failed(ev)
+    snap = stats.snapshot()
+    assert snap["waiting"] == 0 and snap["max_waiting"] == 2
+    assert snap["checked_out"] == 1 and snap["checkouts"] == 1
+    assert snap["checkout_failures"] == 1
+    assert snap["wait_ms_max"] == pytest.approx(20.0)
+    stats.connection_checked_in(ev)
+    assert stats.snapshot()["checked_out"] == 0
+    assert stats.snapshot()["max_checked_out"] == 1
+
+
+def test_ensure_indexes_retries_after_a_failure(monkeypatch):
+    class Collection:
+        def create_index(self, keys):
+            if state["down"]:
+                raise pymongo.errors.ServerSelectionTimeoutError("down")
+            state["created"] += 1
+
+    state = {"down": True, "created": 0}
+    client = SimpleNamespace(get_database=lambda name: {c: Collection() for c in db.INDEXES})
+    monkeypatch.setattr(db, "get_mongo_client", lambda: client)
+    monkeypatch.setattr(db, "_indexes_ready", False)
+    monkeypatch.setattr(db, "_indexes_retry_at", 0.0)
+    clock = [100.0]
+    monkeypatch.setattr(db.time, "monotonic", lambda: clock[0])
+
+    assert db.ensure_indexes() is False
+    state["down"] = False
+    assert db.ensure_indexes() is False  # still backing off
+    clock[0] += db._INDEX_RETRY_SECONDS
+    assert db.ensure_indexes() is True
+    created = state["created"]
+    assert db.ensure_indexes() is True and state["created"] == created  # success is kept
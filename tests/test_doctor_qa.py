@@ -0,0 +1,42 @@
+import llm_cache
+import doctor_qa
+
+
+def _use_stream(monkeypatch, stream):
+    monkeypatch.setattr(doctor_qa, "_build_prompt", lambda *a: "prompt")
+    monkeypatch.setattr(llm_cache, "stream", lambda prompt, purpose: stream())
+
+
+def test_answer_streams_in_chunks(monkeypatch):
+    _use_stream(monkeypatch, lambda: iter(["\n  From the 2026-05-28", " session: ", "sleep."]))
+    chunks = list(doctor_qa.stream_doctor_answer("q", {}, ""))
+    assert chunks == ["From the 2026-05-28", " session: ", "sleep."]
+
+
+def test_stream_falls_back_on_errors_and_empty_replies(monkeypatch):
+    def down():
+        raise ConnectionError("groq down")
+        yield
+
+    _use_stream(monkeypatch, down)
+    assert list(doctor_qa.stream_doctor_answer("q", {}, "")) == [doctor_qa._UNAVAILABLE]
+
+    def cut():
+        yield "Partial answer"
+        raise ConnectionError("stream dropped")
+
+    _use_stream(monkeypatch, cut)
+    chunks = list(doctor_qa.stream_doctor_answer("q", {}, ""))
+    assert chunks[0] == "Partial answer" and "cut short" in chunks[1]
+
+    _use_stream(monkeypatch, lambda: iter(["  "]))
+    assert list(doctor_qa.stream_doctor_answer("q", {}, "")) == [doctor_qa._NO_ANSWER]
+
+
+def test_prompt_failures_fall_back_too(monkeypatch):
+    def broken(*a):
+        raise KeyError("profile")
+
+    monkeypatch.setattr(doctor_qa, "_build_prompt", broken)
+    assert doctor_qa.answer_doctor_query("q", {}, "") == doctor_qa._UNAVAILABLE
+    assert list(doctor_qa.stream_doctor_answer("q", {}, "")) == [doctor_qa._UNAVAILABLE]
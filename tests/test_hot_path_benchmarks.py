@@ -0,0 +1,164 @@
+"""Micro-benchmarks for the pure functions run on every turn and every rerun.
+
+Inputs are sized like a long live session (120 turns, long patient turns, a
+patient with years of history). Each benchmark fails when its mean exceeds
+``BUDGET_MS``: the budgets leave generous headroom for slow CI machines and
+catch accidental quadratic work, not small drifts. They are the only gate the
+suite enforces; baselines are machine-specific and ``.benchmarks/`` is not
+committed, so drift checks are a manual comparison against a local baseline:
+
+    pytest tests/test_hot_path_benchmarks.py --benchmark-autosave
+    pytest tests/test_hot_path_benchmarks.py --benchmark-compare --benchmark-compare-fail=mean:25%
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import ui
+from explain import parse_advice
+from patient_overview import build_history_summary
+from safety import SafetyChecker
+from session_aggregate import SessionAggregate
+from session_assistant import _extract_json, parse_suggestions
+
+# Mean time per call, in milliseconds.
+BUDGET_MS = {
+    "check_input": 2.0,
+    "screen_long_transcript": 5.0,
+    "parse_advice": 0.5,
+    "extract_json": 0.5,
+    "parse_suggestions": 1.0,
+    "build_history_summary": 0.5,
+    "trajectory": 1.0,
+    "trajectory_aggregate": 0.5,
+    "transcript": 10.0,
+    "history_timeline": 10.0,
+    "decision_support": 1.0,
+}
+
+TURNS = 120
+_PATIENT = ("I've been feeling anxious most mornings and it affects my sleep; work has been "
+            "overwhelming and I keep replaying conversations with my manager at night. ")
+_DOCTOR = "How has that been for you this week, and what helped even a little?"
+
+
+def within_budget(benchmark, name: str) -> None:
+    benchmark.extra_info["budget_ms"] = BUDGET_MS[name]
+    if not benchmark.enabled:  # --benchmark-disable: run once, untimed
+        return
+    mean_ms = benchmark.stats.stats.mean * 1000
+    assert mean_ms <= BUDGET_MS[name], f"{name}: {mean_ms:.3f} ms > budget {BUDGET_MS[name]} ms"
+
+
+def _conversation():
+    out = []
+    for i in range(TURNS):
+        out.append({"speaker": "doctor", "content": _DOCTOR})
+        out.append({"speaker": "patient", "content": _PATIENT,
+                    "analysis": {"sentiment_score": ((i % 7) - 3) / 4, "topic": "anxiety"}})
+    return out
+
+
+def _sessions(n=200):
+    start = datetime(2020, 1, 6)
+    return [{"session_id": f"PT-0001-S{i}", "created_at": start + timedelta(days=14 * i),
+             "detected_topics": ["anxiety", "sleep-improvement"],
+             "risk_flags": ["suicide_risk"] if i % 17 == 0 else [],
+             "sentiment_score": -0.4 + (i % 9) / 10} for i in reversed(range(n))]
+
+
+_SUGGESTIONS = json.dumps({
+    "emotional_state": "Anxious and tired, some hopelessness about work",
+    "state_confidence": "Medium",
+    "next_questions": [f"Consider asking about stressor {i}" for i in range(6)],
+    "follow_ups": [f"Revisit item {i} next session" for i in range(4)],
+    "missing_info": ["Duration of the current symptoms", "Medication changes"],
+    "red_flags": ["Possible hopelessness - check in directly"],
+    "caveat": "Decision support only.",
+}, indent=2)
+_REPLY = f"Here is the decision support you asked for:\n```json\n{_SUGGESTIONS}\n```\nLet me know."
+
+
+def test_check_input(benchmark):
+    checker = SafetyChecker()
+    text = _PATIENT * 12 + "Sometimes I feel like I want to disappear."
+    benchmark(checker.check_input, text)
+    within_budget(benchmark, "check_input")
+
+
+def test_screen_long_transcript(benchmark):
+    turn = "I had a rough week at work and couldn't sleep, my manager keeps piling on tasks. "
+    transcript = turn * 125 + "and sometimes I want to end it all."  # ~10k chars
+    result = benchmark(SafetyChecker().screen, transcript)
+    assert result["protocol"]["flag_type"] == "suicide_risk"
+    within_budget(benchmark, "screen_long_transcript")
+
+
+def test_parse_advice(benchmark):
+    advice = ("Advice: " + "Acknowledge the patient's feelings and validate them. " * 10 +
+              "\nRationale: " + "Similar cases responded well to validation first. " * 8 +
+              "\nSuggested Actions: " + " ".join(f"{i}. Explore stressor {i}." for i in range(1, 9)))
+    result = benchmark(parse_advice, advice)
+    assert result["rationale"]
+    within_budget(benchmark, "parse_advice")
+
+
+def test_extract_json(benchmark):
+    assert benchmark(_extract_json, _REPLY)["state_confidence"] == "Medium"
+    within_budget(benchmark, "extract_json")
+
+
+def test_parse_suggestions(benchmark):
+    assert len(benchmark(parse_suggestions, _REPLY)["next_questions"]) == 6
+    within_budget(benchmark, "parse_suggestions")
+
+
+def test_build_history_summary(benchmark):
+    sessions = _sessions()
+    assert benchmark(build_history_summary, sessions).count("\n") == 4
+    within_budget(benchmark, "build_history_summary")
+
+
+def test_trajectory(benchmark):
+    dashboard = pytest.importorskip("dashboard")
+    assert benchmark(dashboard.trajectory, _conversation())[3]
+    within_budget(benchmark, "trajectory")
+
+
+def test_trajectory_from_aggregate(benchmark):
+    dashboard = pytest.importorskip("dashboard")
+    agg = SessionAggregate()
+    for m in _conversation():
+        if m.get("analysis"):
+            agg.add_turn(sentiment_score=m["analysis"]["sentiment_score"])
+    assert benchmark(dashboard.trajectory, None, agg)[3]
+    within_budget(benchmark, "trajectory_aggregate")
+
+
+def test_transcript(benchmark):
+    messages = [{"speaker": m["speaker"], "text": m["content"], "time": "10:42",
+                 "chips": [("anxious 0.81", "#fbf3e4", "#8a6a1f"), ("anxiety", "#eaf0fd", "#3052b8")]
+                 if m["speaker"] == "patient" else [], "crisis": False}
+                for m in _conversation()]
+    html = benchmark(ui.transcript, messages, TURNS)
+    assert html.count("Patient</span>") == TURNS
+    within_budget(benchmark, "transcript")
+
+
+def test_history_timeline(benchmark):
+    items = [{"date": s["created_at"].strftime("%Y-%m-%d"), "topics": s["detected_topics"],
+              "score": s["sentiment_score"], "flag": (s["risk_flags"] or [None])[0]}
+             for s in _sessions()]
+    benchmark(ui.history_timeline, items)
+    within_budget(benchmark, "history_timeline")
+
+
+def test_decision_support(benchmark):
+    data = parse_suggestions(_REPLY)
+    benchmark(ui.decision_support, data["emotional_state"], data["state_confidence"],
+              data["red_flags"], data["missing_info"], data["next_questions"],
+              data["follow_ups"], data["caveat"], degraded=["retrieval"])
+    within_budget(benchmark, "decision_support")
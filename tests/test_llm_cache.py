@@ -0,0 +1,96 @@
+import sys
+import types
+
+import pytest
+
+import llm_cache
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+        self.response_metadata = {"token_usage": {"total_tokens": 42}}
+
+
+class FakeModel:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return FakeResponse(self.replies.pop(0))
+
+    def stream(self, messages):
+        self.calls += 1
+        for word in self.replies.pop(0).split(" "):
+            yield FakeResponse(word + " ")
+
+
+@pytest.fixture
+def model(monkeypatch):
+    fake = FakeModel(["first", "second", "third"])
+    temperatures = []
+
+    def get_chat_model(temperature=0.7):
+        temperatures.append(temperature)
+        return fake
+
+    monkeypatch.setitem(sys.modules, "model_cache", types.SimpleNamespace(
+        CHAT_TEMPERATURE=0.7, chat_model_name=lambda: "test-model", get_chat_model=get_chat_model))
+    schema = types.SimpleNamespace(HumanMessage=lambda content: content)
+    monkeypatch.setitem(sys.modules, "langchain", types.SimpleNamespace(schema=schema))
+    monkeypatch.setitem(sys.modules, "langchain.schema", schema)
+    llm_cache.clear()
+    fake.temperatures = temperatures
+    yield fake
+    llm_cache.clear()
+
+
+def test_identical_prompts_hit_the_cache(model):
+    assert llm_cache.complete("prompt A", purpose="report") == "first"
+    assert llm_cache.complete("prompt A", purpose="report") == "first"
+    assert llm_cache.complete("prompt B", purpose="advice") == "second"
+    assert model.calls == 2
+
+    stats = llm_cache.stats()
+    assert stats["by_purpose"]["report"] == {"hits": 1, "misses": 1}
+    assert stats["by_purpose"]["advice"] == {"hits": 0, "misses": 1}
+    assert stats["tokens_saved"] == 42
+
+
+def test_disabled_cache_always_calls_the_model(model, monkeypatch):
+    monkeypatch.setattr(llm_cache.settings, "llm_cache_enabled", False)
+    llm_cache.complete("prompt A")
+    llm_cache.complete("prompt A")
+    assert model.calls == 2
+
+
+def test_cache_temperature_selects_the_model_and_the_key(model, monkeypatch):
+    llm_cache.complete("prompt A")
+    monkeypatch.setattr(llm_cache.settings, "llm_cache_temperature", 0.2)
+    assert llm_cache.complete("prompt A") == "second"
+    assert model.temperatures == [0.7, 0.2]
+
+
+def test_empty_completions_are_not_stored(model):
+    model.replies = ["  ", "answer"]
+    assert llm_cache.complete("prompt A").strip() == ""
+    assert llm_cache.complete("prompt A") == "answer"
+    assert model.calls == 2
+
+
+def test_streamed_completions_are_cached_whole(model):
+    model.replies = ["one two three"]
+    assert "".join(llm_cache.stream("prompt A")) == "one two three "
+    assert list(llm_cache.stream("prompt A")) == ["one two three "]
+    assert llm_cache.complete("prompt A") == "one two three "
+    assert model.calls == 1
+
+
+def test_a_forced_refresh_calls_the_model_and_replaces_the_entry(model):
+    assert llm_cache.complete("prompt A", purpose="report") == "first"
+    assert llm_cache.complete("prompt A", purpose="report", refresh=True) == "second"
+    assert llm_cache.complete("prompt A", purpose="report") == "second"
+    assert "".join(llm_cache.stream("prompt A", purpose="report", refresh=True)) == "third "
+    assert model.calls == 3
@@ -0,0 +1,139 @@
+import threading
+
+import pytest
+
+from llm_gateway import LLMGateway, LLMGatewayBusy, TokenBucket, is_rate_limited
+from local_llm import LocalLLMError, LocalMessage
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def gateway(**kwargs):
+    clock = FakeClock()
+    kwargs.setdefault("rate_per_second", 0)
+    return LLMGateway(max_in_flight=kwargs.pop("max_in_flight", 2), max_retries=kwargs.pop("max_retries", 3),
+                      backoff_base=0.5, backoff_max=8, queue_timeout=5,
+                      clock=clock, sleep=clock.sleep, **kwargs), clock
+
+
+def test_token_bucket_allows_a_burst_then_paces():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock, sleep=clock.sleep)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.slept == []
+    bucket.acquire()
+    assert clock.slept == [pytest.approx(0.5)]
+    with pytest.raises(LLMGatewayBusy):
+        bucket.acquire(deadline=clock.now + 0.1)
+
+
+def test_rate_limited_calls_are_retried_with_backoff():
+    gw, clock = gateway()
+    attempts = []
+
+    def call():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise LocalLLMError(429)
+        return "ok"
+
+    assert gw.invoke("k", call) == "ok"
+    assert len(attempts) == 3
+    assert len(clock.slept) == 2 and 0.25 <= clock.slept[0] <= 0.5 and 0.5 <= clock.slept[1] <= 1.0
+    stats = gw.stats()
+    assert stats["retries"] == 2 and stats["rate_limited"] == 2 and stats["in_flight"] == 0
+
+
+def test_other_errors_and_exhausted_retries_propagate():
+    gw, _ = gateway(max_retries=1)
+
+    def fail(status):
+        def call():
+            raise LocalLLMError(status)
+        return call
+
+    with pytest.raises(LocalLLMError):
+        gw.invoke("a", fail(503))
+    with pytest.raises(LocalLLMError):
+        gw.invoke("b", fail(429))
+    stats = gw.stats()
+    assert stats["failures"] == 2 and stats["retries"] == 1
+    assert is_rate_limited(LocalLLMError(429)) and not is_rate_limited(ValueError())
+
+
+def test_identical_concurrent_calls_are_coalesced():
+    gw, _ = gateway()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "reply"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(gw.invoke("same", slow)))
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    while gw.stats()["coalesced"] < 3:
+        pass
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert results == ["reply"] * 4 and len(calls) == 1
+
+
+def test_in_flight_cap_fails_fast_when_no_slot_frees():
+    gw, _ = gateway(max_in_flight=1)
+    gw.queue_timeout = 0.05
+    release = threading.Event()
+    worker = threading.Thread(target=gw.invoke, args=("a", lambda: release.wait(5)))
+    worker.start()
+    while gw.stats()["in_flight"] < 1:
+        pass
+    with pytest.raises(LLMGatewayBusy):
+        gw.invoke("b", lambda: "never")
+    release.set()
+    worker.join(5)
+    assert gw.stats()["busy"] == 1 and gw.stats()["peak_in_flight"] == 1
+
+
+def test_streams_are_retried_before_the_first_chunk_and_shared():
+    gw, _ = gateway()
+    attempts = []
+
+    def upstream():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise LocalLLMError(429)
+        yield from (LocalMessage(w) for w in ["a ", "b ", "", "c"])
+
+    assert "".join(gw.stream("s", upstream)) == "a b c"
+    assert len(attempts) == 2
+
+
+def test_a_stream_that_fails_midway_is_not_retried():
+    gw, _ = gateway()
+
+    def upstream():
+        yield LocalMessage("partial ")
+        raise LocalLLMError(429)
+
+    chunks = []
+    with pytest.raises(LocalLLMError):
+        for chunk in gw.stream("s", upstream):
+            chunks.append(chunk)
+    assert chunks == ["partial "] and gw.stats()["retries"] == 0
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from local_llm import LocalChatModel, LocalLLMError, reply_for
+
+
+class Clock:
+    def __init__(self):
+        self.slept = []
+
+    def __call__(self, seconds):
+        self.slept.append(seconds)
+
+
+def test_replies_are_deterministic_and_fit_the_template():
+    prompt = "...Produce decision-support as STRICT JSON with exactly these keys..."
+    assert reply_for(prompt) == reply_for(prompt)
+    assert set(json.loads(reply_for(prompt))) >= {"emotional_state", "next_questions", "red_flags"}
+    assert reply_for("advice please").startswith("Advice:")
+
+
+def test_streaming_rate_and_latency_are_simulated():
+    clock = Clock()
+    model = LocalChatModel(latency="fixed", latency_ms=250, tokens_per_second=100,
+                           failure_rate=0.0, sleep=clock)
+    chunks = [c.content for c in model.stream("hello")]
+    assert "".join(chunks) == reply_for("hello")
+    assert clock.slept[0] == 0.25
+    assert clock.slept[1:] == [0.01] * (len(chunks) - 1)
+
+    reply = model.invoke("hello")
+    assert reply.content == reply_for("hello")
+    assert reply.response_metadata["token_usage"]["total_tokens"] > 0
+
+
+def test_lognormal_latency_has_the_configured_mean_and_replays_with_the_seed():
+    def delays(seed):
+        model = LocalChatModel(latency="lognormal", latency_ms=400, seed=seed, sleep=lambda s: None)
+        return [model._first_token_delay() for _ in range(4000)]
+
+    sample = delays(7)
+    assert sample == delays(7)
+    assert 0.37 < sum(sample) / len(sample) < 0.43
+    assert sorted(sample)[int(0.99 * len(sample))] > 0.8  # a real tail
+
+
+def test_failure_injection():
+    model = LocalChatModel(failure_rate=1.0, failure_status=429, sleep=lambda s: None)
+    with pytest.raises(LocalLLMError) as err:
+        model.invoke("hello")
+    assert err.value.status_code == 429
@@ -0,0 +1,29 @@
+from local_vectors import DIMENSIONS, HashingEmbeddings, LocalIndex
+
+
+def test_embeddings_are_deterministic_and_normalised():
+    embed = HashingEmbeddings()
+    a, b = embed.embed_documents(["I can't sleep at night", "I can't sleep at night"])
+    assert a == b and len(a) == DIMENSIONS
+    assert abs(sum(x * x for x in a) - 1.0) < 1e-9
+    assert embed.embed_query("") == [0.0] * DIMENSIONS
+
+
+def test_query_ranks_by_similarity_and_upsert_replaces():
+    embed, index = HashingEmbeddings(), LocalIndex()
+    texts = {"q1": "I can't sleep at night", "q2": "Work stress is crushing me",
+             "q3": "My sleep is broken and I wake up tired"}
+    index.upsert([{"id": k, "values": embed.embed_query(v), "metadata": {"questionID": k}}
+                  for k, v in texts.items()], namespace="default")
+    matches = index.query(vector=embed.embed_query("sleep at night"), top_k=2,
+                          namespace="default", include_metadata=True)["matches"]
+    assert [m["id"] for m in matches] == ["q1", "q3"]
+    assert matches[0]["metadata"] == {"questionID": "q1"}
+
+    index.upsert([{"id": "q1", "values": embed.embed_query("work deadlines")}], namespace="default")
+    top = index.query(vector=embed.embed_query("sleep at night"), top_k=1, namespace="default")
+    assert top["matches"][0]["id"] == "q3"
+    assert index.describe_index_stats()["total_vector_count"] == 3
+
+    index.delete(delete_all=True, namespace="default")
+    assert index.query(vector=embed.embed_query("sleep"), namespace="default")["matches"] == []
@@ -0,0 +1,73 @@
+import pytest
+
+import patient_context
+import patient_profile
+from patient_context import (
+    get_patient_context, invalidate_patient_context, clear_patient_contexts,
+)
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Stub the Mongo-backed loaders and count how often each is hit."""
+    counts = {"record": 0, "conversation": 0}
+    timeline = [{"session_id": "LIVE", "created_at": "2026-06-03"},
+                {"session_id": "S2", "created_at": "2026-06-02"},
+                {"session_id": "S1", "created_at": "2026-06-01"}]
+
+    def fake_record(pid):
+        counts["record"] += 1
+        return None, {"session_count": 3, "timeline": timeline}
+
+    def fake_conversation(session_id, max_messages=None):
+        counts["conversation"] += 1
+        return {"session_id": session_id, "patient_id": "P1",
+                "messages": [{"content": "hi", "speaker": "patient"}]}
+
+    monkeypatch.setattr(patient_profile, "get_patient_record", fake_record)
+    monkeypatch.setattr(patient_profile, "get_conversation", fake_conversation)
+    clear_patient_contexts()
+    yield counts
+    clear_patient_contexts()
+
+
+def test_context_is_loaded_once_per_live_session(calls):
+    a = get_patient_context("P1", "LIVE", profile={"patient_id": "P1"})
+    b = get_patient_context("P1", "LIVE")
+    assert a is b
+    assert calls["record"] == 1
+    # The live session (archived every turn) is not part of the prior history.
+    assert a.last_session["session_id"] == "S2"
+    assert a.session_count == 2
+
+
+def test_last_transcript_is_loaded_lazily_once(calls):
+    ctx = get_patient_context("P1", "LIVE", profile={})
+    assert calls["conversation"] == 0
+    assert ctx.last_transcript()[0]["content"] == "hi"
+    ctx.last_transcript()
+    assert calls["conversation"] == 1
+
+
+def test_archiving_the_live_session_keeps_its_context(calls):
+    ctx = get_patient_context("P1", "LIVE", profile={})
+    invalidate_patient_context("P1", "LIVE")
+    assert get_patient_context("P1", "LIVE") is ctx
+
+
+def test_archiving_another_session_invalidates(calls):
+    ctx = get_patient_context("P1", "LIVE", profile={})
+    other = get_patient_context("P2", "LIVE2", profile={})
+    invalidate_patient_context("P1", "OTHER")
+    assert get_patient_context("P1", "LIVE", profile={}) is not ctx
+    assert get_patient_context("P2", "LIVE2") is other
+
+
+def test_load_failure_is_not_cached(monkeypatch, calls):
+    def boom(*a, **k):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(patient_profile, "get_patient_record", boom)
+    with pytest.raises(RuntimeError):
+        get_patient_context("P1", "LIVE", profile={})
+    assert ("P1", "LIVE") not in patient_context._contexts
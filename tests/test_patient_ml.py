@@ -35,3 +35,29 @@ def test_analyze_sentiment_falls_back_when_model_unavailable(monkeypatch):
     label, score = analyze_sentiment("I feel sad and depressed")
     assert label == "Negative"
     assert score < 0
+
+
+def test_training_reuses_the_stored_turn_signals(monkeypatch):
+    import sys
+    from types import SimpleNamespace
+
+    import analysis_memo
+
+    analysed = []
+    monkeypatch.setitem(sys.modules, "patient_profile", SimpleNamespace(
+        get_patient_conversation=lambda pid: {"messages": [
+            {"content": "Hello", "is_user": False},
+            {"content": "I feel low", "is_user": True,
+             "metadata": {"sentiment": "Negative", "sentiment_score": -0.8}},
+            {"content": "Work is awful", "is_user": True,
+             "metadata": {"sentiment": "Negative", "sentiment_score": -0.6}},
+            {"content": "Sleep is better", "is_user": True, "metadata": {}},
+        ]}))
+    monkeypatch.setattr(patient_ml, "classify_sentiment",
+                        lambda text: analysed.append(text) or ("Positive", 0.5))
+    analysis_memo.clear()
+    try:
+        assert patient_ml.train_patient_ml_model("PT-0001") == "negative"
+    finally:
+        analysis_memo.clear()
+    assert analysed == ["Sleep is better"]  # only the turn without stored signals
@@ -0,0 +1,63 @@
+from datetime import datetime
+
+from patient_profile import _history_query, _projection, SESSION_SUMMARY_FIELDS
+
+
+def test_projection_none_returns_whole_document():
+    assert _projection(None) is None
+
+
+def test_projection_always_carries_sort_keys():
+    p = _projection(("detected_topics",))
+    assert p == {"detected_topics": 1, "_id": 0, "created_at": 1, "session_id": 1}
+
+
+def test_summary_projection_excludes_audit_trail():
+    p = _projection(SESSION_SUMMARY_FIELDS)
+    assert "suggestions" not in p and "messages" not in p
+
+
+def test_history_query_first_page():
+    assert _history_query("P1") == {"patient_id": "P1"}
+
+
+def test_history_query_excludes_live_session():
+    q = _history_query("P1", exclude_session_id="S9")
+    assert q["session_id"] == {"$ne": "S9"}
+
+
+def test_history_query_keyset_continues_after_last_item():
+    ts = datetime(2026, 6, 1)
+    q = _history_query("P1", after={"created_at": ts, "session_id": "S3"})
+    assert q["patient_id"] == "P1"
+    assert {"created_at": {"$lt": ts}} in q["$or"]
+    assert {"created_at": ts, "session_id": {"$lt": "S3"}} in q["$or"]
+
+
+class _FakeCursor(list):
+    def sort(self, *args):
+        return self
+
+    def limit(self, n):
+        return _FakeCursor(self[:n])
+
+
+def test_recent_patients_reads_summaries_and_pads_with_unseen(monkeypatch):
+    import patient_profile
+
+    class Patients:
+        queries = []
+
+        def find(self, query, projection):
+            self.queries.append(query)
+            if query == {"summary.last_seen": {"$ne": None}}:
+                return _FakeCursor([{"patient_id": "P2", "summary": {"timeline": [
+                    {"session_id": "S9", "risk_flags": ["suicide_risk"]}]}}])
+            return _FakeCursor([{"patient_id": "P7"}, {"patient_id": "P8"}])
+
+    patients = Patients()
+    monkeypatch.setattr(patient_profile, "get_db", lambda **kw: {"patients": patients})
+    out = patient_profile.get_recent_patients(limit=2)
+    assert out == [{"patient_id": "P2", "last": {"session_id": "S9", "risk_flags": ["suicide_risk"]}},
+                   {"patient_id": "P7", "last": None}]
+    assert len(patients.queries) == 2
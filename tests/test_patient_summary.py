@@ -0,0 +1,86 @@
+from datetime import datetime
+
+from patient_summary import summarize, summary_update, summary_view, TIMELINE_LIMIT
+
+
+def _log(sid, day, topics=(), flags=(), score=0.0):
+    return {"session_id": sid, "patient_id": "P1", "created_at": datetime(2026, 6, day),
+            "detected_topics": list(topics), "risk_flags": list(flags), "sentiment_score": score}
+
+
+def test_summarize_counts_sessions_topics_and_flags():
+    s = summarize([_log("S2", 2, ["anxiety", "stress"], ["suicide_risk"], -0.5),
+                   _log("S1", 1, ["anxiety"], [], 0.25)])
+    assert s["session_count"] == 2
+    assert s["topic_counts"] == {"anxiety": 2, "stress": 1}
+    assert s["risk_flag_counts"] == {"suicide_risk": 1}
+    assert s["sentiment_total"] == -0.25
+    assert s["first_seen"] == datetime(2026, 6, 1) and s["last_seen"] == datetime(2026, 6, 2)
+    assert [t["session_id"] for t in s["timeline"]] == ["S2", "S1"]
+
+
+def test_summarize_caps_timeline_and_omits_unknown_dates():
+    s = summarize([_log(f"S{i}", 1) for i in range(TIMELINE_LIMIT + 5)])
+    assert len(s["timeline"]) == TIMELINE_LIMIT
+    assert "first_seen" not in summarize([])
+
+
+def test_new_session_update_increments_and_pushes():
+    update, filters = summary_update(_log("S3", 3, ["grief"], ["abuse_disclosure"], -0.2), None)
+    assert filters is None
+    assert update["$inc"]["summary.session_count"] == 1
+    assert update["$inc"]["summary.topic_counts.grief"] == 1
+    assert update["$inc"]["summary.risk_flag_counts.abuse_disclosure"] == 1
+    push = update["$push"]["summary.timeline"]
+    assert push["$slice"] == TIMELINE_LIMIT and push["$sort"] == {"created_at": -1}
+    assert update["$max"]["summary.last_seen"] == datetime(2026, 6, 3)
+
+
+def test_rearchive_applies_only_the_difference():
+    previous = _log("S3", 3, ["grief"], [], -0.2)
+    update, filters = summary_update(_log("S3", 3, ["grief", "stress"], ["suicide_risk"], -0.5),
+                                     previous)
+    inc = update["$inc"]
+    assert "summary.session_count" not in inc
+    assert "summary.topic_counts.grief" not in inc
+    assert inc["summary.topic_counts.stress"] == 1
+    assert inc["summary.risk_flag_counts.suicide_risk"] == 1
+    assert round(inc["summary.sentiment_total"], 6) == -0.3
+    assert "$push" not in update
+    assert update["$set"]["summary.timeline.$[t]"]["session_id"] == "S3"
+    assert filters == [{"t.session_id": "S3"}]
+
+
+def test_unchanged_rearchive_has_no_counter_changes():
+    log = _log("S3", 3, ["grief"], [], -0.2)
+    update, _ = summary_update(log, dict(log))
+    assert "$inc" not in update
+
+
+def test_summary_view_excludes_live_session():
+    s = summarize([_log("LIVE", 3), _log("S1", 1, ["anxiety"])])
+    v = summary_view(s, exclude_session_id="LIVE")
+    assert v["session_count"] == 1
+    assert v["last"]["session_id"] == "S1"
+    assert summary_view(None)["session_count"] == 0
+
+
+def test_unscored_sessions_stay_out_of_the_sentiment_mean():
+    s = summarize([_log("S2", 2, score=None), _log("S1", 1, score=-0.4)])
+    assert s["sentiment_total"] == -0.4 and s["sentiment_count"] == 1
+    assert s["timeline"][0]["sentiment_score"] is None
+    assert summary_view(s)["sentiment_mean"] == -0.4
+
+    update, _ = summary_update(_log("S3", 3, score=None), None)
+    assert "summary.sentiment_total" not in update["$inc"]
+    assert "summary.sentiment_count" not in update["$inc"]
+
+    scored, _ = summary_update(_log("S3", 3, score=0.3), _log("S3", 3, score=None))
+    assert scored["$inc"] == {"summary.sentiment_total": 0.3, "summary.sentiment_count": 1}
+
+
+def test_summary_view_mean_covers_prior_sessions_only():
+    s = summarize([_log("LIVE", 3, score=0.9), _log("S2", 2, score=-0.2), _log("S1", 1, score=0.4)])
+    assert round(summary_view(s, exclude_session_id="LIVE")["sentiment_mean"], 6) == 0.1
+    assert summary_view(summarize([_log("LIVE", 3, score=0.9)]),
+                        exclude_session_id="LIVE")["sentiment_mean"] is None
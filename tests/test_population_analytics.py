@@ -0,0 +1,213 @@
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+import population_analytics as pa
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    pa._cache.clear()
+    yield
+    pa._cache.clear()
+
+
+class FakeRollups:
+    """Answers the $facet queries from canned rows per ``kind``."""
+
+    def __init__(self, facets, latest=None):
+        self.facets = facets
+        self.latest = latest
+        self.pipelines = []
+        self.deleted = []
+
+    def aggregate(self, pipeline, **kw):
+        self.pipelines.append(pipeline)
+        kind = pipeline[0]["$match"]["kind"]
+        if "$merge" in pipeline[-1]:
+            return iter([])
+        return iter([self.facets.get(kind, {})])
+
+    def find_one(self, *a, **kw):
+        return {"day": self.latest} if self.latest else None
+
+    def delete_many(self, query):
+        self.deleted.append(query)
+
+
+class FakeWindows:
+    """The precomputed window rows, filtered like ``find``."""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.deleted = []
+
+    def find(self, query, projection=None):
+        return [row for row in self.rows
+                if (row["end"], row["days"]) == (query["end"], query["days"])
+                and row["kind"] in query["kind"]["$in"]
+                and query.get("cohort", row["cohort"]) == row["cohort"]]
+
+    def delete_many(self, query):
+        self.deleted.append(query)
+
+
+class FakeDB(dict):
+    def __missing__(self, name):
+        return self.setdefault(name, FakeSessions())
+
+
+class FakeSessions:
+    """Answers the changed-days query with ``changed``; records every pipeline."""
+
+    def __init__(self, changed=()):
+        self.changed = changed
+        self.pipelines = []
+
+    def aggregate(self, pipeline, **kw):
+        self.pipelines.append(pipeline)
+        if "$merge" in pipeline[-1]:
+            return iter([])
+        return iter([{"_id": day} for day in self.changed])
+
+    def delete_many(self, query):
+        self.pipelines.append(("delete", query))
+
+
+def db_with(facets, latest=None, changed=(), windows=()):
+    db = FakeDB()
+    db[pa.ROLLUP_COLLECTION] = FakeRollups(facets, latest)
+    db["sessions"] = FakeSessions(changed)
+    db[pa.WINDOW_COLLECTION] = FakeWindows(windows)
+    return db
+
+
+FACETS = {
+    "all": {"sessions": [{"_id": None, "n": 200}], "patients": [{"_id": None, "n": 80}]},
+    "flag": {"sessions": [{"_id": "suicide_risk", "n": 10}, {"_id": "violence_risk", "n": 4}],
+             "patients": [{"_id": "suicide_risk", "n": 6}, {"_id": "violence_risk", "n": 4}]},
+    "topic": {"sessions": [{"_id": "sleep", "n": 50}, {"_id": "anxiety", "n": 90}]},
+}
+
+
+def test_window_covers_whole_days_up_to_the_end_day():
+    start, end = pa.window(30, datetime(2026, 3, 31, 15, 30))
+    assert (start, end) == (datetime(2026, 3, 2), datetime(2026, 4, 1))
+
+
+def test_refresh_recomputes_the_days_changed_sessions_touch():
+    latest, moved_from = datetime(2026, 3, 30), datetime(2026, 3, 12)
+    db = db_with({}, latest=latest, changed=[latest, moved_from])
+    assert pa.refresh(db=db) == [moved_from, latest]
+    changed, rollup, rolled = db["sessions"].pipelines
+    assert changed[0] == {"$match": {"created_at": {"$gte": latest}}}
+    # The day a session moved away from is recomputed along with its new one.
+    assert db[pa.ROLLUP_COLLECTION].deleted == [{"day": {"$in": [moved_from, latest]}}]
+    assert rollup[0]["$match"]["created_at"] == {"$gte": moved_from}
+    assert rollup[0]["$match"]["$expr"]["$in"][1] == [moved_from, latest]
+    assert rollup[-1]["$merge"]["into"] == pa.ROLLUP_COLLECTION
+    assert rolled[-1]["$merge"]["into"] == pa.ROLLED_DAYS_COLLECTION
+
+    db = db_with({}, latest=latest)
+    assert pa.refresh(db=db) == []  # nothing archived since: nothing recomputed
+    assert len(db["sessions"].pipelines) == 1 and not db[pa.ROLLUP_COLLECTION].deleted
+
+    db = db_with({}, latest=latest)
+    assert pa.refresh(full=True, db=db) is None
+    assert db[pa.ROLLUP_COLLECTION].deleted == [{}]
+    assert db[pa.ROLLED_DAYS_COLLECTION].pipelines == [("delete", {})]
+    assert all("$match" not in p[0] for p in db["sessions"].pipelines)
+
+
+def test_risk_flag_rates_count_sessions_and_distinct_patients():
+    out = pa.risk_flag_rates(30, datetime(2026, 3, 31), db=db_with(FACETS))
+    assert (out["sessions"], out["patients"]) == (200, 80)
+    assert out["flags"][0] == {"label": "suicide_risk", "sessions": 10, "patients": 6,
+                               "session_rate": 0.05, "patient_rate": 0.075}
+
+
+def test_topic_results_are_sorted_and_cached():
+    db = db_with(FACETS)
+    out = pa.topic_frequencies(30, datetime(2026, 3, 31), db=db)
+    assert [t["label"] for t in out["topics"]] == ["anxiety", "sleep"]
+    assert out["topics"][0]["share"] == 0.45
+    calls = len(db[pa.ROLLUP_COLLECTION].pipelines)
+    pa.topic_frequencies(30, datetime(2026, 3, 31, 9), db=db)  # same window
+    assert len(db[pa.ROLLUP_COLLECTION].pipelines) == calls
+
+
+def test_topic_trends_compare_with_the_previous_window(monkeypatch):
+    def frequencies(days, end, cohort, db):
+        start, stop = pa.window(days, end)
+        shares = ({"anxiety": 0.4, "sleep": 0.1} if stop == datetime(2026, 4, 1)
+                  else {"anxiety": 0.5, "grief": 0.2})
+        return {"start": start, "end": stop,
+                "topics": [{"label": k, "sessions": 1, "share": v} for k, v in shares.items()]}
+
+    monkeypatch.setattr(pa, "topic_frequencies", frequencies)
+    trends = pa.topic_trends(30, datetime(2026, 3, 31))["trends"]
+    assert [(t["label"], t["change"]) for t in trends] == [
+        ("sleep", 0.1), ("anxiety", -0.1), ("grief", -0.2)]
+
+
+def test_sessions_without_a_sentiment_score_are_not_averaged_as_neutral():
+    group = next(stage["$group"] for stage in pa.rollup_pipeline() if "$group" in stage)
+    assert group["sentiment_sum"] == {"$sum": "$sentiment"}  # $sum skips nulls
+    assert group["sentiment_count"] == {"$sum": {"$cond": [{"$isNumber": "$sentiment"}, 1, 0]}}
+
+
+def test_one_refresh_runs_at_a_time(monkeypatch):
+    running, overlaps = [], []
+    release = threading.Event()
+
+    def slow_refresh(full, db):
+        overlaps.append(len(running))
+        running.append(1)
+        release.wait(1)
+        running.pop()
+
+    monkeypatch.setattr(pa, "_refresh", slow_refresh)
+    monkeypatch.setattr(pa, "_last_refresh", 0.0)
+    monkeypatch.setattr(pa, "_refreshing", None)
+    api = threading.Thread(target=pa.refresh)
+    api.start()
+    while not running:
+        time.sleep(0.01)
+    pa.ensure_fresh()  # stale, but the API's refresh is running: no second one
+    assert pa._refreshing is None
+    second = threading.Thread(target=pa.refresh)
+    second.start()
+    release.set()
+    api.join(5)
+    second.join(5)
+    assert overlaps == [0, 0]
+
+
+def test_refresh_precomputes_patients_for_the_standard_windows(monkeypatch):
+    monkeypatch.setattr(pa.settings, "analytics_windows", "30, 7")
+    db = db_with({}, latest=datetime(2026, 3, 30))
+    pa.refresh(db=db)
+    assert db[pa.WINDOW_COLLECTION].deleted == [{}]
+    windows = [p for p in db[pa.ROLLUP_COLLECTION].pipelines if "$merge" in p[-1]]
+    assert [p[0]["$match"]["day"] for p in windows] == [
+        {"$gte": start, "$lt": end} for start, end in (pa.window(7), pa.window(30))]
+    assert windows[0][-1]["$merge"]["into"] == pa.WINDOW_COLLECTION
+
+
+def test_standard_windows_read_patients_from_the_precomputed_rows():
+    start, end = pa.window(30, datetime(2026, 3, 31))
+    rows = [{"end": end, "days": 30, "cohort": cohort, "kind": kind, "label": label, "patients": n}
+            for cohort, kind, label, n in [("2026-01", "all", None, 50), ("2026-02", "all", None, 30),
+                                           ("2026-01", "flag", "suicide_risk", 4),
+                                           ("2026-02", "flag", "suicide_risk", 2)]]
+    db = db_with(FACETS, windows=rows)
+    out = pa.risk_flag_rates(30, datetime(2026, 3, 31), db=db)
+    assert (out["sessions"], out["patients"]) == (200, 80)
+    assert out["flags"][0]["patients"] == 6
+    assert all("patients" not in p[1]["$facet"] for p in db[pa.ROLLUP_COLLECTION].pipelines)
+
+    pa._cache.clear()
+    out = pa.risk_flag_rates(30, datetime(2026, 3, 31), cohort="2026-02", db=db)
+    assert (out["patients"], out["flags"][0]["patients"]) == (30, 2)
@@ -0,0 +1,105 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+import prompt_budget
+from config import Settings
+from prompt_budget import build_prompt, clip, count_tokens, truncate
+
+_get_tokenizer = prompt_budget._get_tokenizer
+
+
+@pytest.fixture(autouse=True)
+def no_tokenizer(monkeypatch):
+    # Deterministic length-based counts (4 characters per token).
+    monkeypatch.setattr(prompt_budget, "_get_tokenizer", lambda: None)
+
+
+def _transcript(n):
+    return "\n".join(f"Patient: turn {i:03d} " + "x" * 40 for i in range(n))
+
+
+def test_short_text_is_untouched():
+    assert clip("Patient: hi\nDoctor: hello", 100) == "Patient: hi\nDoctor: hello"
+    assert truncate("short", 10) == "short"
+
+
+@pytest.mark.parametrize("keep", ["head", "tail", "ends"])
+def test_clip_fits_budget_on_line_boundaries(keep):
+    text = _transcript(200)
+    out = clip(text, 300, keep)
+    assert count_tokens(out) <= 300
+    assert "lines omitted for length" in out
+    kept = [line for line in out.splitlines() if line.startswith("Patient:")]
+    assert all(line in text.splitlines() for line in kept)
+    if keep in ("head", "ends"):
+        assert out.startswith("Patient: turn 000")
+    if keep in ("tail", "ends"):
+        assert out.endswith(text.splitlines()[-1])
+
+
+def test_lowest_priority_section_is_cut_first():
+    template = "RECORD:\n{record}\nCASES:\n{cases}\nTRANSCRIPT:\n{transcript}\n"
+    budget = {
+        "total": 400,
+        "sections": {
+            "transcript": (300, 100, "tail"),
+            "record": (100, 90, "head"),
+            "cases": (300, 10, "head"),
+        },
+    }
+    record = "age: 34\nconcern: sleep"
+    prompt = build_prompt(template, budget, record=record,
+                          cases=_transcript(100), transcript=_transcript(20))
+    assert count_tokens(prompt) <= 400
+    assert record in prompt
+    assert _transcript(20) in prompt  # the high-priority section survives whole
+    cases = prompt.split("CASES:\n")[1].split("\nTRANSCRIPT:")[0]
+    assert count_tokens(cases) < 300
+
+
+def test_unlisted_sections_pass_through():
+    assert build_prompt("Q: {question}", {"total": 1, "sections": {}}, question="why?") == "Q: why?"
+
+
+class WordTokenizer:
+    def encode(self, text, add_special_tokens=True):
+        return text.split()
+
+
+def test_default_setting_counts_with_the_chat_models_tokenizer(monkeypatch):
+    loaded = []
+
+    def from_pretrained(name):
+        loaded.append(name)
+        return WordTokenizer()
+
+    default = Settings().prompt_tokenizer
+    monkeypatch.setitem(sys.modules, "transformers",
+                        SimpleNamespace(AutoTokenizer=SimpleNamespace(from_pretrained=from_pretrained)))
+    monkeypatch.setattr(prompt_budget, "settings", SimpleNamespace(prompt_tokenizer=default))
+    monkeypatch.setattr(prompt_budget, "_get_tokenizer", _get_tokenizer)
+    monkeypatch.setattr(prompt_budget, "_tokenizer_load", None)
+
+    text = "a fairly long sentence of words"
+    count_tokens(text)  # starts the load
+    prompt_budget._tokenizer_load.result(timeout=5)
+
+    assert loaded == ["unsloth/Llama-3.3-70B-Instruct"]
+    assert count_tokens(text) == 6
+
+
+def test_an_unloadable_tokenizer_falls_back_to_the_estimate(monkeypatch):
+    def from_pretrained(name):
+        raise OSError("offline")
+
+    monkeypatch.setitem(sys.modules, "transformers",
+                        SimpleNamespace(AutoTokenizer=SimpleNamespace(from_pretrained=from_pretrained)))
+    monkeypatch.setattr(prompt_budget, "settings", SimpleNamespace(prompt_tokenizer="some/tokenizer"))
+    monkeypatch.setattr(prompt_budget, "_get_tokenizer", _get_tokenizer)
+    monkeypatch.setattr(prompt_budget, "_tokenizer_load", None)
+
+    count_tokens("warm up")
+    assert prompt_budget._tokenizer_load.result(timeout=5) is None
+    assert count_tokens("x" * 40) == 10
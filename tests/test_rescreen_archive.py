@@ -0,0 +1,60 @@
+import rescreen_archive
+
+
+class _Collection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = []
+        self.writes = []
+
+    def find(self, query, projection=None, **kw):
+        self.queries.append(query)
+        return list(self.docs)
+
+    def bulk_write(self, ops, ordered=True):
+        self.writes.extend(ops)
+
+
+def _db():
+    convos = _Collection([
+        {"_id": 1, "session_id": "S1", "patient_id": "PT-1", "messages": [
+            {"content": "How are you?", "speaker": "doctor", "is_user": False},
+            {"content": "Honestly I want to end it all", "speaker": "patient", "is_user": True},
+            {"content": "There was abuse at home", "speaker": "patient", "is_user": True},
+        ]},
+        {"_id": 2, "session_id": "S2", "patient_id": "PT-2", "messages": [
+            # Legacy message without a speaker: is_user decides.
+            {"content": "I feel suicidal", "is_user": True},
+            {"content": "I keep wanting to kill myself", "speaker": "doctor", "is_user": False},
+        ]},
+    ])
+    sessions = _Collection([
+        {"session_id": "S1", "risk_flags": ["suicide_risk"]},
+        {"session_id": "S2", "risk_flags": []},
+    ])
+    return {"PatientConvo": convos, "sessions": sessions}
+
+
+def test_rescreen_reports_newly_flagged_sessions_and_writes_flags():
+    db = _db()
+    report = rescreen_archive.rescreen_archive(db, workers=1)
+    assert report["conversations"] == 2
+    assert report["messages"] == 3  # patient messages only
+    assert report["flagged_messages"] == 3
+    new = {(i["session_id"], tuple(i["flags"])) for i in report["newly_flagged_sessions"]}
+    assert new == {("S1", ("abuse_disclosure",)), ("S2", ("suicide_risk",))}
+
+    writes = {op._filter["_id"]: op._doc["$set"] for op in db["PatientConvo"].writes}
+    assert writes[1]["messages.1.metadata.safety_flags"] == ["suicide_risk"]
+    assert writes[1]["messages.2.metadata.safety_flags"] == ["abuse_disclosure"]
+    assert "messages.0.metadata.safety_flags" not in writes[1]
+    assert writes[2]["safety_screen"]["version"] == report["version"]
+    # Only conversations not yet screened with this phrase-list version are read.
+    assert db["PatientConvo"].queries[0] == {"safety_screen.version": {"$ne": report["version"]}}
+
+
+def test_dry_run_writes_nothing():
+    db = _db()
+    report = rescreen_archive.rescreen_archive(db, workers=1, write=False, rescreen_all=True)
+    assert report["written"] is False and db["PatientConvo"].writes == []
+    assert db["PatientConvo"].queries[0] == {}
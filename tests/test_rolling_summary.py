@@ -0,0 +1,60 @@
+import threading
+
+from rolling_summary import RollingSummary
+
+
+def _turns(n):
+    return [f"Patient: turn {i}" for i in range(n)]
+
+
+def _wait(summary):
+    summary._future.result(timeout=5)
+
+
+def test_short_sessions_get_the_plain_transcript():
+    summary = RollingSummary(recent_turns=4, fold_turns=3, summarize=lambda s, t: "unused")
+    assert summary.context(_turns(6)) == "\n".join(_turns(6))
+    assert summary._future is None
+
+
+def test_older_turns_fold_into_the_summary_in_the_background():
+    calls = []
+
+    def summarize(previous, turns):
+        calls.append((previous, list(turns)))
+        return f"summary of {len(turns)} turns"
+
+    summary = RollingSummary(recent_turns=4, fold_turns=3, summarize=summarize)
+    turns = _turns(7)
+    # The fold is in flight: this turn still goes out verbatim.
+    assert summary.context(turns) == "\n".join(turns)
+    _wait(summary)
+    assert calls == [("", turns[:3])]
+
+    turns = _turns(8)
+    out = summary.context(turns)
+    assert out.startswith("[Summary of earlier turns]\nsummary of 3 turns")
+    assert out.endswith("\n".join(turns[3:]))
+    assert "Patient: turn 2\n" not in out
+
+
+def test_failed_fold_keeps_turns_verbatim_and_retries():
+    gate = threading.Event()
+
+    def summarize(previous, turns):
+        if not gate.is_set():
+            raise RuntimeError("model unreachable")
+        return "recovered"
+
+    summary = RollingSummary(recent_turns=2, fold_turns=2, summarize=summarize)
+    assert summary.context(_turns(4)) == "\n".join(_turns(4))
+    try:
+        _wait(summary)
+    except RuntimeError:
+        pass
+    assert summary.folded == 0
+
+    gate.set()
+    summary.context(_turns(5))
+    _wait(summary)
+    assert (summary.summary, summary.folded) == ("recovered", 3)
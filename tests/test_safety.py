@@ -62,3 +62,78 @@ def test_benign_text_not_flagged():
         "we discussed scheduling next week",
     ]:
         assert SafetyChecker().check_input(text) is None, text
+
+
+def test_screen_reports_every_flag_with_spans():
+    text = "There was abuse at home. Now I want to KILL myself."
+    result = SafetyChecker().screen(text)
+    found = {(m["flag_type"], text[m["start"]:m["end"]]) for m in result["matches"]}
+    assert ("abuse_disclosure", "abuse") in found
+    # One phrase can raise several flags.
+    assert ("suicide_risk", "KILL myself") in found
+    assert ("violence_risk", "KILL myself") in found
+    assert result["protocol"]["flag_type"] == "suicide_risk"
+
+
+def test_screen_respects_word_boundaries():
+    checker = SafetyChecker()
+    for text in ["the painkiller helped", "a grapevine", "we discussed the therapist's notes"]:
+        assert checker.screen(text)["matches"] == [], text
+    assert checker.check_input("I dont want to live") is not None
+    assert checker.check_input("thinking about self harm") is not None
+
+
+def test_screen_spans_index_original_text():
+    # "İ" lowercases to two characters; spans must still match the input.
+    text = "İİ I want to die"
+    m = SafetyChecker().screen(text)["matches"][0]
+    assert text[m["start"]:m["end"]] == "want to die"
+
+
+def test_screen_finds_a_flag_at_the_end_of_a_long_transcript():
+    # Timing is covered by the budget in test_hot_path_benchmarks.py.
+    turn = "I had a rough week at work and couldn't sleep, my manager keeps piling on tasks. "
+    transcript = turn * 125 + "and sometimes I want to end it all."  # ~10k chars
+    assert SafetyChecker().screen(transcript)["protocol"]["flag_type"] == "suicide_risk"
+
+
+def test_stream_catches_phrase_split_across_chunks():
+    stream = SafetyChecker().stream()
+    assert stream.feed("Lately I feel like I want to d") == []
+    # Complete but not yet confirmed: "die" could still become "diet".
+    assert stream.feed("ie") == []
+    new = stream.feed(" some days")
+    assert [(m["flag_type"], m["start"], m["text"]) for m in new] == [("suicide_risk", 21, "want to die")]
+    assert stream.protocol["flag_type"] == "suicide_risk"
+    assert stream.feed(" and the diet") == []
+
+
+def test_stream_flush_releases_trailing_match_and_matches_screen():
+    checker = SafetyChecker()
+    text = "He abused me. Sometimes I want to hurt myself"
+    stream = checker.stream()
+    got = []
+    for i in range(0, len(text), 3):
+        got += stream.feed(text[i:i + 3])
+    assert [m["flag_type"] for m in got] == ["abuse_disclosure"]
+    got += stream.flush()
+    assert got == checker.screen(text)["matches"]
+    assert stream.protocol["action"] == "CRITICAL"
+
+
+def test_stream_ignores_word_prefixes():
+    stream = SafetyChecker().stream()
+    for chunk in ["the rape", "seed harvest", " was abuse", "r-free"]:
+        stream.feed(chunk)
+    assert [m["text"] for m in stream.flush() + stream.matches] == ["abuser"]
+
+
+def test_stream_peek_counts_a_trailing_match_without_consuming_it():
+    stream = SafetyChecker().stream()
+    stream.feed("honestly I want to kill myself")
+    assert stream.protocol is None
+    assert stream.peek()["flag_type"] == "suicide_risk"
+    assert stream.protocol is None and stream.matches == []
+    # The stream goes on as if peek had not happened.
+    assert {m["text"] for m in stream.feed(" sometimes")} == {"kill myself"}
+    assert stream.protocol["flag_type"] == "suicide_risk"
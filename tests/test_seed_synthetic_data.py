@@ -0,0 +1,67 @@
+import threading
+from datetime import datetime
+
+import seed_synthetic_data as seed
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+        self.calls = []
+
+    def insert_many(self, docs, ordered=True):
+        self.calls.append((len(docs), ordered))
+        self.docs.extend(docs)
+
+    def estimated_document_count(self):
+        return len(self.docs)
+
+
+class FakeDB(dict):
+    def __missing__(self, name):
+        return self.setdefault(name, FakeCollection())
+
+
+class FakeIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ids = []
+
+    def upsert(self, vectors, namespace):
+        with self.lock:
+            self.ids.extend(v["id"] for v in vectors)
+
+
+class FakeEmbed:
+    def embed_documents(self, texts):
+        return [[float(len(t))] for t in texts]
+
+
+def test_chunks_are_reproducible_and_corpus_questions_distinct():
+    now = datetime(2026, 3, 1)
+    assert seed.patient_chunk(1, 5, now=now) == seed.patient_chunk(1, 5, now=now)
+    chunk = seed.patient_chunk(11, 15, n_sessions=3)
+    assert [p["patient_id"] for p in chunk["patients"]] == ["PT-0011", "PT-0012", "PT-0013", "PT-0014"]
+    assert len(chunk["sessions"]) == len(chunk["PatientConvo"]) == 12
+
+    docs = seed.corpus_chunk(1, 14 * len(seed._TOPICS) + 1)
+    assert len({d["questionText"] for d in docs}) == len(docs)
+    assert docs == seed.corpus_chunk(1, len(docs) + 1)
+
+
+def test_seed_patients_inserts_bounded_unordered_chunks():
+    db, lines = FakeDB(), []
+    counts = seed.seed_patients(db, 10, sessions_per_patient=2, batch_size=4, workers=1,
+                                out=lines.append)
+    assert counts == {"patients": 10, "sessions": 20, "PatientConvo": 20}
+    assert sorted(db["patients"].calls) == [(2, False), (4, False), (4, False)]
+    assert sorted(p["patient_id"] for p in db["patients"].docs)[-1] == "PT-0010"
+    assert lines[-1].startswith("  patients: 10/10")
+
+
+def test_seed_corpus_indexes_every_inserted_document():
+    db, index = FakeDB(), FakeIndex()
+    assert seed.seed_corpus(db, index, FakeEmbed(), 250, batch_size=100, workers=2,
+                            out=lambda line: None) == 250
+    assert [n for n, _ in db[seed.CORPUS_COLLECTION].calls] == [100, 100, 50]
+    assert sorted(index.ids) == sorted(f"q{i}" for i in range(1, 251))
@@ -0,0 +1,59 @@
+import statistics
+from datetime import datetime, timedelta
+
+import pytest
+
+from session_aggregate import SessionAggregate
+
+START = datetime(2026, 1, 5, 9, 0)
+
+
+def session():
+    agg = SessionAggregate(started_at=START)
+    agg.add_turn(sentiment_score=-0.8, emotion="sadness", topic="depression", topic_confidence=0.9)
+    agg.add_turn(sentiment_score=-0.4, emotion="fear", topic="anxiety", topic_confidence=0.3,
+                 flag_type="suicide_risk", at=START + timedelta(minutes=4))
+    agg.add_turn(sentiment_score=0.5, emotion="sadness", topic="depression", topic_confidence=0.6,
+                 flag_type="violence_risk", at=START + timedelta(minutes=9))
+    return agg
+
+
+def test_running_stats_match_a_full_recompute():
+    agg = session()
+    scores = [-0.8, -0.4, 0.5]
+    assert agg.sentiment_mean == pytest.approx(statistics.mean(scores))
+    assert agg.sentiment_std == pytest.approx(statistics.stdev(scores))
+    assert (agg.sentiment_min, agg.sentiment_max) == (-0.8, 0.5)
+    assert agg.sentiment_series == scores
+    assert agg.sentiment_label == "Negative"
+
+
+def test_histograms_topics_and_time_to_flag():
+    agg = session()
+    assert agg.emotions == {"sadness": 2, "fear": 1}
+    assert agg.dominant_topic() == ("depression", pytest.approx(1.5 / 1.8))
+    assert agg.flags == {"suicide_risk": 1, "violence_risk": 1}
+    assert (agg.first_flag, agg.first_flag_seconds) == ("suicide_risk", 240.0)
+    assert "First risk flag: suicide_risk after 4.0 min" in agg.summary_text()
+
+
+def test_degraded_signals_are_skipped_not_counted_as_neutral():
+    agg = SessionAggregate(started_at=START)
+    agg.add_turn(sentiment_score=None, emotion=None, topic=None)
+    assert agg.turns == 1 and agg.sentiment_count == 0 and agg.emotions == {}
+    assert agg.dominant_topic() == (None, 0.0)
+
+
+def test_round_trips_through_the_session_log():
+    agg = session()
+    restored = SessionAggregate.from_dict(agg.as_dict())
+    restored.add_turn(sentiment_score=0.1)
+    agg.add_turn(sentiment_score=0.1)
+    assert restored.as_dict() == agg.as_dict()
+
+
+def test_dashboard_reads_the_precomputed_series():
+    pytest.importorskip("streamlit")
+    from dashboard import trajectory
+    points, delta, _, has = trajectory([], session())
+    assert has and delta == "▲ +1.30" and len(points.split()) == 3
@@ -48,3 +48,48 @@ def test_build_history_summary():
         {"created_at": "2026-06-01T00:00:00", "detected_topics": ["anxiety"], "risk_flags": ["suicide_risk"]}
     ])
     assert "2026-06-01" in s and "anxiety" in s and "suicide_risk" in s
+
+
+def _chunks(text, size=5):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+_REPLY = (
+    'Here you go:\n```json\n{"red_flags": ["hopelessness - \\"no way out\\""], '
+    '"next_questions": ["Consider asking about sleep, [routine]", "Consider asking about support"], '
+    '"emotional_state": "low, withdrawn {guarded}", "state_confidence": "Medium", '
+    '"missing_info": [], "follow_ups": ["work"], "caveat": ""}\n```'
+)
+
+
+def test_suggestion_stream_emits_fields_as_they_complete():
+    from session_assistant import SuggestionStream
+
+    stream = SuggestionStream()
+    seen = []
+    for chunk in _chunks(_REPLY):
+        for key in stream.feed(chunk):
+            seen.append((key, len(stream.fields[key]) if isinstance(stream.fields[key], list) else None))
+    # Red flags land first, then each question as soon as it is written.
+    assert seen[:3] == [("red_flags", 1), ("next_questions", 1), ("next_questions", 2)]
+    assert stream.done
+    assert stream.suggestions() == parse_suggestions(_REPLY)
+
+
+def test_stream_session_suggestions_yields_partials_then_the_full_parse(monkeypatch):
+    import llm_cache
+    import session_assistant
+
+    monkeypatch.setattr(session_assistant, "_build_prompt", lambda *a, **kw: "prompt")
+    monkeypatch.setattr(llm_cache, "stream", lambda prompt, purpose: iter(_chunks(_REPLY)))
+    updates = list(session_assistant.stream_session_suggestions("t", "p", "h", "s", [], "q"))
+    assert updates[0]["red_flags"] and not updates[0]["next_questions"]
+    assert updates[-1] == parse_suggestions(_REPLY)
+
+    def broken(prompt, purpose):
+        yield '{"red_flags": ["a"],'
+        raise ConnectionError("groq down")
+
+    monkeypatch.setattr(llm_cache, "stream", broken)
+    updates = list(session_assistant.stream_session_suggestions("t", "p", "h", "s", [], "q"))
+    assert updates[-1]["_error"] == "generation_failed"
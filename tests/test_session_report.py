@@ -0,0 +1,36 @@
+import llm_cache
+import session_report
+
+
+def test_report_streams_and_falls_back(monkeypatch):
+    monkeypatch.setattr(session_report, "_build_prompt", lambda *a: "prompt")
+    monkeypatch.setattr(llm_cache, "stream",
+                        lambda prompt, purpose, refresh: iter(["**Presentation**", " — anxiety"]))
+    assert "".join(session_report.stream_session_report({}, "", "")) == "**Presentation** — anxiety"
+
+    def down(prompt, purpose, refresh):
+        raise ConnectionError("groq down")
+        yield
+
+    monkeypatch.setattr(llm_cache, "stream", down)
+    assert list(session_report.stream_session_report({}, "", "")) == [session_report._UNAVAILABLE]
+
+
+def test_regenerating_the_report_asks_the_model_again(monkeypatch):
+    calls = []
+
+    def complete(prompt, purpose, refresh):
+        calls.append(refresh)
+        return "report"
+
+    monkeypatch.setattr(session_report, "_build_prompt", lambda *a: "prompt")
+    monkeypatch.setattr(llm_cache, "complete", complete)
+    session_report.generate_session_report({}, "", "")
+    session_report.generate_session_report({}, "", "", refresh=True)
+    assert calls == [False, True]
+
+    seen = []
+    monkeypatch.setattr(llm_cache, "stream",
+                        lambda prompt, purpose, refresh: seen.append(refresh) or iter(["new"]))
+    assert list(session_report.stream_session_report({}, "", "", refresh=True)) == ["new"]
+    assert seen == [True]
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from speculative import SpeculativeAnalysis
+
+STAGES = {"urgency": {"urgency": {"is_urgent": False, "label": "joy", "score": 0.7}},
+          "analysis": {"predicted_topic": "sleep"},
+          "retrieval": {"historical_examples": [{"questionText": "q"}]}}
+
+
+def analysis(run=None):
+    calls = []
+
+    def default(text):
+        calls.append(text)
+        return dict(STAGES)
+
+    return SpeculativeAnalysis(min_chars=5, run=run or default), calls
+
+
+def test_the_same_text_reuses_every_stage():
+    spec, calls = analysis()
+    assert not spec.prefetch("hi")  # too short to be worth it
+    assert spec.prefetch("I slept  badly ")
+    assert spec.take("I slept badly") == STAGES
+    assert calls == ["I slept badly"]
+    assert spec.take("I slept badly") == {}  # taken once
+
+
+def test_an_extended_draft_keeps_only_retrieval():
+    spec, _ = analysis()
+    spec.prefetch("I slept badly all week")
+    spec._future.result(1)
+    assert spec.take("I slept badly all week now") == {"retrieval": STAGES["retrieval"]}
+
+    spec.prefetch("I slept")
+    spec._future.result(1)
+    assert spec.take("I slept badly all week now") == {}  # covers too little
+    spec.prefetch("I slept badly all week")
+    assert spec.take("Work is fine") == {}
+
+
+def test_one_prefetch_runs_at_a_time():
+    release = threading.Event()
+    spec, _ = analysis(run=lambda text: release.wait(1) and STAGES)
+    assert spec.prefetch("I slept badly")
+    assert not spec.prefetch("I slept  badly")  # the same draft: already running
+    release.set()
+    assert spec.take("I slept badly") == STAGES
+
+
+def test_the_latest_draft_skipped_while_busy_runs_next():
+    release = threading.Event()
+    calls = []
+
+    def run(text):
+        calls.append(text)
+        release.wait(1)
+        return STAGES
+
+    spec, _ = analysis(run=run)
+    assert spec.prefetch("I slept badly")
+    assert not spec.prefetch("I slept badly all")
+    assert not spec.prefetch("I slept badly all week")  # replaces the queued draft
+    release.set()
+    deadline = time.monotonic() + 5
+    while len(calls) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert spec.take("I slept badly all week") == STAGES
+    assert calls == ["I slept badly", "I slept badly all week"]
+
+
+def test_a_failed_prefetch_falls_back_to_a_full_turn():
+    def boom(text):
+        raise RuntimeError("model down")
+
+    spec, _ = analysis(run=boom)
+    spec.prefetch("I slept badly")
+    assert spec.take("I slept badly") == {}
@@ -0,0 +1,107 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+import analysis_memo
+import unified_guidance
+from config import settings
+
+
+@pytest.fixture(autouse=True)
+def fresh_memo():
+    analysis_memo.clear()
+    yield
+    analysis_memo.clear()
+
+
+def test_screen_message_returns_crisis_with_stages_pending():
+    result = unified_guidance.screen_message("I want to end it all", {"patient_id": "PT-1"})
+    assert result["safety_protocol"]["action"] == "CRITICAL"
+    assert result["pending"] == list(unified_guidance.ANALYSIS_STAGES)
+    assert result["patient_profile"] == {"patient_id": "PT-1"}
+
+
+def test_priority_mode_is_configurable(monkeypatch):
+    crisis = unified_guidance.screen_message("I want to end it all")
+    urgent = unified_guidance.screen_message("there was abuse at home")
+    calm = unified_guidance.screen_message("I slept well")
+    assert unified_guidance.is_priority_crisis(crisis)
+    assert not unified_guidance.is_priority_crisis(urgent)
+    assert not unified_guidance.is_priority_crisis(calm)
+
+    monkeypatch.setattr(settings, "crisis_priority_actions", "CRITICAL, URGENT")
+    assert unified_guidance.is_priority_crisis(urgent)
+    monkeypatch.setattr(settings, "crisis_priority_mode", False)
+    assert not unified_guidance.is_priority_crisis(crisis)
+
+
+def test_complete_analysis_patches_stages_into_the_screened_result(monkeypatch):
+    def broken_search(*a, **kw):
+        raise ConnectionError("pinecone down")
+
+    monkeypatch.setitem(sys.modules, "urgency_detector", SimpleNamespace(
+        load_urgency_detector=lambda: None, detect_urgency=lambda text, d: (False, "sadness", 0.4)))
+    monkeypatch.setitem(sys.modules, "topic_classifier", SimpleNamespace(
+        load_topic_classifier=lambda: None, predict_topic=lambda text, c: ("depression", 0.8)))
+    monkeypatch.setitem(sys.modules, "patient_ml", SimpleNamespace(
+        SENTIMENT_MODEL="fake", classify_sentiment=lambda text: ("negative", -0.7)))
+    monkeypatch.setitem(sys.modules, "semantic_search", SimpleNamespace(semantic_search=broken_search))
+
+    result = unified_guidance.screen_message("I want to end it all")
+    same = unified_guidance.complete_analysis(result, "I want to end it all", "Doctor: hi")
+    assert same is result and result["pending"] == []
+    # The crisis keeps the turn urgent even though the emotion model did not.
+    assert result["urgency"] == {"is_urgent": True, "label": "sadness", "score": 0.4}
+    assert result["predicted_topic"] == "depression" and result["sentiment_score"] == -0.7
+    assert "Doctor: hi" in result["analysis_context"]
+    assert result["errors"] == ["retrieval"]
+    assert result["safety_protocol"]["flag_type"] == "suicide_risk"
+
+
+def test_a_stage_past_its_deadline_is_degraded_not_awaited(monkeypatch):
+    import time
+
+    def slow_search(*a, **kw):
+        time.sleep(0.5)
+        return [{"questionText": "late"}]
+
+    monkeypatch.setattr(settings, "model_stage_timeout_seconds", 0.1)
+    monkeypatch.setitem(sys.modules, "urgency_detector", SimpleNamespace(
+        load_urgency_detector=lambda: None, detect_urgency=lambda text, d: (True, "fear", 0.9)))
+    monkeypatch.setitem(sys.modules, "topic_classifier", SimpleNamespace(
+        load_topic_classifier=lambda: None, predict_topic=lambda text, c: ("anxiety", 0.6)))
+    monkeypatch.setitem(sys.modules, "patient_ml", SimpleNamespace(
+        SENTIMENT_MODEL="fake", classify_sentiment=lambda text: ("negative", -0.5)))
+    monkeypatch.setitem(sys.modules, "semantic_search", SimpleNamespace(semantic_search=slow_search))
+
+    start = time.monotonic()
+    result = unified_guidance.analyze_message("I can't sleep")
+    assert time.monotonic() - start < 0.4
+    assert result["errors"] == ["retrieval"]
+    assert result["historical_examples"] == []
+    assert result["predicted_topic"] == "anxiety"
+    assert "Latest Message: I can't sleep" in result["analysis_context"]
+
+
+def test_prefetched_stages_are_reused_not_rerun(monkeypatch):
+    searches = []
+    monkeypatch.setitem(sys.modules, "urgency_detector", SimpleNamespace(
+        load_urgency_detector=lambda: None, detect_urgency=lambda text, d: (False, "joy", 0.7)))
+    monkeypatch.setitem(sys.modules, "topic_classifier", SimpleNamespace(
+        load_topic_classifier=lambda: None, predict_topic=lambda text, c: ("sleep", 0.9)))
+    monkeypatch.setitem(sys.modules, "patient_ml", SimpleNamespace(
+        SENTIMENT_MODEL="fake", classify_sentiment=lambda text: ("positive", 0.6)))
+    monkeypatch.setitem(sys.modules, "semantic_search", SimpleNamespace(
+        semantic_search=lambda text, top_k: searches.append(text) or [{"questionText": text}]))
+
+    prefetched = unified_guidance.prefetch_stages("I slept well")
+    assert set(prefetched) == set(unified_guidance.ANALYSIS_STAGES)
+    assert prefetched["retrieval"] == {"historical_examples": [{"questionText": "I slept well"}]}
+
+    result = unified_guidance.screen_message("I slept well")
+    unified_guidance.complete_analysis(result, "I slept well",
+                                       prefetched={"retrieval": prefetched["retrieval"]})
+    assert searches == ["I slept well"]  # not searched again
+    assert result["historical_examples"] == [{"questionText": "I slept well"}]
+    assert result["predicted_topic"] == "sleep" and result["pending"] == []
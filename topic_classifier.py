@@ -2,6 +2,8 @@ import logging
 from functools import lru_cache
 from transformers import pipeline
 
+from chunked_inference import zero_shot_scores
+
 logger = logging.getLogger(__name__)
 
 CANDIDATE_LABELS = [
@@ -47,11 +49,12 @@ def load_topic_classifier():
 def predict_topic(text: str, classifier=None):
     if classifier is None:
         classifier = load_topic_classifier()
-    result = classifier(text, candidate_labels=CANDIDATE_LABELS)
-    logger.debug("Topic classification result: %s", result)
-    predicted_label = result["labels"][0]
-    score = result["scores"][0]
-    return predicted_label, score
+    # Long text (e.g. a whole session) is classified in overlapping
+    # model-length windows and the label scores averaged.
+    scores = zero_shot_scores(classifier, text, CANDIDATE_LABELS)
+    logger.debug("Topic classification result: %s", scores)
+    predicted_label = max(scores, key=scores.get)
+    return predicted_label, scores[predicted_label]
 
 if __name__ == "__main__":
     classifier = load_topic_classifier()
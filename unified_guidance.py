@@ -1,28 +1,22 @@
 import logging
-from semantic_search import semantic_search
-from topic_classifier import predict_topic, load_topic_classifier
-from patient_ml import analyze_sentiment
-from llm_rag import generate_advice
+from config import settings
+from prompt_budget import clip
 from safety import SafetyChecker
-from urgency_detector import load_urgency_detector, detect_urgency
 
 logger = logging.getLogger(__name__)
 
 # Stateless crisis screener reused across calls.
 _safety_checker = SafetyChecker()
 
+# Stages run after the crisis screen, in order (the names used in ``pending``).
+ANALYSIS_STAGES = ("urgency", "analysis", "retrieval")
 
-def analyze_message(
-    user_input: str,
-    patient_profile: dict | None = None,
-    conversation_history: str = "",
-):
-    """Run the non-LLM analysis for a message and assemble the LLM context.
 
-    Returns a dict with safety, urgency, topic, sentiment, the retrieved
-    ``historical_examples`` and the assembled ``analysis_context`` — but NOT the
-    generated advice, so the advice can be streamed separately. Resilient: a
-    downstream failure still returns the safety signal.
+def screen_message(user_input: str, patient_profile: dict | None = None) -> dict:
+    """Stage 1: the crisis screen, returned as a result seeded with safe defaults.
+
+    Cheap and deterministic, so it bounds the time to a crisis banner; the
+    remaining stages are listed in ``pending`` until ``complete_analysis`` runs.
     """
     logger.debug("Analyzing message: %s", user_input)
 
@@ -37,7 +31,7 @@ def analyze_message(
 
     # Seed with safe, format-friendly defaults so a downstream failure still
     # returns the safety signal and renders without errors.
-    result = {
+    return {
         "predicted_topic": None,
         "topic_confidence": 0.0,
         "sentiment": None,
@@ -50,13 +44,38 @@ def analyze_message(
         # Names of pipeline stages that degraded, so callers/UI can say so
         # instead of presenting a partial result as a clean one.
         "errors": [],
+        # Stages not run yet.
+        "pending": list(ANALYSIS_STAGES),
     }
 
+
+def is_priority_crisis(result: dict) -> bool:
+    """Whether crisis priority mode applies to a screened message.
+
+    True when ``crisis_priority_mode`` is on and the screen raised one of the
+    ``crisis_priority_actions``: the caller should surface the crisis at once and
+    finish the remaining stages in the background.
+    """
+    protocol = result.get("safety_protocol")
+    if not (settings.crisis_priority_mode and protocol):
+        return False
+    actions = {a.strip().upper() for a in settings.crisis_priority_actions.split(",") if a.strip()}
+    return (protocol.get("action") or "").upper() in actions
+
+
+# Result keys each stage fills in; merged back only if the stage finishes in time.
+_STAGE_KEYS = {
+    "urgency": ("urgency",),
+    "analysis": ("predicted_topic", "topic_confidence", "sentiment", "sentiment_score"),
+    "retrieval": ("historical_examples",),
+}
+
+
+def _urgency_stage(result: dict, user_input: str) -> None:
     # Best-effort emotional-urgency detection (heavy model; degrade gracefully).
     try:
-        is_urgent, urgency_label, urgency_score = detect_urgency(
-            user_input, load_urgency_detector()
-        )
+        from analysis_memo import detect_urgency
+        is_urgent, urgency_label, urgency_score = detect_urgency(user_input)
         result["urgency"] = {
             "is_urgent": is_urgent,
             "label": urgency_label,
@@ -66,20 +85,13 @@ def analyze_message(
         logger.exception("Urgency detection failed; defaulting to not urgent.")
         result["errors"].append("urgency")
 
-    # A detected safety crisis is authoritative: always treat it as urgent, even
-    # when the emotion model (which is not a crisis detector) did not flag it.
-    if safety_protocol and not result["urgency"]["is_urgent"]:
-        result["urgency"] = {
-            "is_urgent": True,
-            "label": result["urgency"]["label"] or "crisis",
-            "score": result["urgency"]["score"] if result["urgency"]["score"] is not None else 1.0,
-        }
 
-    # Local topic + sentiment models. Isolated from retrieval below so a failure
-    # in one does not discard the other's result.
+def _topic_sentiment_stage(result: dict, user_input: str) -> None:
+    # Local topic + sentiment models (memoized per text). Isolated from
+    # retrieval below so a failure in one does not discard the other's result.
     try:
-        classifier = load_topic_classifier()
-        predicted_topic, topic_score = predict_topic(user_input, classifier)
+        from analysis_memo import analyze_sentiment, predict_topic
+        predicted_topic, topic_score = predict_topic(user_input)
         logger.debug("Predicted topic: %s with score: %s", predicted_topic, topic_score)
 
         sentiment, sentiment_score = analyze_sentiment(user_input)
@@ -95,33 +107,117 @@ def analyze_message(
         logger.exception("Topic/sentiment analysis failed.")
         result["errors"].append("analysis")
 
+
+def _retrieval_stage(result: dict, user_input: str) -> None:
+    # Retrieval (embedding model + Pinecone + Mongo) isolated in its own stage: a
+    # RAG outage must not throw away the topic/sentiment computed alongside it.
+    try:
+        from semantic_search import semantic_search
+        examples = semantic_search(user_input, top_k=3)
+        logger.debug("Retrieved %d historical examples.", len(examples))
+        result["historical_examples"] = examples
+    except Exception:
+        logger.exception("Semantic retrieval failed; continuing without examples.")
+        result["errors"].append("retrieval")
+
+
+def _build_context(result: dict, user_input: str, conversation_history: str) -> None:
+    # A detected safety crisis is authoritative: always treat it as urgent, even
+    # when the emotion model (which is not a crisis detector) did not flag it.
+    if result["safety_protocol"] and not result["urgency"]["is_urgent"]:
+        result["urgency"] = {
+            "is_urgent": True,
+            "label": result["urgency"]["label"] or "crisis",
+            "score": result["urgency"]["score"] if result["urgency"]["score"] is not None else 1.0,
+        }
+
     # Always assemble the LLM context from whatever signals we have (using the
     # seeded defaults when a stage degraded), so downstream generation never
-    # silently runs on an empty context.
+    # silently runs on an empty context. The history is bounded to its most
+    # recent turns so long sessions do not grow the advice prompt.
+    patient_profile = result["patient_profile"]
     profile_text = "".join(
         f"{k}: {v}\n" for k, v in patient_profile.items()
     ) if patient_profile else ""
     result["analysis_context"] = (
         f"Patient Profile:\n{profile_text}\n"
-        f"Conversation History:\n{conversation_history}\n"
+        f"Conversation History:\n{clip(conversation_history, settings.analysis_history_tokens)}\n"
         f"Latest Message: {user_input}\n"
         f"Predicted Topic: {result['predicted_topic']} (Confidence: {result['topic_confidence']})\n"
         f"Sentiment: {result['sentiment']} (Score: {result['sentiment_score']})"
     )
 
-    # Retrieval (Pinecone + Mongo) isolated in its own block: a RAG outage must
-    # not throw away the topic/sentiment/context computed above.
-    try:
-        examples = semantic_search(user_input, top_k=3)
-        logger.debug("Retrieved %d historical examples.", len(examples))
-        result["historical_examples"] = examples
-    except Exception:
-        logger.exception("Semantic retrieval failed; continuing without examples.")
-        result["errors"].append("retrieval")
 
+def _run_stages(result: dict, user_input: str, stages) -> tuple[dict, set]:
+    # Each stage runs on its own copy of ``result``; returns the finished copies.
+    import background
+
+    runners = {"urgency": _urgency_stage, "analysis": _topic_sentiment_stage,
+               "retrieval": _retrieval_stage}
+    scratch = {name: {**result, "errors": []} for name in stages}
+    done, failed = background.gather(
+        {name: (lambda name=name: runners[name](scratch[name], user_input)) for name in stages},
+        deadlines=dict.fromkeys(stages, settings.model_stage_timeout_seconds),
+    )
+    return {name: scratch[name] for name in done}, failed
+
+
+def prefetch_stages(user_input: str) -> dict:
+    """Run the model stages on ``user_input`` ahead of its turn (speculative.py).
+
+    Returns ``{stage: values}`` for the stages that finished cleanly, to pass
+    to ``complete_analysis`` as ``prefetched``. Touches no session state.
+    """
+    done, _failed = _run_stages(screen_message(user_input), user_input, ANALYSIS_STAGES)
+    return {name: {k: scratch[k] for k in _STAGE_KEYS[name]}
+            for name, scratch in done.items() if not scratch["errors"]}
+
+
+def complete_analysis(result: dict, user_input: str, conversation_history: str = "",
+                      prefetched: dict | None = None) -> dict:
+    """Run the stages after the crisis screen, patching them into ``result``.
+
+    The stages are independent and run concurrently, each on its own copy of
+    the result; a stage that fails or misses ``model_stage_timeout_seconds`` is
+    listed in ``errors`` and its defaults are kept. Stages in ``prefetched``
+    (from ``prefetch_stages`` on the same text) are reused instead of run.
+    Every stage has left ``pending`` on return. Heavy model imports happen
+    here, not at module import, so the screen stays cheap on a cold process.
+    Returns ``result``.
+    """
+    prefetched = prefetched or {}
+    stages = [name for name in ANALYSIS_STAGES if name not in prefetched]
+    done, _failed = _run_stages(result, user_input, stages) if stages else ({}, set())
+    for name in ANALYSIS_STAGES:
+        if name in prefetched:
+            result.update(prefetched[name])
+        elif name in done:
+            result.update({k: done[name][k] for k in _STAGE_KEYS[name]})
+            result["errors"].extend(done[name]["errors"])
+        else:
+            result["errors"].append(name)
+        result["pending"].remove(name)
+    _build_context(result, user_input, conversation_history)
     return result
 
 
+def analyze_message(
+    user_input: str,
+    patient_profile: dict | None = None,
+    conversation_history: str = "",
+):
+    """Run the non-LLM analysis for a message and assemble the LLM context.
+
+    Returns a dict with safety, urgency, topic, sentiment, the retrieved
+    ``historical_examples`` and the assembled ``analysis_context`` — but NOT the
+    generated advice, so the advice can be streamed separately. Resilient: a
+    downstream failure still returns the safety signal. For the crisis fast
+    path, call ``screen_message`` and ``complete_analysis`` separately.
+    """
+    return complete_analysis(screen_message(user_input, patient_profile),
+                             user_input, conversation_history)
+
+
 def generate_counselor_guidance(
     user_input: str,
     patient_profile: dict | None = None,
@@ -143,6 +239,7 @@ def generate_counselor_guidance(
     guidance["generated_advice"] = "I'm sorry, something went wrong."
 
     try:
+        from llm_rag import generate_advice
         advice_obj = generate_advice(
             guidance["analysis_context"], examples=guidance["historical_examples"]
         )
@@ -2,6 +2,8 @@ import logging
 from functools import lru_cache
 from transformers import pipeline
 
+from chunked_inference import classify_scores
+
 logger = logging.getLogger(__name__)
 
 @lru_cache(maxsize=1)
@@ -13,13 +15,13 @@ def load_urgency_detector():
 def detect_urgency(text: str, detector=None, threshold=0.7):
     if detector is None:
         detector = load_urgency_detector()
-    # Truncate to roughly the model's max sequence length to avoid errors on
-    # long concatenated turns (mirrors analyze_sentiment).
-    predictions = detector(text[:512])
+    # Long turns are scored in overlapping model-length windows; an emotion
+    # counts at its strongest window, so one urgent passage is not averaged away.
+    predictions = classify_scores(detector, text, how="max")
     logger.debug("Urgency detector predictions: %s", predictions)
     urgent_emotions = {"anger", "fear", "sadness"}
-    for pred in predictions[0]:
-        if pred['label'].lower() in urgent_emotions and pred['score'] > threshold:
-            logger.info("Urgency detected: %s with score %s", pred['label'], pred['score'])
-            return True, pred['label'], pred['score']
+    for label, score in predictions.items():
+        if label.lower() in urgent_emotions and score > threshold:
+            logger.info("Urgency detected: %s with score %s", label, score)
+            return True, label, score
     return False, None, None